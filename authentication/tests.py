@@ -1,3 +1,118 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from authentication.models import User
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from store.models import Address, Cart, Order, OrderHasItems, Product
 
-# Create your tests here.
+
+class DataExportTests(TestCase):
+    """
+    /api/v1/auth/export-data/ streams a zip of the user's data and media
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test', last_name='User',
+            email='0771234567@example.com'
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = Path(directory.name)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def store(self, name, content=b'jpeg'):
+        path = self.media_root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return name
+
+    def create_request(self, index, **media):
+        part_request = VehiclePartRequest.objects.create(
+            user=self.user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+            part_name=f'Part {index}'
+        )
+        # update() skips save(), which compresses the stored media
+        VehiclePartRequest.objects.filter(pk=part_request.pk).update(**media)
+        return part_request
+
+    def export(self):
+        response = self.client.get('/api/v1/auth/export-data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def read_jsonl(self, archive, name):
+        return [json.loads(line) for line in archive.read(name).decode().splitlines()]
+
+    def test_export_contents(self):
+        part_request = self.create_request(
+            0, vehicle_image=self.store('vehicle_images/front.jpg', b'front'),
+            part_image='part_images/missing.jpg')
+        self.create_request(1)
+        VehiclePartRequestImage.objects.create(
+            request=part_request, image=self.store('request_images/side.jpg', b'side'))
+        product = Product.objects.create(request=part_request, name='Bumper', price=Decimal('100.50'))
+        Product.objects.filter(pk=product.pk).update(image=self.store('product_images/bumper.jpg', b'bumper'))
+        address = Address.objects.create(
+            first_name='Test', last_name='User', country='LK', post_code='10100',
+            city='Colombo', address1='1 Main Street'
+        )
+        order = Order.objects.create(
+            total=Decimal('201.00'), reference_number='ORD-EXPORT', source='web',
+            user=self.user, shipping_address=address, cart=Cart.objects.create()
+        )
+        OrderHasItems.objects.create(order=order, product=product, price=product.price, quantity=2)
+
+        other = User.objects.create_user(
+            phone='0777654321', password='password', first_name='Other', last_name='User',
+            email='0777654321@example.com'
+        )
+        VehiclePartRequest.objects.create(
+            user=other, vehicle_type='car', vehicle_model='Civic', vehicle_year=2015, part_name='Other part')
+
+        with self.assertLogs('authentication.utils', 'WARNING'):
+            archive = self.export()
+        self.assertEqual(archive.namelist(), [
+            'profile.json', 'vehicle_part_requests.jsonl', 'products.jsonl', 'orders.jsonl',
+            'order_items.jsonl', 'addresses.jsonl', 'media/vehicle_images/front.jpg',
+            'media/request_images/side.jpg', 'media/product_images/bumper.jpg',
+        ])
+        self.assertEqual(json.loads(archive.read('profile.json'))['phone'], self.user.phone)
+
+        requests = self.read_jsonl(archive, 'vehicle_part_requests.jsonl')
+        self.assertEqual(sorted(row['part_name'] for row in requests), ['Part 0', 'Part 1'])
+        products, = self.read_jsonl(archive, 'products.jsonl')
+        self.assertEqual((products['name'], products['price']), ('Bumper', '100.50'))
+        orders, = self.read_jsonl(archive, 'orders.jsonl')
+        self.assertEqual((orders['reference_number'], orders['shipping_address_id']), ('ORD-EXPORT', address.pk))
+        items, = self.read_jsonl(archive, 'order_items.jsonl')
+        self.assertEqual((items['product_id'], items['quantity']), (product.pk, 2))
+        addresses, = self.read_jsonl(archive, 'addresses.jsonl')
+        self.assertEqual(addresses['city'], 'Colombo')
+
+        self.assertEqual(archive.read('media/vehicle_images/front.jpg'), b'front')
+        self.assertEqual(archive.read('media/product_images/bumper.jpg'), b'bumper')
+        self.assertEqual(archive.getinfo('media/request_images/side.jpg').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo('orders.jsonl').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/v1/auth/export-data/').status_code, 401)
+
+    def test_shared_media_exported_once(self):
+        image = self.store('vehicle_images/shared.jpg')
+        for index in range(3):
+            self.create_request(index, vehicle_image=image)
+        names = self.export().namelist()
+        self.assertEqual(names.count('media/vehicle_images/shared.jpg'), 1)
+        self.assertEqual(len(names), len(set(names)))
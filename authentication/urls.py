@@ -10,7 +10,8 @@ from .views import (
     password_reset_confirm_view,
     verify_otp_view,
     change_password_view,
-    delete_account_view
+    delete_account_view,
+    export_data_view
 )
 
 urlpatterns = [
@@ -25,4 +26,5 @@ urlpatterns = [
     path('verify-otp/', verify_otp_view, name='verify-otp'),
     path('change-password/', change_password_view, name='change-password'),
     path('delete-account/', delete_account_view, name='delete-account'),
+    path('export-data/', export_data_view, name='export-data'),
 ]
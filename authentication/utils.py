@@ -0,0 +1,134 @@
+"""
+Utilities for the authentication app
+Builds the streamed personal data export for a user account
+"""
+import json
+import logging
+import zipfile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from common.utils import queryset_iterator
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 500
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+REQUEST_EXPORT_FIELDS = [
+    'id', 'vehicle_type', 'vehicle_model', 'vehicle_year', 'part_name',
+    'part_number', 'vehicle_image', 'part_image', 'part_video',
+    'description', 'status', 'created_at', 'updated_at'
+]
+PRODUCT_EXPORT_FIELDS = [
+    'id', 'request_id', 'name', 'description', 'price', 'image',
+    'created_at', 'updated_at'
+]
+ORDER_EXPORT_FIELDS = [
+    'id', 'total', 'currency', 'reference_number', 'source', 'status',
+    'shipping_address_id', 'cart_id', 'created_at', 'updated_at'
+]
+ORDER_ITEM_EXPORT_FIELDS = [
+    'id', 'order_id', 'product_id', 'price', 'currency', 'quantity',
+    'created_at', 'updated_at'
+]
+ADDRESS_EXPORT_FIELDS = [
+    'id', 'first_name', 'last_name', 'country', 'state', 'post_code',
+    'city', 'address1', 'created_at', 'updated_at'
+]
+
+
+def _jsonl_chunks(queryset):
+    """
+    Yield a values() queryset as JSON lines, one chunk per row
+    """
+    for row in queryset_iterator(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        yield (json.dumps(row, cls=DjangoJSONEncoder) + '\n').encode('utf-8')
+
+
+def _media_chunks(name):
+    """
+    Yield a stored media file chunk by chunk
+    """
+    media_file = default_storage.open(name, 'rb')
+    try:
+        for chunk in media_file.chunks(chunk_size=MEDIA_CHUNK_SIZE):
+            yield chunk
+    finally:
+        media_file.close()
+
+
+def _media_names(queryset, fields, seen):
+    """
+    Yield the non-empty media file names stored in the given fields that are
+    not in `seen`, adding them to it
+
+    Bulk-created requests share their image files, and a name must appear
+    only once in the archive.
+    """
+    for row in queryset_iterator(queryset.values('id', *fields), chunk_size=EXPORT_CHUNK_SIZE):
+        for field in fields:
+            name = row[field]
+            if name and name not in seen:
+                seen.add(name)
+                yield name
+
+
+def build_user_data_export(user):
+    """
+    Build the zip entries for a user's personal data export
+
+    Returns a lazy iterable of (archive_name, chunk_iterable, compress_type)
+    entries for common.utils.stream_zip. Nothing is queried until the
+    archive is streamed.
+
+    Args:
+        user: The user whose data is exported
+
+    Yields:
+        Zip entries for the user's profile, requests, products, orders,
+        order items, addresses and media files
+    """
+    from request.models import VehiclePartRequest, VehiclePartRequestImage
+    from store.models import Product, Order, OrderHasItems, Address
+    from .serializers import UserSerializer
+
+    requests = VehiclePartRequest.objects.filter(user=user)
+    request_images = VehiclePartRequestImage.objects.filter(request__user=user)
+    products = Product.objects.filter(request__user=user)
+    orders = Order.objects.filter(user=user)
+    order_items = OrderHasItems.objects.filter(order__user=user)
+    addresses = Address.objects.filter(
+        id__in=orders.values('shipping_address_id'))
+
+    profile = json.dumps(UserSerializer(user).data, cls=DjangoJSONEncoder, indent=2)
+    yield 'profile.json', [profile.encode('utf-8')], zipfile.ZIP_DEFLATED
+
+    yield ('vehicle_part_requests.jsonl',
+           _jsonl_chunks(requests.values(*REQUEST_EXPORT_FIELDS)),
+           zipfile.ZIP_DEFLATED)
+    yield ('products.jsonl',
+           _jsonl_chunks(products.values(*PRODUCT_EXPORT_FIELDS)),
+           zipfile.ZIP_DEFLATED)
+    yield ('orders.jsonl',
+           _jsonl_chunks(orders.values(*ORDER_EXPORT_FIELDS)),
+           zipfile.ZIP_DEFLATED)
+    yield ('order_items.jsonl',
+           _jsonl_chunks(order_items.values(*ORDER_ITEM_EXPORT_FIELDS)),
+           zipfile.ZIP_DEFLATED)
+    yield ('addresses.jsonl',
+           _jsonl_chunks(addresses.values(*ADDRESS_EXPORT_FIELDS)),
+           zipfile.ZIP_DEFLATED)
+
+    # Media is already compressed (JPEG/MP4), so it is stored as-is
+    media_sources = (
+        (requests, ['vehicle_image', 'part_image', 'part_video']),
+        (request_images, ['image']),
+        (products, ['image']),
+    )
+    seen = set()
+    for queryset, fields in media_sources:
+        for name in _media_names(queryset, fields, seen):
+            if not default_storage.exists(name):
+                logger.warning(f"Data export skipped missing media file: {name}")
+                continue
+            yield f'media/{name}', _media_chunks(name), zipfile.ZIP_STORED
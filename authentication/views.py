@@ -4,6 +4,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.mail import send_mail
+from django.http import StreamingHttpResponse
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
@@ -21,7 +22,9 @@ from .serializers import (
     ChangePasswordSerializer,
     DeleteAccountSerializer
 )
-from common.utils import APIResponse
+from common.utils import APIResponse, stream_zip
+from common.utils.metrics import external_call
+from .utils import build_user_data_export
 
 
 class RegisterView(generics.CreateAPIView):
@@ -282,14 +285,15 @@ def password_reset_request_view(request):
             Vehicle Parts API Team
             """
 
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            with external_call('smtp'):
+                send_mail(
+                    subject=subject,
+                    message=plain_message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[user.email],
+                    html_message=html_message,
+                    fail_silently=False,
+                )
             # TODO: Integrate SMS service here to send OTP via WhatsApp/SMS
             logger = logging.getLogger(__name__)
             logger.info(f'Password reset OTP {otp} generated for user {user.phone}. Email sent to {user.email}')
@@ -451,3 +455,23 @@ def delete_account_view(request):
         message='Account deleted successfully',
         status_code=status.HTTP_200_OK
     )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_data_view(request):
+    """
+    Export the authenticated user's data as a zip archive
+    The archive is built and streamed on the fly, so memory use does not
+    grow with the size of the account
+    """
+    user = request.user
+    response = StreamingHttpResponse(
+        stream_zip(build_user_data_export(user)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="user-{user.id}-data-export.zip"'
+
+    logger = logging.getLogger(__name__)
+    logger.info(f'Data export started for user {user.phone}')
+    return response
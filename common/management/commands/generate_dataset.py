@@ -0,0 +1,61 @@
+"""
+Generate a synthetic dataset for performance testing
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+from common.utils.synthetic_data import DEFAULT_BATCH_SIZE, DEFAULT_DISTRIBUTIONS, DatasetGenerator, Distribution
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk insert synthetic users with vehicle part requests, products, carts and orders. '
+        'Distributions are fixed:N, uniform:A-B, poisson:MEAN or geometric:MEAN.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Accounts to generate (default: 1000)')
+        for name, spec in DEFAULT_DISTRIBUTIONS.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=Distribution, default=spec,
+                                metavar='DISTRIBUTION', help=f'(default: {spec})')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Rows per INSERT and per transaction (default: {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--media-rate', type=float, default=0.0,
+                            help='Share of requests and products given placeholder images (default: 0)')
+        parser.add_argument('--days', type=int, default=365, help='Spread creation times over this many days')
+        parser.add_argument('--seed', type=int, help='Random seed, for a reproducible dataset')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(
+            options['users'], {name: options[name] for name in DEFAULT_DISTRIBUTIONS},
+            batch_size=options['batch_size'], media_rate=options['media_rate'], days=options['days'],
+            seed=options['seed'], progress=self._progress,
+        )
+        expected = {name: distribution.expected() for name, distribution in generator.distributions.items()}
+        # Users and addresses, requests and products, open and checkout carts with items, orders with items
+        per_user = 2 + expected['requests_per_user'] * (1 + expected['products_per_request']) + (
+            expected['carts_per_user'] + expected['orders_per_user']) * (1 + expected['items_per_cart']) + (
+            expected['orders_per_user'] * (1 + expected['items_per_cart']))
+        database = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        self.stdout.write(
+            f"About {round(options['users'] * per_user):,} rows for {options['users']:,} users "
+            f"will be added to database {database!r}"
+        )
+        if options['interactive'] and input("Type 'yes' to continue: ") != 'yes':
+            raise CommandError('Cancelled')
+
+        try:
+            counts, elapsed = generator.generate()
+        except IntegrityError as e:
+            raise CommandError(f'Insert failed, the batch was rolled back: {e}')
+
+        total = sum(counts.values())
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count:,}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)'
+        ))
+
+    def _progress(self, counts):
+        self.stderr.write(f'{sum(counts.values()):,} rows inserted', ending='\r')
@@ -0,0 +1,89 @@
+"""
+Load test built from the bundled Postman collection
+Runs weighted user scenarios against an in-process server on a throwaway
+database (Twilio, SMTP and S3 faked) or against --url, and prints a JSON report
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from common.utils.load_testing import (
+    DEFAULT_COLLECTION,
+    DEFAULT_FAKE_LATENCY,
+    SCENARIOS,
+    PostmanCollection,
+    local_server,
+    run_load_test,
+    seed_accounts
+)
+
+
+def account(value):
+    phone, separator, password = value.partition(':')
+    if not separator:
+        raise ValueError(value)
+    return phone, password
+
+
+def scenario_weight(value):
+    name, _, weight = value.partition('=')
+    if name not in SCENARIOS or not weight.isdigit():
+        raise ValueError(value)
+    return name, int(weight)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the API with weighted scenarios from the Postman collection; '
+        f"scenarios: {', '.join(f'{name} (weight {weight})' for name, weight in SCENARIOS.items())}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Test a running server instead of an in-process one')
+        parser.add_argument('--collection', default=str(DEFAULT_COLLECTION), help='Postman collection to drive')
+        parser.add_argument('--concurrency', type=int, default=8, help='Virtual users (default: 8)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run (default: 30)')
+        parser.add_argument('--iterations', type=int, help='Stop each virtual user after this many scenarios')
+        parser.add_argument('--scenario', type=scenario_weight, action='append', default=[], metavar='NAME=WEIGHT',
+                            help='Override a scenario weight, e.g. checkout=3 (0 disables it)')
+        parser.add_argument('--account', type=account, action='append', default=[], metavar='PHONE:PASSWORD',
+                            help='With --url, log virtual users in as these accounts (their products are browsed)')
+        parser.add_argument('--products', type=int, default=20,
+                            help='Products seeded per virtual user account in the throwaway database (default: 20)')
+        parser.add_argument('--fake-latency', type=float, default=DEFAULT_FAKE_LATENCY * 1000,
+                            help='Milliseconds each faked Twilio, SMTP or S3 call takes (default: 50)')
+        parser.add_argument('--seed', type=int, help='Random seed for scenario choice and payloads')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse and keep the throwaway database')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        collection = PostmanCollection(options['collection'])
+        weights = {**SCENARIOS, **dict(options['scenario'])}
+        run = dict(
+            collection=collection, concurrency=options['concurrency'], duration=options['duration'],
+            iterations=options['iterations'], weights=weights, seed=options['seed'],
+        )
+        try:
+            if options['url']:
+                report = run_load_test(options['url'].rstrip('/'), accounts=options['account'], **run)
+            else:
+                report = self._run_in_process(options, run)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(
+                f"{report['requests']} requests, {report['throughput_rps']} req/s, "
+                f"p95 {report['latency'].get('p95_ms')} ms, error rate {report['error_rate']}"
+            )
+        else:
+            self.stdout.write(output)
+
+    def _run_in_process(self, options, run):
+        """
+        Serve the API from a thread on a throwaway database, with offline fakes
+        """
+        with local_server(options['fake_latency'] / 1000, options['keepdb']) as base_url:
+            accounts = seed_accounts(options['concurrency'], options['products'])
+            return run_load_test(base_url, accounts=accounts, **run)
@@ -0,0 +1,17 @@
+"""
+Issue a signed X-Profile header value for on-demand request profiling
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from common.utils.profiling import profiling_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed X-Profile header value that forces a request to be profiled'
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling_token())
+        self.stderr.write(
+            f'Valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds; '
+            f'profiles are written to {settings.PROFILING_DIR} when PROFILING_ENABLED is on'
+        )
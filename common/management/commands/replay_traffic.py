@@ -0,0 +1,133 @@
+"""
+Replay captured traffic
+Regenerates the requests recorded by TrafficCaptureMiddleware against seeded
+accounts, at the original pace or faster, and reports latency per endpoint;
+--compare diffs the reports of two code versions
+"""
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models import User
+from common.utils.load_testing import (
+    DEFAULT_FAKE_LATENCY,
+    LoadStats,
+    PostmanCollection,
+    ScenarioFailed,
+    VirtualUser,
+    local_server,
+    seed_accounts
+)
+from common.utils.traffic import account_inventory, compare_reports, load_captures, replay
+from common.management.commands.load_test import account
+
+
+class Command(BaseCommand):
+    help = 'Replay captured traffic against seeded accounts and report latencies, or compare two reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('captures', nargs='*', help='Capture files or directories (see TRAFFIC_CAPTURE_DIR)')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Replay this many times faster than captured; 0 sends as fast as possible (default: 1)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at most (default: 16)')
+        parser.add_argument('--url', help='Replay against a running server instead of an in-process one')
+        parser.add_argument('--account', type=account, action='append', default=[], metavar='PHONE:PASSWORD',
+                            help='With --url, accounts to replay users as; their objects are read from '
+                                 'the configured database')
+        parser.add_argument('--accounts', type=int, default=8,
+                            help='Accounts seeded in the throwaway database (default: 8)')
+        parser.add_argument('--products', type=int, default=20, help='Products seeded per account (default: 20)')
+        parser.add_argument('--fake-latency', type=float, default=DEFAULT_FAKE_LATENCY * 1000,
+                            help='Milliseconds each faked Twilio, SMTP or S3 call takes (default: 50)')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse and keep the throwaway database')
+        parser.add_argument('--label', help='Name of the code version being measured, stored in the report')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'CANDIDATE'),
+                            help='Compare two replay reports instead of replaying')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self._compare(*options['compare'])
+        if not options['captures']:
+            raise CommandError('Give capture files or directories to replay, or --compare BASE CANDIDATE')
+        records = load_captures(options['captures'])
+        if not records:
+            raise CommandError('No captured requests found')
+
+        if options['url']:
+            report = self._replay(options['url'].rstrip('/'), records, options['account'], options)
+        else:
+            with local_server(options['fake_latency'] / 1000, options['keepdb']) as base_url:
+                accounts = seed_accounts(options['accounts'], options['products'], orders=2)
+                report = self._replay(base_url, records, accounts, options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(
+                f"{report['requests']} requests replayed ({report['replay']['skipped']} skipped), "
+                f"p95 {report['latency'].get('p95_ms')} ms, error rate {report['error_rate']}"
+            )
+        else:
+            self.stdout.write(output)
+
+    def _replay(self, base_url, records, credentials, options):
+        collection = PostmanCollection()
+        stats = LoadStats()
+        # Logins are not part of the captured traffic, so they are kept out of the report
+        login_stats = LoadStats()
+        accounts = []
+        for phone, password in credentials:
+            user = VirtualUser(collection, base_url, login_stats)
+            try:
+                user.login(phone, password)
+            except (ScenarioFailed, KeyError, TypeError):
+                raise CommandError(f'Could not log in as {phone}')
+            user.stats = stats
+            owner = User.objects.filter(phone=phone).first()
+            accounts.append({'client': user, 'inventory': account_inventory(owner) if owner else {}})
+        anonymous = VirtualUser(collection, base_url, stats)
+
+        def send(record, account, request):
+            client = account['client'] if account else anonymous
+            status_class = record['status'] // 100 * 100
+            try:
+                client.send(f"{record['method']} {record['view']}", *request,
+                            expect=range(status_class, status_class + 100))
+            except ScenarioFailed:
+                # Recorded as an error already
+                pass
+
+        start = time.perf_counter()
+        sent, skipped, max_lag = replay(
+            records, send, accounts, speed=options['speed'], concurrency=options['concurrency'])
+        report = stats.report(time.perf_counter() - start)
+        report['replay'] = {
+            'label': options['label'], 'base_url': base_url, 'captured': len(records), 'sent': sent,
+            'skipped': skipped, 'speed': options['speed'], 'concurrency': options['concurrency'],
+            'accounts': len(accounts), 'max_lag_s': round(max_lag, 3),
+        }
+        return report
+
+    def _compare(self, base_path, candidate_path):
+        try:
+            with open(base_path, encoding='utf-8') as base_file, open(candidate_path, encoding='utf-8') as candidate_file:
+                base, candidate = json.load(base_file), json.load(candidate_file)
+            comparison = compare_reports(base, candidate)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Could not compare reports: {e}')
+
+        def label(report, path):
+            return (report.get('replay') or {}).get('label') or path
+
+        self.stdout.write(f'base: {label(base, base_path)}  candidate: {label(candidate, candidate_path)}')
+        self.stdout.write(f"{'endpoint':<55} {'count':>13} {'p50 ms':>24} {'p95 ms':>24}")
+        for name, metrics in comparison.items():
+            cells = []
+            for metric, width in (('count', 13), ('p50_ms', 24), ('p95_ms', 24)):
+                before, after, change = metrics[metric]
+                cell = f'{before if before is not None else "-"} -> {after if after is not None else "-"}'
+                if change is not None and metric != 'count':
+                    cell += f' ({change:+.1f}%)'
+                cells.append(f'{cell:>{width}}')
+            self.stdout.write(f'{name:<55} ' + ' '.join(cells))
@@ -0,0 +1,379 @@
+"""
+Middleware for metrics, tracing, traffic capture, response compression, query
+inspection and profiling
+Records per-route metrics, traces each request's spans, captures request
+shapes for replay, compresses JSON API responses for clients on slow links,
+reports N+1 queries on staging and profiles sampled requests
+"""
+
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.core.exceptions import MiddlewareNotUsed
+from django.http.multipartparser import MultiPartParserError
+from django.http.request import RawPostDataException
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from common.utils.metrics import QueryTimer, metrics_settings, registry
+from common.utils.profiling import StackSampler, is_valid_profiling_token, profiling_settings, write_profile
+from common.utils.query_inspection import QueryTracker, n_plus_one_settings
+from common.utils.response_compression import (
+    choose_encoding,
+    compress,
+    compression_settings,
+    record_compression
+)
+from common.utils.traffic import (
+    UNREPLAYABLE_VIEWS,
+    CaptureWriter,
+    form_schema,
+    query_schema,
+    traffic_capture_settings,
+    user_hash,
+    value_schema
+)
+from common.utils.tracing import request_id_from, span, trace_queries, tracing, tracing_settings, write_spans
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'application/problem+json')
+N_PLUS_ONE_HEADER = 'X-N-Plus-One'
+PROFILE_REQUEST_HEADER = 'HTTP_X_PROFILE'
+PROFILE_RESPONSE_HEADER = 'X-Profile-Id'
+REQUEST_ID_HEADER = 'X-Request-ID'
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+
+def endpoint_name(request) -> str:
+    """
+    Group stats by URL pattern, not by concrete path
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.route:
+        return '/' + match.route.rstrip('$')
+    return 'unresolved'
+
+
+class MetricsMiddleware:
+    """
+    Middleware to record request latency, status codes, response bytes and
+    database queries per route in the metrics registry (see /metrics)
+
+    Routes are URL patterns, so label cardinality stays bounded; requests
+    that match no pattern are grouped as "unresolved". With METRICS_DIR set,
+    the worker's samples are written there at most once per
+    METRICS_FLUSH_INTERVAL seconds, and once more when the worker exits.
+    """
+
+    def __init__(self, get_response):
+        enabled, self.directory, self.flush_interval = metrics_settings()
+        if not enabled:
+            raise MiddlewareNotUsed
+        if self.directory:
+            registry.flush_at_exit(self.directory)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = endpoint_name(request)
+        labels = {'route': route, 'method': request.method}
+        registry.observe('http_request_duration_seconds', labels, duration)
+        registry.inc('http_requests_total', {**labels, 'status': str(response.status_code)})
+        if not response.streaming:
+            registry.inc('http_response_size_bytes_total', labels, len(response.content))
+        if queries.count:
+            registry.inc('db_queries_total', {'route': route}, queries.count)
+            registry.inc('db_query_duration_seconds_total', {'route': route}, queries.seconds)
+
+        if self.directory:
+            try:
+                registry.maybe_flush(self.directory, self.flush_interval)
+            except OSError:
+                logger.exception('Failed to write metrics snapshot')
+        return response
+
+
+class TracingMiddleware:
+    """
+    Middleware to assign a request ID and report the request's spans
+
+    The ID is taken from a well-formed incoming X-Request-ID header or
+    generated, set as request.request_id and echoed back. Every database
+    query is recorded as a span, alongside the spans opened by image
+    compression, storage and external calls. The per-name totals are
+    logged as one structured line and returned in a Server-Timing header,
+    to staff users only unless TRACING_SERVER_TIMING is set, since timings
+    reveal internals to anonymous clients; with TRACING_SPAN_FILE set, the
+    individual spans are appended there as JSON lines.
+    """
+
+    def __init__(self, get_response):
+        enabled, self.span_file, self.max_spans, self.server_timing = tracing_settings()
+        if not enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.request_id = request_id_from(request.META.get('HTTP_X_REQUEST_ID'))
+        with tracing(request.request_id, self.max_spans) as trace, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(trace_queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - trace.start
+
+        response[REQUEST_ID_HEADER] = request.request_id
+        if self.server_timing or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response[SERVER_TIMING_HEADER] = trace.server_timing(duration)
+
+        record = {
+            'request_id': request.request_id,
+            'method': request.method,
+            'route': endpoint_name(request),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'spans': trace.summary(),
+        }
+        logger.info(
+            f"{request.method} {record['route']} {response.status_code} "
+            f"{record['duration_ms']:.1f}ms request_id={request.request_id}",
+            extra={'trace': record}
+        )
+        if self.span_file:
+            try:
+                write_spans(self.span_file, {**record, 'spans': trace.spans, 'dropped_spans': trace.dropped})
+            except OSError:
+                logger.exception('Failed to write request spans')
+        return response
+
+
+class TrafficCaptureMiddleware:
+    """
+    Middleware to record the shape of a sample of requests for replay_traffic
+
+    Each record holds the URL pattern and view name, the URL kwarg names, the
+    query (values only for SAFE_QUERY_PARAMS), the body schema with string
+    lengths instead of values, upload sizes and types, a keyed hash of the
+    user, the status and the duration. Bodies of UNREPLAYABLE_VIEWS are not
+    recorded, since even their shapes keep OTPs and other numeric secrets.
+    Records go to rotating JSONL files in TRAFFIC_CAPTURE_DIR. Opt-in: with
+    TRAFFIC_CAPTURE_ENABLED off the middleware is not loaded.
+    """
+
+    def __init__(self, get_response):
+        (enabled, self.sample_rate, directory, max_bytes, max_files,
+         self.max_body) = traffic_capture_settings()
+        if not enabled:
+            raise MiddlewareNotUsed
+        self.writer = CaptureWriter(directory, max_bytes, max_files)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        # Read before the view consumes the request stream
+        body = self._body_schema(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.view_name or match.namespace == 'admin':
+            return response
+        record = {
+            'ts': time.time(),
+            'view': match.view_name,
+            'route': endpoint_name(request),
+            'method': request.method,
+            'kwargs': sorted(match.kwargs),
+            'query': query_schema(request.GET),
+            'body': None if match.view_name in UNREPLAYABLE_VIEWS else body,
+            'user': user_hash(getattr(request, 'user', None)),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'response_bytes': None if response.streaming else len(response.content),
+        }
+        try:
+            self.writer.write(record)
+        except OSError:
+            logger.exception('Failed to write traffic capture')
+        return response
+
+    def _body_schema(self, request):
+        content_type = request.content_type or ''
+        try:
+            if content_type == 'application/json':
+                if int(request.META.get('CONTENT_LENGTH') or 0) > self.max_body:
+                    return {'json_bytes': int(request.META['CONTENT_LENGTH'])}
+                return {'json': value_schema(json.loads(request.body))} if request.body else None
+            if content_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+                return {
+                    'form': {key: form_schema(key, value) for key, value in request.POST.items()},
+                    'files': {
+                        key: [{'size': upload.size, 'content_type': upload.content_type}
+                              for upload in request.FILES.getlist(key)]
+                        for key in request.FILES
+                    },
+                }
+        except (ValueError, RawPostDataException, MultiPartParserError):
+            return {'unparsed': content_type}
+        return None
+
+
+class ResponseCompressionMiddleware:
+    """
+    Middleware to gzip (or brotli) JSON responses above a size threshold
+
+    Only JSON bodies of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are
+    compressed. Media, streaming responses and bodies that already carry a
+    Content-Encoding are passed through untouched. Ratio and time are
+    recorded per endpoint (see compression_stats).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._is_compressible(response):
+            return response
+
+        min_size, _, _ = compression_settings()
+        body = response.content
+        if len(body) < min_size:
+            return response
+
+        # The representation now depends on Accept-Encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        endpoint = endpoint_name(request)
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            record_compression(endpoint, None, len(body), len(body), 0.0)
+            return response
+
+        start = time.perf_counter()
+        with span('response_compression', encoding=encoding):
+            compressed = compress(body, encoding)
+        elapsed = time.perf_counter() - start
+        record_compression(endpoint, encoding, len(body), len(compressed), elapsed)
+        if len(compressed) >= len(body):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # Byte-for-byte validators no longer hold for the encoded body
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def _is_compressible(response) -> bool:
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', '').lower():
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type in COMPRESSIBLE_CONTENT_TYPES
+
+
+class NPlusOneDetectionMiddleware:
+    """
+    Middleware to log statements repeated more than N_PLUS_ONE_THRESHOLD times
+    in one request, with the code that issued them
+
+    Meant for staging: with N_PLUS_ONE_DETECTION off it is removed from the
+    chain at startup. Each offending fingerprint is logged as a warning with
+    structured extras; with N_PLUS_ONE_HEADER on, the call sites are also
+    returned in an X-N-Plus-One response header.
+    """
+
+    def __init__(self, get_response):
+        enabled, self.threshold, self.header = n_plus_one_settings()
+        if not enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tracker = QueryTracker()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            response = self.get_response(request)
+
+        repeated = tracker.repeated(self.threshold)
+        if not repeated:
+            return response
+
+        endpoint = endpoint_name(request)
+        for query in repeated:
+            logger.warning(
+                f"N+1 query on {request.method} {endpoint}: {query['count']}x from {query['site']}",
+                extra={
+                    'n_plus_one': {
+                        **query,
+                        'method': request.method,
+                        'endpoint': endpoint,
+                        'path': request.path,
+                        'total_queries': tracker.total,
+                    }
+                }
+            )
+        if self.header:
+            response[N_PLUS_ONE_HEADER] = ', '.join(
+                f"{query['site'].split(' (')[0]};count={query['count']}" for query in repeated
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Middleware to profile a sample of requests with a stack sampler
+
+    A request is profiled when it wins the PROFILING_SAMPLE_RATE draw or
+    carries an X-Profile header signed by profiling_token(). Its stacks are
+    written to PROFILING_DIR as a collapsed-stack file named after the route,
+    and the file name is returned in X-Profile-Id. Unsampled requests only
+    pay for the draw; with PROFILING_ENABLED off the middleware is not loaded.
+    """
+
+    def __init__(self, get_response):
+        enabled, self.sample_rate, self.interval, self.directory, self.max_files = profiling_settings()
+        if not enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with StackSampler(interval=self.interval) as sampler:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        try:
+            name = write_profile(
+                sampler, self.directory, endpoint_name(request), request.method, duration, self.max_files)
+        except OSError:
+            logger.exception('Failed to write request profile')
+            return response
+        if name:
+            response[PROFILE_RESPONSE_HEADER] = name
+        return response
+
+    def _should_profile(self, request) -> bool:
+        token = request.META.get(PROFILE_REQUEST_HEADER)
+        if token:
+            return is_valid_profiling_token(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from common.utils.batch import batch_max_requests
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """
+    One sub-request of a batch
+    """
+    id = serializers.CharField(required=False, max_length=100)
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField(max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_method(self, value):
+        return value.upper()
+
+    def validate_path(self, value):
+        """Only API endpoints can be batched"""
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError("Path must start with /api/")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    A batch of sub-requests and how to run them
+    """
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+    concurrent = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = batch_max_requests()
+        if len(value) > limit:
+            raise serializers.ValidationError(f"A batch can hold at most {limit} requests")
+        return value
@@ -0,0 +1,37 @@
+"""
+Media storage backends
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from common.utils.metrics import external_call
+from common.utils.tracing import span
+
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+except (ImportError, ImproperlyConfigured):  # pragma: no cover - boto3 is only needed with USE_S3
+    S3Boto3Storage = None
+
+
+class TracedFileSystemStorage(FileSystemStorage):
+    """
+    Local storage that records saves as "storage" spans of the current trace
+    """
+
+    def _save(self, name, content):
+        with span('storage'):
+            return super()._save(name, content)
+
+
+if S3Boto3Storage is not None:
+    class InstrumentedS3Storage(S3Boto3Storage):
+        """
+        S3 storage that times uploads and deletes as external "s3" calls
+        """
+
+        def _save(self, name, content):
+            with external_call('s3'):
+                return super()._save(name, content)
+
+        def delete(self, name):
+            with external_call('s3'):
+                return super().delete(name)
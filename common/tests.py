@@ -1,3 +1,1161 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import gzip
+import inspect
+import io
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+from unittest import mock
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.models import User
+from common.middleware import (
+    NPlusOneDetectionMiddleware,
+    ProfilingMiddleware,
+    ResponseCompressionMiddleware,
+    TrafficCaptureMiddleware
+)
+from common.utils import FastJSONRenderer, batch
+from common.utils.json_renderer import fast_json_available
+from common.utils.load_testing import PostmanCollection, VirtualUser, latency_summary, page_items, seed_accounts
+from common.utils.log_handlers import DeferredHandler, JsonFormatter, QueueListenerHandler, RateLimitFilter
+from common.utils.metrics import MetricsRegistry, render_text
+from common.utils.profiling import profiling_token
+from common.utils.query_inspection import fingerprint
+from common.utils.response_compression import brotli, choose_encoding
+from common.utils.synthetic_data import DatasetGenerator, Distribution
+from common.utils.tracing import span, tracing
+from common.utils.traffic import (
+    CaptureWriter,
+    account_inventory,
+    compare_reports,
+    form_schema,
+    load_captures,
+    replay_request,
+    user_hash,
+    value_schema
+)
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from store.models import Address, Cart, CartItem, Order, OrderHasItems, Product
 
-# Create your tests here.
+
+def json_response(size=4096, content_type='application/json'):
+    body = json.dumps({'data': 'x' * size}).encode()
+    return HttpResponse(body, content_type=content_type)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1024)
+class ResponseCompressionMiddlewareTests(SimpleTestCase):
+    """
+    JSON bodies above the threshold are compressed when the client accepts it
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip'):
+        middleware = ResponseCompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_gzip(self):
+        original = json_response().content
+        response = self.process(json_response())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), original)
+
+    def test_brotli_preferred(self):
+        if brotli is None:
+            self.skipTest('brotli is not installed')
+        response = self.process(json_response(), 'gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), json_response().content)
+
+    def test_skips_small_bodies(self):
+        response = self.process(json_response(size=10))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_skips_media_and_streaming(self):
+        response = self.process(json_response(content_type='image/jpeg'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.process(StreamingHttpResponse(iter([b'x' * 4096]), content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_respects_accept_encoding(self):
+        response = self.process(json_response(), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip;q=0, *;q=0.5'), 'br' if brotli else None)
+        self.assertEqual(choose_encoding('br;q=0, gzip'), 'gzip')
+        self.assertIsNone(choose_encoding(''))
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """
+    FastJSONRenderer must render the same bytes as DRF's JSONRenderer,
+    apart from the documented float differences
+    """
+
+    def payload(self):
+        moment = datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)
+        return {
+            'price': Decimal('100.50'),
+            'quantities': [Decimal('2'), Decimal('0.10'), Decimal('1E+2')],
+            'created_at': moment,
+            'naive': moment.replace(tzinfo=None, microsecond=0),
+            'date': moment.date(),
+            'time': moment.time(),
+            'duration': datetime.timedelta(hours=1, seconds=2),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'message': gettext_lazy('Order created successfully'),
+            'unicode': 'Colombo \u0dc1\u0dca\u200d\u0dbb\u0dd3 \u2028 line',
+            1: 'int key',
+            2.5: 'float key',
+            False: 'bool key',
+            None: 'null key',
+            'nested': [{'count': 3, 'ratio': 0.25, 'flag': False, 'missing': None}],
+        }
+
+    def test_same_bytes(self):
+        if not fast_json_available():
+            self.skipTest('orjson is not installed')
+        expected = JSONRenderer().render(self.payload())
+        self.assertEqual(FastJSONRenderer().render(self.payload()), expected)
+
+    def test_floats(self):
+        if not fast_json_available():
+            self.skipTest('orjson is not installed')
+        plain = [0.1, 1.0, -0.0, 0.25, 123.456, 0.0001, 1234567890123456.0]
+        self.assertEqual(FastJSONRenderer().render(plain), JSONRenderer().render(plain))
+
+        exponent = [1e16, 1e-05, 1.5e-07, -2.5e+20, 1.2345678901234568e+17]
+        rendered = FastJSONRenderer().render(exponent)
+        self.assertEqual(rendered, b'[1e16,0.00001,1.5e-7,-2.5e20,1.2345678901234568e17]')
+        self.assertEqual(json.loads(rendered), exponent)
+
+    def test_non_finite_floats(self):
+        if not fast_json_available():
+            self.skipTest('orjson is not installed')
+        data = {'ratio': float('nan'), 'limit': float('inf')}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"ratio":null,"limit":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_indent_and_empty(self):
+        context = {'indent': 2}
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload(), renderer_context=context),
+            JSONRenderer().render(self.payload(), renderer_context=context)
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+def load_users_one_by_one(request):
+    for pk in range(10):
+        User.objects.filter(pk=pk).exists()
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+@override_settings(N_PLUS_ONE_DETECTION=True, N_PLUS_ONE_THRESHOLD=5, N_PLUS_ONE_HEADER=True)
+class NPlusOneDetectionMiddlewareTests(TestCase):
+    """
+    Statements repeated past the threshold are logged with their call site
+    """
+
+    def test_reports_repeated_fingerprint(self):
+        middleware = NPlusOneDetectionMiddleware(load_users_one_by_one)
+        with self.assertLogs('common.middleware', 'WARNING') as logs:
+            response = middleware(RequestFactory().get('/'))
+        self.assertEqual(response['X-N-Plus-One'], 'load_users_one_by_one;count=10')
+        record = logs.records[0].n_plus_one
+        self.assertEqual(record['count'], 10)
+        self.assertTrue(record['site'].startswith('load_users_one_by_one (common/tests.py:'))
+
+    def test_below_threshold(self):
+        with override_settings(N_PLUS_ONE_THRESHOLD=10):
+            response = NPlusOneDetectionMiddleware(load_users_one_by_one)(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('X-N-Plus-One'))
+
+    def test_disabled(self):
+        with override_settings(N_PLUS_ONE_DETECTION=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                NPlusOneDetectionMiddleware(load_users_one_by_one)
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'it''s' AND price > 1.5"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? AND price > ?'
+        )
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s)'), 'SELECT * FROM t WHERE id IN (...)')
+
+
+def slow_view(request):
+    time.sleep(0.03)
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+class ProfilingMiddlewareTests(SimpleTestCase):
+    """
+    Sampled or signed requests are written as collapsed stacks, oldest rotated out
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0.0, PROFILING_INTERVAL=0.001,
+            PROFILING_DIR=self.directory, PROFILING_MAX_FILES=2
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.middleware = ProfilingMiddleware(slow_view)
+
+    def profile(self, token=None):
+        headers = {'HTTP_X_PROFILE': token} if token else {}
+        return self.middleware(RequestFactory().get('/', **headers))
+
+    def test_signed_header(self):
+        response = self.profile(profiling_token())
+        name = response['X-Profile-Id']
+        self.assertTrue(name.endswith('.collapsed'))
+        stacks = (self.directory / name).read_text().splitlines()
+        self.assertTrue(any('slow_view (common/tests.py:' in line for line in stacks))
+        stack, count = stacks[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+
+    def test_unsampled(self):
+        self.assertFalse(self.profile().has_header('X-Profile-Id'))
+        self.assertFalse(self.profile('forged:token').has_header('X-Profile-Id'))
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_sample_rate_and_rotation(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            middleware = ProfilingMiddleware(slow_view)
+        for _ in range(3):
+            self.assertTrue(middleware(RequestFactory().get('/')).has_header('X-Profile-Id'))
+        self.assertEqual(len(list(self.directory.glob('*.collapsed'))), 2)
+
+
+class MetricsTests(TestCase):
+    """
+    /metrics serves every worker's samples to scrapers holding METRICS_TOKEN
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test', last_name='User',
+            email='0771234567@example.com'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def scrape(self, **headers):
+        return self.client.get('/metrics', **headers)
+
+    def test_histogram_exposition(self):
+        registry = MetricsRegistry()
+        for seconds in (0.003, 0.02, 30):
+            registry.observe('http_request_duration_seconds', {'route': '/x/', 'method': 'GET'}, seconds)
+        lines = render_text([registry.snapshot()]).splitlines()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/x/",le="0.005"} 1', lines)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/x/",le="0.025"} 2', lines)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/x/",le="10.0"} 2', lines)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/x/",le="+Inf"} 3', lines)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/x/"} 3', lines)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_disabled_without_token(self):
+        self.assertEqual(self.scrape().status_code, 404)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_requires_token(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+    def test_merges_worker_files(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other_worker = {'counters': [['http_requests_total', [
+            ['method', 'GET'], ['route', '/api/v1/auth/profile/'], ['status', '200']], 5]], 'histograms': []}
+        (Path(directory.name) / 'metrics-1.json').write_text(json.dumps(other_worker))
+
+        with override_settings(METRICS_TOKEN='scrape-token', METRICS_DIR=directory.name):
+            self.client.get('/api/v1/auth/profile/')
+            response = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertRegex(body, r'http_requests_total\{method="GET",route="/api/v1/auth/profile/",status="200"\} \d+')
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/api/v1/auth/profile/"}', body)
+        count = int(body.split('http_requests_total{method="GET",route="/api/v1/auth/profile/",status="200"} ')[1].split()[0])
+        self.assertGreaterEqual(count, 6)
+
+    def dead_pid(self):
+        # A child that has exited and been reaped leaves a PID nothing runs as
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        return child.pid
+
+    def test_keeps_dead_worker_samples(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        directory = Path(directory.name)
+        labels = [['method', 'GET'], ['route', '/dead/']]
+        histogram = {'buckets': [0.1, 1.0], 'counts': [2, 1], 'sum': 0.7, 'count': 4}
+
+        def dead_worker(requests):
+            snapshot = {'counters': [['http_requests_total', labels + [['status', '200']], requests]],
+                        'histograms': [['http_request_duration_seconds', labels, histogram]]}
+            (directory / f'metrics-{self.dead_pid()}.json').write_text(json.dumps(snapshot))
+
+        def scrape():
+            with override_settings(METRICS_TOKEN='scrape-token', METRICS_DIR=str(directory)):
+                response = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token')
+            self.assertEqual(response.status_code, 200)
+            lines = response.content.decode().splitlines()
+            return (
+                next(line for line in lines if line.startswith('http_requests_total{method="GET",route="/dead/"')),
+                next(line for line in lines if line.startswith('http_request_duration_seconds_count{method="GET",route="/dead/"')),
+            )
+
+        dead_worker(7)
+        self.assertEqual(scrape(), (
+            'http_requests_total{method="GET",route="/dead/",status="200"} 7',
+            'http_request_duration_seconds_count{method="GET",route="/dead/"} 4',
+        ))
+        # Only this process's own file (flushed by the scrape) and the archive remain
+        live_files = ['metrics-archive.json', f'metrics-{os.getpid()}.json']
+        self.assertEqual(sorted(path.name for path in directory.glob('*.json')), sorted(live_files))
+        # Totals hold once the file is archived, and grow with the next dead worker
+        self.assertEqual(scrape()[0], 'http_requests_total{method="GET",route="/dead/",status="200"} 7')
+        dead_worker(3)
+        self.assertEqual(scrape(), (
+            'http_requests_total{method="GET",route="/dead/",status="200"} 10',
+            'http_request_duration_seconds_count{method="GET",route="/dead/"} 8',
+        ))
+        self.assertEqual(sorted(path.name for path in directory.glob('*.json')), sorted(live_files))
+
+    def test_flush_at_exit(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        registry = MetricsRegistry()
+        registry.inc('http_requests_total', {'route': '/x/'})
+        with mock.patch('common.utils.metrics.atexit.register') as register:
+            registry.flush_at_exit(directory.name)
+            registry.flush_at_exit(directory.name)
+        register.assert_called_once()
+        register.call_args.args[0]()
+        snapshot = json.loads((Path(directory.name) / f'metrics-{os.getpid()}.json').read_text())
+        self.assertEqual(snapshot['counters'], [['http_requests_total', [['route', '/x/']], 1]])
+
+
+class TracingTests(TestCase):
+    """
+    Responses carry a request ID and Server-Timing built from the request's spans
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test', last_name='User',
+            email='0771234567@example.com'
+        )
+        self.part_request = VehiclePartRequest.objects.create(
+            user=self.user, vehicle_type='truck', vehicle_model='Actros', vehicle_year=2019, part_name='Air filter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.settings_override = override_settings(MEDIA_ROOT=self.directory / 'media')
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def upload(self, **headers):
+        return self.client.post(
+            reverse('request:vehicle-part-request-image-list-create', kwargs={'pk': self.part_request.pk}),
+            {'images': [test_image()]}, format='multipart', **headers
+        )
+
+    def test_request_id(self):
+        response = self.client.get('/api/v1/auth/profile/', HTTP_X_REQUEST_ID='edge-1234.a_b')
+        self.assertEqual(response['X-Request-ID'], 'edge-1234.a_b')
+        response = self.client.get('/api/v1/auth/profile/', HTTP_X_REQUEST_ID='bad id\nx')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_server_timing(self):
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertLogs('common.middleware', 'INFO') as logs:
+            response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        entries = {entry.split(';')[0]: entry for entry in response['Server-Timing'].split(', ')}
+        self.assertIn('db', entries)
+        self.assertIn('image_compression_batch', entries)
+        self.assertIn('storage', entries)
+        self.assertRegex(entries['total'], r'^total;dur=\d+\.\d$')
+
+        record = next(log.trace for log in logs.records if hasattr(log, 'trace'))
+        self.assertEqual(record['request_id'], response['X-Request-ID'])
+        self.assertEqual(record['status'], 201)
+        self.assertGreaterEqual(record['spans']['storage']['count'], 1)
+
+    def test_server_timing_hidden_from_clients(self):
+        with self.assertLogs('common.middleware', 'INFO') as logs:
+            response = self.client.get('/api/v1/auth/profile/')
+            anonymous = APIClient().get('/api/v1/auth/profile/')
+        for each in (response, anonymous):
+            self.assertFalse(each.has_header('Server-Timing'))
+            self.assertTrue(each.has_header('X-Request-ID'))
+        self.assertEqual(len([log for log in logs.records if hasattr(log, 'trace')]), 2)
+
+        with override_settings(TRACING_SERVER_TIMING=True):
+            response = APIClient().get('/api/v1/auth/profile/')
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_span_file(self):
+        span_file = self.directory / 'spans.jsonl'
+        with override_settings(TRACING_SPAN_FILE=str(span_file)):
+            self.upload(HTTP_X_REQUEST_ID='upload-1')
+            self.client.get('/api/v1/auth/profile/')
+        records = [json.loads(line) for line in span_file.read_text().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['request_id'], 'upload-1')
+        names = {span_record['name'] for span_record in records[0]['spans']}
+        self.assertTrue({'db', 'image_compression_batch', 'storage'} <= names)
+
+    def test_span_cap(self):
+        with tracing('cap', max_spans=2) as trace:
+            for _ in range(5):
+                with span('db'):
+                    pass
+        self.assertEqual(len(trace.spans), 2)
+        self.assertEqual(trace.dropped, 3)
+        self.assertIn('db;dur=', trace.server_timing(0.01))
+        self.assertIn('desc="5 calls"', trace.server_timing(0.01))
+
+    def test_span_outside_request(self):
+        with span('db'):
+            pass
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.add(threading.get_ident())
+
+
+def log_record(msg, *args, level=logging.INFO, lineno=1, **extra):
+    record = logging.LogRecord('common.tests', level, __file__, lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LoggingPipelineTests(SimpleTestCase):
+    """
+    Records are handed off to listener threads, rate limited per call site and
+    formatted as JSON
+    """
+
+    def test_queue_listener(self):
+        target = ListHandler()
+        handler = QueueListenerHandler([target])
+        self.addCleanup(handler.close)
+        try:
+            raise ValueError('broken')
+        except ValueError:
+            record = logging.LogRecord('common.tests', logging.ERROR, __file__, 1, 'failed %s', ('upload',),
+                                       sys.exc_info())
+        with tracing('queued-1'):
+            handler.handle(record)
+        handler.stop()
+
+        queued, = target.records
+        self.assertEqual(queued.getMessage(), 'failed upload')
+        self.assertIn('ValueError: broken', queued.exc_text)
+        self.assertEqual(queued.request_id, 'queued-1')
+        self.assertNotIn(threading.get_ident(), target.threads)
+
+    def test_rate_limit(self):
+        rate_limit = RateLimitFilter(rate=3, per=60)
+        passed = [rate_limit.filter(log_record('compressed %s', index)) for index in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        self.assertTrue(rate_limit.filter(log_record('other call site', lineno=2)))
+
+        rate_limit.per = 0
+        record = log_record('compressed %s', 10)
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 7)
+        self.assertEqual(record.getMessage(), 'compressed 10 (7 similar messages suppressed)')
+
+    def test_rate_limit_keeps_tracebacks(self):
+        rate_limit = RateLimitFilter(rate=1, per=60)
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            exc_info = sys.exc_info()
+        passed = [
+            rate_limit.filter(log_record('Unexpected error', level=logging.ERROR, exc_info=exc_info))
+            for _ in range(5)
+        ]
+        self.assertEqual(passed, [True] * 5)
+        plain = [rate_limit.filter(log_record('Unexpected error')) for _ in range(2)]
+        self.assertEqual(plain, [True, False])
+
+    def test_json_formatter(self):
+        record = log_record('GET "%s"', '/x/', trace={'status': 200}, request_id='abc')
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload['message'], 'GET "/x/"')
+        self.assertEqual(payload['level'], 'INFO')
+        self.assertEqual(payload['request_id'], 'abc')
+        self.assertEqual(payload['trace'], {'status': 200})
+
+    def test_deferred_handler(self):
+        handler = DeferredHandler('common.tests.ListHandler')
+        self.assertIsNone(handler.target)
+        handler.handle(log_record('first'))
+        target = handler.target
+        handler.handle(log_record('second'))
+        self.assertIs(handler.target, target)
+        self.assertEqual([record.getMessage() for record in target.records], ['first', 'second'])
+
+        broken = DeferredHandler('common.tests.missing_factory')
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            broken.handle(log_record('dropped'))
+            broken.handle(log_record('dropped'))
+        self.assertEqual(stderr.getvalue().count('could not be built'), 1)
+
+
+class LoadTestingTests(SimpleTestCase):
+    """
+    The load test renders requests from the bundled Postman collection
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.collection = PostmanCollection()
+
+    def test_scenarios_use_collection_requests(self):
+        source = inspect.getsource(VirtualUser)
+        for name in re.findall(r"self\.call\(\s*'([^']+)'", source):
+            self.assertIn(name, self.collection.requests)
+
+    def test_render(self):
+        method, path, payload, fields, files = self.collection.render(
+            'Get Product Details', {'base_url': ''}, ids=[42])
+        self.assertEqual((method, path, payload, fields), ('GET', '/api/v1/store/products/42/', None, None))
+
+        _, path, _, _, _ = self.collection.render(
+            'List Products', {'base_url': ''}, query={'request': None, 'page_size': 5})
+        self.assertEqual(path, '/api/v1/store/products/?page=1&page_size=5&search=brake&ordering=-created_at')
+
+        _, _, payload, _, _ = self.collection.render(
+            'Logout User', {'base_url': '', 'refresh_token': 'abc'}, data={'extra': 1})
+        self.assertEqual(payload, {'refresh': 'abc', 'extra': 1})
+
+        _, _, _, fields, files = self.collection.render(
+            'Create Vehicle Part Request', {'base_url': ''}, data={'vehicle_year': 2001},
+            files={'vehicle_image': ('v.png', b'png', 'image/png')})
+        self.assertEqual(fields['vehicle_type'], 'car')
+        self.assertEqual(fields['vehicle_year'], 2001)
+        self.assertNotIn('vehicle_image', fields)
+        self.assertEqual(list(files), ['vehicle_image'])
+
+    def test_latency_summary(self):
+        summary = latency_summary([index / 1000 for index in range(100, 0, -1)])
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['p50_ms'], 50.0)
+        self.assertEqual(summary['p99_ms'], 99.0)
+        self.assertEqual(summary['max_ms'], 100.0)
+        self.assertEqual(latency_summary([]), {'count': 0})
+
+    def test_page_items(self):
+        self.assertEqual(page_items({'success': True, 'data': {'data': [{'id': 1}], 'meta': {}}}), [{'id': 1}])
+        self.assertEqual(page_items({'results': [{'id': 2}]}), [{'id': 2}])
+        self.assertEqual(page_items(None), [])
+
+
+class TrafficCaptureTests(TestCase):
+    """
+    Captured traffic keeps request shapes but no user data, and replays as equivalent requests
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', email='capture@example.com', password='testpass123')
+        self.part_request = VehiclePartRequest.objects.create(
+            user=self.user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018, part_name='Mirror')
+        self.product = Product.objects.create(request=self.part_request, name='Mirror', price=Decimal('10.00'))
+        self.directory = Path(tempfile.mkdtemp())
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            TrafficCaptureMiddleware(lambda request: HttpResponse())
+
+    def test_schemas_drop_values(self):
+        schema = value_schema({'name': 'Jane Doe', 'vehicle_type': 'car', 'quantity': 2, 'tags': ['a', 'bcd']})
+        self.assertEqual(schema['fields']['name'], {'type': 'string', 'len': 8})
+        self.assertEqual(schema['fields']['vehicle_type'], {'type': 'value', 'value': 'car'})
+        self.assertEqual(schema['fields']['quantity'], {'type': 'value', 'value': 2})
+        self.assertEqual(schema['fields']['tags']['len'], 2)
+        self.assertEqual(form_schema('vehicle_year', '2018'), {'type': 'value', 'value': 2018})
+        self.assertEqual(form_schema('phone', '0771234567'), {'type': 'string', 'len': 10})
+
+    def test_user_hash(self):
+        self.assertEqual(user_hash(None), 'anonymous')
+        self.assertEqual(user_hash(self.user), user_hash(User.objects.get(pk=self.user.pk)))
+        self.assertNotIn(self.user.phone, user_hash(self.user))
+
+    def test_writer_rotates_and_prunes(self):
+        writer = CaptureWriter(self.directory, max_bytes=100, max_files=2)
+        for index in range(4):
+            writer.write({'ts': index, 'padding': 'x' * 60})
+            # Rotated names carry a timestamp in seconds
+            time.sleep(1.01)
+        self.assertEqual(len(list(self.directory.glob('*.jsonl'))), 3)
+        self.assertEqual([record['ts'] for record in load_captures([self.directory])], [1, 2, 3])
+
+    def test_captures_request_shape(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with override_settings(TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_DIR=str(self.directory)):
+            client.get(reverse('product-detail', kwargs={'pk': self.product.pk}), {'utm_source': 'Jane'})
+            client.patch(reverse('request:vehicle-part-request-detail', kwargs={'pk': self.part_request.pk}),
+                         {'part_name': 'Left mirror'}, format='json')
+
+        captured = (self.directory / next(self.directory.iterdir()).name).read_text()
+        self.assertNotIn('Jane', captured)
+        self.assertNotIn('Left mirror', captured)
+        self.assertNotIn(self.user.phone, captured)
+        detail, update = load_captures([self.directory])
+        self.assertEqual((detail['view'], detail['kwargs'], detail['status']), ('product-detail', ['pk'], 200))
+        self.assertEqual(detail['query'], {'utm_source': [{'len': 4}]})
+        self.assertEqual(detail['user'], user_hash(self.user))
+        self.assertEqual(update['body']['json']['fields']['part_name'], {'type': 'string', 'len': 11})
+
+    def test_skips_secret_bodies(self):
+        with override_settings(TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_DIR=str(self.directory)):
+            APIClient().post(reverse('verify-otp'), {'phone': self.user.phone, 'otp': 482913}, format='json')
+
+        captured = (self.directory / next(self.directory.iterdir()).name).read_text()
+        self.assertNotIn('482913', captured)
+        record, = load_captures([self.directory])
+        self.assertEqual(record['view'], 'verify-otp')
+        self.assertIsNone(record['body'])
+
+    def test_replay_request(self):
+        inventory = account_inventory(self.user)
+        record = {
+            'view': 'product-list', 'method': 'GET', 'kwargs': [],
+            'query': {'request': [{'len': 1}], 'page': ['2']}, 'body': None,
+        }
+        self.assertEqual(
+            replay_request(record, inventory),
+            ('GET', f'/api/v1/store/products/?request={self.part_request.pk}&page=2', None, None, None))
+
+        record = {
+            'view': 'request:vehicle-part-request-image-list-create', 'method': 'POST', 'kwargs': ['pk'],
+            'query': {}, 'body': {'form': {}, 'files': {'images': [{'size': 300, 'content_type': 'image/jpeg'}]}},
+        }
+        method, path, _, fields, files = replay_request(record, inventory)
+        self.assertEqual(path, reverse('request:vehicle-part-request-image-list-create',
+                                       kwargs={'pk': self.part_request.pk}))
+        self.assertEqual(fields, {})
+        self.assertEqual([(name, upload[2]) for name, upload in files], [('images', 'image/png')])
+
+        # Needs an object the account does not have, or a secret
+        record = {'view': 'order-detail', 'method': 'GET', 'kwargs': ['pk'], 'query': {}, 'body': None}
+        self.assertIsNone(replay_request(record, inventory))
+        record = {'view': 'login', 'method': 'POST', 'kwargs': [], 'query': {}, 'body': None}
+        self.assertIsNone(replay_request(record, inventory))
+
+    def test_seed_accounts_without_returned_ids(self):
+        # MySQL cannot return the IDs of bulk inserted rows
+        features = type(connection.features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', False), \
+                override_settings(MEDIA_ROOT=str(self.directory)):
+            (phone, _), = seed_accounts(1, products=4, orders=1)
+        inventory = account_inventory(User.objects.get(phone=phone))
+        self.assertEqual(len(inventory['product']), 4)
+        self.assertEqual(len(inventory['cart_item']), 3)
+        self.assertEqual(len(inventory['order']), 1)
+        self.assertEqual(len(inventory['image']), 1)
+
+    def test_compare_reports(self):
+        base = {'latency': {'count': 2, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 20.0},
+                'endpoints': {'GET product-list': {'count': 2, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 20.0}}}
+        candidate = {'latency': {'count': 2, 'p50_ms': 5.0, 'p95_ms': 30.0, 'p99_ms': 30.0},
+                     'endpoints': {'GET product-list': {'count': 2, 'p50_ms': 5.0, 'p95_ms': 30.0, 'p99_ms': 30.0}}}
+        comparison = compare_reports(base, candidate)
+        self.assertEqual(comparison['GET product-list']['p50_ms'], (10.0, 5.0, -50.0))
+        self.assertEqual(comparison['overall']['p95_ms'], (20.0, 30.0, 50.0))
+
+
+class SyntheticDataTests(TestCase):
+    """
+    The dataset generator inserts consistent rows with precomputed IDs
+    """
+
+    def test_distribution(self):
+        rng = random.Random(1)
+        self.assertEqual(Distribution('fixed:3').sample(rng), 3)
+        self.assertTrue(all(2 <= Distribution('uniform:2-4').sample(rng) <= 4 for _ in range(50)))
+        samples = [Distribution('poisson:3').sample(rng) for _ in range(2000)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 3, delta=0.3)
+        samples = [Distribution('geometric:2').sample(rng) for _ in range(2000)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 2, delta=0.3)
+        for spec in ('normal:3', 'uniform:4-2', 'poisson'):
+            with self.assertRaises(ValueError):
+                Distribution(spec)
+
+    def test_generate(self):
+        existing = User.objects.create_user(phone='0771234567', email='existing@example.com', password='testpass123')
+        distributions = {
+            'requests_per_user': 'fixed:2', 'products_per_request': 'fixed:3', 'carts_per_user': 'fixed:1',
+            'items_per_cart': 'fixed:2', 'orders_per_user': 'fixed:1',
+        }
+        counts, _ = DatasetGenerator(4, distributions, batch_size=7, seed=1).generate()
+
+        self.assertEqual(counts['authentication.User'], 4)
+        self.assertEqual(counts['request.VehiclePartRequest'], 8)
+        self.assertEqual(counts['store.Product'], 24)
+        self.assertEqual(counts['store.Cart'], 8)
+        self.assertEqual(counts['store.CartItem'], 16)
+        self.assertEqual(counts['store.OrderHasItems'], 8)
+        self.assertEqual(counts['request.VehiclePartRequestImage'], 0)
+        self.assertFalse(User.objects.filter(pk__lt=existing.pk).exists())
+        for order in Order.objects.prefetch_related('items', 'cart__items'):
+            self.assertEqual(order.total, sum(item.price * item.quantity for item in order.items.all()))
+            self.assertEqual(order.cart.total, order.total)
+            self.assertGreaterEqual(order.created_at, order.user.created_at)
+        for cart in Cart.with_computed_totals():
+            self.assertEqual(cart.item_count, cart.computed_item_count)
+        # Rows created afterwards get fresh IDs
+        self.assertGreater(Product.objects.create(
+            request=VehiclePartRequest.objects.first(), name='Later', price=Decimal('1.00')).pk, 24)
+
+
+class BatchViewTests(TestCase):
+    """
+    /api/v1/batch/ runs sub-requests in-process as the authenticated user
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test', last_name='User',
+            email='0771234567@example.com'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, requests, **options):
+        response = self.client.post('/api/v1/batch/', {'requests': requests, **options}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_reads(self):
+        data = self.batch([
+            {'id': 'profile', 'method': 'GET', 'path': '/api/v1/auth/profile/'},
+            {'id': 'orders', 'method': 'GET', 'path': '/api/v1/store/orders/?page_size=5'},
+            {'id': 'missing', 'method': 'GET', 'path': '/api/v1/missing/'},
+        ])['data']
+        self.assertEqual([item['id'] for item in data], ['profile', 'orders', 'missing'])
+        self.assertEqual([item['status'] for item in data], [200, 200, 404])
+        self.assertEqual(data[0]['body']['data']['id'], self.user.id)
+        self.assertIn('ETag', data[1]['headers'])
+
+    def test_atomic_rolls_back_on_error(self):
+        result = self.batch([
+            {'method': 'POST', 'path': '/api/v1/store/carts/', 'body': {}},
+            {'method': 'POST', 'path': '/api/v1/store/cart-items/', 'body': {'quantity': 1}},
+        ], atomic=True)
+        self.assertEqual([item['status'] for item in result['data']], [201, 400])
+        self.assertTrue(result['meta']['rolled_back'])
+        self.assertFalse(Cart.objects.exists())
+
+    def test_rejects_invalid_batches(self):
+        response = self.client.post('/api/v1/batch/', {'requests': [
+            {'method': 'GET', 'path': '/admin/'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        data = self.batch([{'method': 'POST', 'path': '/api/v1/batch/', 'body': {}}])['data']
+        self.assertEqual(data[0]['status'], 400)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post('/api/v1/batch/', {'requests': [
+            {'method': 'GET', 'path': '/api/v1/auth/profile/'}]}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ConcurrentBatchTests(TransactionTestCase):
+    """
+    "concurrent" runs GETs on worker threads with their own connections, so
+    the rows must be committed, and still returns results in request order
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test', last_name='User',
+            email='0771234567@example.com'
+        )
+        self.part_requests = [
+            VehiclePartRequest.objects.create(
+                user=self.user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+                part_name=f'Part {index}'
+            )
+            for index in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_concurrent_reads_keep_order(self):
+        detail = '/api/v1/requests/vehicle-part-requests/{}/'
+        requests = [
+            {'id': 'first', 'method': 'GET', 'path': detail.format(self.part_requests[0].pk)},
+            {'id': 'missing', 'method': 'GET', 'path': detail.format(999999)},
+            {'id': 'second', 'method': 'GET', 'path': detail.format(self.part_requests[1].pk)},
+            {'id': 'cart', 'method': 'POST', 'path': '/api/v1/store/carts/', 'body': {}},
+            {'id': 'third', 'method': 'GET', 'path': detail.format(self.part_requests[2].pk)},
+            {'id': 'list', 'method': 'GET', 'path': '/api/v1/requests/vehicle-part-requests/'},
+        ]
+        real_dispatch = batch.dispatch
+        threads = set()
+
+        def recording_dispatch(request, item):
+            threads.add(threading.get_ident())
+            return real_dispatch(request, item)
+
+        with mock.patch('common.utils.batch.dispatch', recording_dispatch):
+            response = self.client.post(
+                '/api/v1/batch/', {'requests': requests, 'concurrent': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)['data']
+        self.assertEqual([item['id'] for item in data], [item['id'] for item in requests])
+        self.assertEqual([item['status'] for item in data], [200, 404, 200, 201, 200, 200])
+        self.assertEqual(
+            [data[index]['body']['data']['part_name'] for index in (0, 2, 4)], ['Part 0', 'Part 1', 'Part 2'])
+        self.assertEqual(data[5]['body']['meta']['count'], 3)
+        self.assertGreater(len(threads), 1)
+
+
+def api_routes(patterns=None, prefix='', namespace=''):
+    """
+    (namespaced url name, method) for every registered /api/ route
+    """
+    routes = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            routes |= api_routes(
+                pattern.url_patterns, route,
+                f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            )
+            continue
+        if not route.startswith('api/'):
+            continue
+        view = pattern.callback
+        methods = getattr(view, 'actions', None) or [
+            method for method in view.cls.http_method_names if hasattr(view.cls, method)
+        ]
+        routes |= {
+            (namespace + pattern.name, method) for method in methods if method not in ('head', 'options')
+        }
+    return routes
+
+
+def test_image(name='part.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+def seed_fixtures(size):
+    """
+    An account with `size` requests, products, images, cart items and orders,
+    each order holding `size` items
+    """
+    user = User.objects.create_user(
+        phone='0771234567', password='password', first_name='Test', last_name='User',
+        email='0771234567@example.com'
+    )
+    staff = User.objects.create_user(
+        phone='0777654321', password='password', first_name='Staff', last_name='User',
+        email='0777654321@example.com', is_staff=True
+    )
+    requests = []
+    products = []
+    for index in range(size):
+        vehicle_part_request = VehiclePartRequest.objects.create(
+            user=user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+            part_name=f'Part {index}', description='Front bumper in good condition'
+        )
+        requests.append(vehicle_part_request)
+        for position in range(size):
+            VehiclePartRequestImage.objects.create(
+                request=vehicle_part_request, image=f'vehicle_part_request_images/{index}-{position}.jpg',
+                position=position
+            )
+            products.append(Product.objects.create(
+                request=vehicle_part_request, name=f'Product {index}-{position}',
+                price=Decimal('100.00') + position
+            ))
+
+    extra_product = Product.objects.create(
+        request=requests[0], name='Extra product', price=Decimal('50.00'))
+
+    cart = Cart.objects.create()
+    for product in products[:size]:
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+    cart.recalculate_totals()
+
+    orders = []
+    for index in range(size):
+        order_cart = Cart.objects.create()
+        address = Address.objects.create(
+            first_name='Test', last_name='User', country='LK', post_code='10100',
+            city='Colombo', address1='1 Main Street'
+        )
+        order = Order.objects.create(
+            total=Decimal('200.00') * size, reference_number=f'ORD-BUDGET-{index}', source='web',
+            user=user, shipping_address=address, cart=order_cart
+        )
+        for product in products[:size]:
+            CartItem.objects.create(cart=order_cart, product=product, quantity=2)
+            OrderHasItems.objects.create(order=order, product=product, price=product.price, quantity=2)
+        order_cart.recalculate_totals()
+        orders.append(order)
+
+    return {
+        'size': size,
+        'user': user,
+        'staff': staff,
+        'request': requests[0],
+        'image': requests[0].images.first(),
+        'product': products[0],
+        'products': products,
+        'extra_product': extra_product,
+        'cart': cart,
+        'cart_item': cart.items.first(),
+        'order': orders[0],
+        'otp': user.generate_reset_otp(),
+        'refresh': str(RefreshToken.for_user(user)),
+    }
+
+
+class QueryBudget(NamedTuple):
+    """
+    The most queries one endpoint may run, and how to call it
+
+    `kwargs` and `data` are built from the fixtures. `user` is the fixture
+    key to authenticate as (None for anonymous). Unless `constant` is False,
+    the count must also be the same at every fixture size.
+    """
+    name: str
+    method: str
+    queries: int
+    kwargs: Optional[Callable] = None
+    data: Optional[Callable] = None
+    user: Optional[str] = 'user'
+    format: str = 'json'
+    constant: bool = True
+
+
+def vehicle_part_request_data(fixtures, **extra):
+    return {
+        'vehicle_type': 'truck', 'vehicle_model': 'Actros', 'vehicle_year': 2019,
+        'part_name': 'Air filter', **extra
+    }
+
+
+def cart_items_data(fixtures):
+    return {'cart_id': fixtures['cart'].id, 'items': [
+        {'product_id': product.id, 'quantity': 1} for product in fixtures['products'][:fixtures['size']]
+    ]}
+
+
+def order_data(fixtures):
+    return {
+        'cart_id': fixtures['cart'].id, 'source': 'web',
+        'shipping_address': {
+            'first_name': 'Test', 'last_name': 'User', 'country': 'LK',
+            'post_code': '10100', 'city': 'Colombo', 'address1': '1 Main Street'
+        }
+    }
+
+
+def request_pk(fixtures):
+    return {'pk': fixtures['request'].id}
+
+
+# Every /api/ route must have a budget here; QueryBudgetTests fails for routes
+# that are missing. Counts include the ETag query of conditional GET views and
+# the savepoints of atomic views. Deletes that cascade to products run the
+# product pre_delete signal once per product, so they are not constant and are
+# budgeted at the largest fixture size.
+QUERY_BUDGETS = [
+    # Authentication
+    QueryBudget('register', 'post', 4, user=None, data=lambda fixtures: {
+        'phone': '0711111111', 'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+        'password': 'StrongPass123!', 'password_confirm': 'StrongPass123!'}),
+    QueryBudget('login', 'post', 2, user=None, data=lambda fixtures: {
+        'phone': '0771234567', 'password': 'password'}),
+    QueryBudget('logout', 'post', 6, data=lambda fixtures: {'refresh': fixtures['refresh']}),
+    QueryBudget('user-profile', 'get', 0),
+    QueryBudget('update-profile', 'put', 1, data=lambda fixtures: {'first_name': 'Updated'}),
+    QueryBudget('update-profile', 'patch', 1, data=lambda fixtures: {'last_name': 'Updated'}),
+    QueryBudget('refresh-token', 'post', 1, user=None, data=lambda fixtures: {'refresh': fixtures['refresh']}),
+    QueryBudget('token_refresh', 'post', 6, user=None, data=lambda fixtures: {'refresh': fixtures['refresh']}),
+    QueryBudget('token_obtain_pair', 'post', 3, user=None, data=lambda fixtures: {
+        'phone': fixtures['user'].phone, 'password': 'password'}),
+    QueryBudget('password-reset-request', 'post', 3, user=None, data=lambda fixtures: {'phone': '0771234567'}),
+    QueryBudget('password-reset-confirm', 'post', 3, user=None, data=lambda fixtures: {
+        'phone': '0771234567', 'otp': fixtures['otp'],
+        'new_password': 'NewStrongPass123!', 'new_password_confirm': 'NewStrongPass123!'}),
+    QueryBudget('verify-otp', 'post', 1, user=None, data=lambda fixtures: {
+        'phone': '0771234567', 'otp': fixtures['otp']}),
+    QueryBudget('change-password', 'post', 1, data=lambda fixtures: {
+        'current_password': 'password', 'new_password': 'NewStrongPass123!',
+        'new_password_confirm': 'NewStrongPass123!'}),
+    QueryBudget('delete-account', 'post', 53, data=lambda fixtures: {'password': 'password'}, constant=False),
+    QueryBudget('delete-account', 'delete', 53, data=lambda fixtures: {'password': 'password'}, constant=False),
+    QueryBudget('export-data', 'get', 8),
+
+    # Vehicle part requests
+    QueryBudget('request:vehicle-part-request-list-create', 'get', 5),
+    QueryBudget('request:vehicle-part-request-list-create', 'post', 6, data=vehicle_part_request_data),
+    QueryBudget('request:vehicle-part-request-detail', 'get', 4, kwargs=request_pk),
+    QueryBudget('request:vehicle-part-request-detail', 'put', 4, kwargs=request_pk, data=vehicle_part_request_data),
+    QueryBudget('request:vehicle-part-request-detail', 'patch', 4, kwargs=request_pk,
+                data=lambda fixtures: {'part_name': 'Updated'}),
+    QueryBudget('request:vehicle-part-request-detail', 'delete', 17, kwargs=request_pk, constant=False),
+    QueryBudget('request:vehicle-part-request-image-list-create', 'get', 2, kwargs=request_pk),
+    QueryBudget('request:vehicle-part-request-image-list-create', 'post', 4, kwargs=request_pk,
+                data=lambda fixtures: {'images': [test_image()]}, format='multipart'),
+    QueryBudget('request:vehicle-part-request-image-detail', 'delete', 2, kwargs=lambda fixtures: {
+        'pk': fixtures['request'].id, 'image_id': fixtures['image'].id}),
+    QueryBudget('request:vehicle-part-request-bulk-create', 'post', 3, data=lambda fixtures: {'requests': [
+        vehicle_part_request_data(fixtures, part_name=f'Filter {index}') for index in range(fixtures['size'])]}),
+    QueryBudget('request:vehicle-part-request-export', 'get', 2),
+    QueryBudget('request:vehicle-part-request-stats', 'get', 5),
+
+    # Store
+    QueryBudget('api-root', 'get', 0),
+    QueryBudget('product-list', 'get', 3),
+    QueryBudget('product-detail', 'get', 2, kwargs=lambda fixtures: {'pk': fixtures['product'].id}),
+    QueryBudget('cart-list', 'post', 2, data=lambda fixtures: {}),
+    QueryBudget('cart-detail', 'get', 3, kwargs=lambda fixtures: {'pk': fixtures['cart'].id}),
+    QueryBudget('cart-detail', 'put', 5, kwargs=lambda fixtures: {'pk': fixtures['cart'].id},
+                data=lambda fixtures: {}),
+    QueryBudget('cart-detail', 'patch', 5, kwargs=lambda fixtures: {'pk': fixtures['cart'].id},
+                data=lambda fixtures: {}),
+    QueryBudget('cart-detail', 'delete', 5, kwargs=lambda fixtures: {'pk': fixtures['cart'].id}),
+    QueryBudget('cart-item-list', 'get', 3),
+    QueryBudget('cart-item-list', 'post', 10, data=lambda fixtures: {
+        'cart_id': fixtures['cart'].id, 'product_id': fixtures['extra_product'].id, 'quantity': 1}),
+    QueryBudget('cart-item-bulk', 'post', 7, data=cart_items_data),
+    QueryBudget('cart-item-detail', 'get', 2, kwargs=lambda fixtures: {'pk': fixtures['cart_item'].id}),
+    QueryBudget('cart-item-detail', 'put', 6, kwargs=lambda fixtures: {'pk': fixtures['cart_item'].id},
+                data=lambda fixtures: {'quantity': 3}),
+    QueryBudget('cart-item-detail', 'patch', 6, kwargs=lambda fixtures: {'pk': fixtures['cart_item'].id},
+                data=lambda fixtures: {'quantity': 4}),
+    QueryBudget('cart-item-detail', 'delete', 5, kwargs=lambda fixtures: {'pk': fixtures['cart_item'].id}),
+    QueryBudget('order-list', 'get', 5),
+    QueryBudget('order-list', 'post', 12, data=order_data),
+    QueryBudget('order-export', 'get', 2),
+    QueryBudget('order-detail', 'get', 4, kwargs=lambda fixtures: {'pk': fixtures['order'].id}),
+
+    # Common
+    QueryBudget('common:batch', 'post', 5, data=lambda fixtures: {'requests': [
+        {'method': 'GET', 'path': '/api/v1/auth/profile/'},
+        {'method': 'GET', 'path': '/api/v1/store/orders/'},
+    ]}),
+    QueryBudget('common:performance-stats', 'get', 0, user='staff'),
+]
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every API endpoint stays within its query budget at every fixture size,
+    and list endpoints do not run more queries for bigger pages
+    """
+    fixture_sizes = (1, 6)
+
+    def measure(self, budget, fixtures):
+        """
+        Call the endpoint in a rolled back savepoint and return (status, queries)
+        """
+        client = APIClient()
+        if budget.user:
+            # A fresh instance, so password changes do not leak between endpoints
+            client.force_authenticate(User.objects.get(pk=fixtures[budget.user].pk))
+        url = reverse(budget.name, kwargs=budget.kwargs(fixtures) if budget.kwargs else None)
+        data = budget.data(fixtures) if budget.data else None
+        if budget.method == 'get':
+            data = {'page_size': fixtures['size']}
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, budget.method)(url, data, format=budget.format)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response.status_code, queries
+
+    def test_routes_have_budgets(self):
+        budgeted = {(budget.name, budget.method) for budget in QUERY_BUDGETS}
+        self.assertEqual(api_routes() - budgeted, set())
+
+    def test_query_budgets(self):
+        counts = {}
+        for size in self.fixture_sizes:
+            with transaction.atomic():
+                fixtures = seed_fixtures(size)
+                for budget in QUERY_BUDGETS:
+                    status_code, queries = self.measure(budget, fixtures)
+                    counts.setdefault((budget.name, budget.method), []).append(len(queries))
+                    with self.subTest(endpoint=budget.name, method=budget.method, size=size):
+                        self.assertLess(status_code, 400)
+                        self.assertLessEqual(
+                            len(queries), budget.queries,
+                            '\n'.join(query['sql'] for query in queries.captured_queries)
+                        )
+                transaction.set_rollback(True)
+
+        for budget in QUERY_BUDGETS:
+            if budget.constant:
+                with self.subTest(endpoint=budget.name, method=budget.method):
+                    sizes = counts[(budget.name, budget.method)]
+                    self.assertEqual(len(set(sizes)), 1, f'queries grow with fixture size: {sizes}')
@@ -0,0 +1,13 @@
+from django.urls import path
+from common.views import performance_stats_view, batch_view
+
+app_name = 'common'
+
+urlpatterns = [
+    path('batch/',
+         batch_view,
+         name='batch'),
+    path('performance/stats/',
+         performance_stats_view,
+         name='performance-stats'),
+]
@@ -1,8 +1,27 @@
 from .api_response_utils import APIResponse, handle_api_exception
 from .pagination import CustomPageNumberPagination
+from .streaming_utils import queryset_batches, queryset_iterator, attach_related, export_response, stream_zip
+from .fast_list import FastList, FastListMixin, RowFormatter
+from .field_selection import FieldSelection, FieldSelectionMixin
+from .serializer_utils import CachedFieldsMixin
+from .json_renderer import FastJSONRenderer
+from .conditional_get import ConditionalGetMixin
 
 __all__ = [
     'APIResponse',
     'handle_api_exception',
-    'CustomPageNumberPagination'
+    'CustomPageNumberPagination',
+    'queryset_batches',
+    'queryset_iterator',
+    'attach_related',
+    'export_response',
+    'stream_zip',
+    'FastList',
+    'FastListMixin',
+    'RowFormatter',
+    'FieldSelection',
+    'FieldSelectionMixin',
+    'CachedFieldsMixin',
+    'FastJSONRenderer',
+    'ConditionalGetMixin'
 ]
@@ -0,0 +1,168 @@
+"""
+Batch request dispatching
+Runs several API calls in-process in one round trip, through the URL resolver
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections, transaction
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_MAX_REQUESTS = 20
+DEFAULT_BATCH_MAX_WORKERS = 4
+
+# Headers of the batch request that describe its own body or preconditions
+_REQUEST_SPECIFIC_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'wsgi.input', 'QUERY_STRING')
+_RESPONSE_HEADERS = ('ETag', 'Location')
+
+
+def batch_max_requests() -> int:
+    return getattr(settings, 'BATCH_MAX_REQUESTS', DEFAULT_BATCH_MAX_REQUESTS)
+
+
+def _build_request(request, item):
+    """
+    Build a WSGIRequest for one batch item, authenticated as the batch's user
+    """
+    url = urlsplit(item['path'])
+    body = json.dumps(item['body']).encode('utf-8') if item.get('body') is not None else b''
+
+    environ = {
+        key: value for key, value in request.META.items()
+        if key not in _REQUEST_SPECIFIC_META and not key.startswith('HTTP_IF_')
+    }
+    for name, value in (item.get('headers') or {}).items():
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        if key != 'HTTP_AUTHORIZATION':
+            environ[key] = value
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+
+    sub_request = WSGIRequest(environ)
+    # DRF authenticates forced users without re-checking the JWT
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    sub_request.user = request.user
+    return sub_request
+
+
+def _response_body(response):
+    if isinstance(response, Response):
+        return response.data
+    if response.streaming:
+        return None
+    content_type = response.get('Content-Type', '')
+    if content_type.startswith('application/json') and response.content:
+        return json.loads(response.content)
+    return response.content.decode(response.charset or 'utf-8') if response.content else None
+
+
+def dispatch(request, item):
+    """
+    Run one batch item through the URL resolver and its view
+
+    Returns a dict with the item's id, status, selected headers and body
+    (response data as it would be rendered to JSON)
+    """
+    result = {'id': item.get('id'), 'status': status.HTTP_200_OK}
+    sub_request = _build_request(request, item)
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        result.update(status=status.HTTP_404_NOT_FOUND, body={'detail': 'No endpoint matches this path.'})
+        return result
+    if match.url_name == 'batch':
+        result.update(status=status.HTTP_400_BAD_REQUEST, body={'detail': 'Batch requests cannot be nested.'})
+        return result
+
+    sub_request.resolver_match = match
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Http404:
+        result.update(status=status.HTTP_404_NOT_FOUND, body={'detail': 'Not found.'})
+        return result
+    except PermissionDenied:
+        result.update(status=status.HTTP_403_FORBIDDEN, body={'detail': 'Permission denied.'})
+        return result
+    except Exception:
+        logger.exception(f"Batch item {item['method']} {item['path']} failed")
+        result.update(status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={'detail': 'Internal server error.'})
+        return result
+
+    if response.streaming:
+        result.update(status=status.HTTP_400_BAD_REQUEST,
+                      body={'detail': 'Streaming endpoints are not supported in batches.'})
+        return result
+
+    result['status'] = response.status_code
+    headers = {name: response[name] for name in _RESPONSE_HEADERS if response.has_header(name)}
+    if headers:
+        result['headers'] = headers
+    result['body'] = _response_body(response)
+    return result
+
+
+def _dispatch_in_thread(request, item):
+    try:
+        return dispatch(request, item)
+    finally:
+        # Worker threads open their own connections
+        connections.close_all()
+
+
+def execute_batch(request, items, atomic=False, concurrent=False):
+    """
+    Run batch items in order and return (results, rolled_back)
+
+    With `concurrent`, consecutive GET items run in parallel threads (one DB
+    connection each); other methods run alone, in order, so reads listed after
+    a write see it. With `atomic`, everything runs sequentially in one
+    transaction, rolled back if any item returns a 4xx/5xx status.
+    """
+    if atomic:
+        with transaction.atomic():
+            results = [dispatch(request, item) for item in items]
+            rolled_back = any(result['status'] >= 400 for result in results)
+            if rolled_back:
+                transaction.set_rollback(True)
+        return results, rolled_back
+
+    if not concurrent:
+        return [dispatch(request, item) for item in items], False
+
+    results = []
+    max_workers = getattr(settings, 'BATCH_MAX_WORKERS', DEFAULT_BATCH_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        index = 0
+        while index < len(items):
+            if items[index]['method'] != 'GET':
+                results.append(dispatch(request, items[index]))
+                index += 1
+                continue
+            end = index
+            while end < len(items) and items[end]['method'] == 'GET':
+                end += 1
+            group = items[index:end]
+            if len(group) == 1:
+                results.append(dispatch(request, group[0]))
+            else:
+                results.extend(executor.map(lambda item: _dispatch_in_thread(request, item), group))
+            index = end
+    return results, False
@@ -0,0 +1,177 @@
+"""
+Conditional GET for read endpoints
+Computes a cheap ETag from the queryset before serializing, and answers 304
+Not Modified when the client's If-None-Match still matches
+"""
+import hashlib
+import threading
+from collections import defaultdict
+from django.db.models import CharField, Count, Max, Subquery, Value
+from django.db.models.functions import Cast, Concat
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'requests': 0, 'conditional': 0, 'not_modified': 0})
+
+
+def _record(view_name, conditional, not_modified):
+    with _stats_lock:
+        stats = _stats[view_name]
+        stats['requests'] += 1
+        stats['conditional'] += int(conditional)
+        stats['not_modified'] += int(not_modified)
+
+
+def conditional_get_stats():
+    """
+    Return per-view conditional GET counters and 304 hit rates
+
+    requests: GETs with an ETag computed
+    conditional: those sent with If-None-Match
+    not_modified: those answered with 304
+    hit_rate: not_modified / conditional
+    """
+    with _stats_lock:
+        snapshot = {name: dict(stats) for name, stats in _stats.items()}
+    for stats in snapshot.values():
+        stats['hit_rate'] = (
+            round(stats['not_modified'] / stats['conditional'], 4)
+            if stats['conditional'] else 0.0
+        )
+    return snapshot
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Not modified.'
+    default_code = 'not_modified'
+
+
+def _to_many_prefix(model, relation):
+    """
+    The part of a relation path up to and including its first to-many join,
+    or None when it only follows to-one joins
+    """
+    parts = relation.split('__')
+    for index, part in enumerate(parts):
+        field = model._meta.get_field(part)
+        if field.one_to_many or field.many_to_many:
+            return '__'.join(parts[:index + 1])
+        model = field.related_model
+    return None
+
+
+def _group_version(queryset, relations):
+    """
+    Single-row subquery of MAX(updated_at) and COUNT(DISTINCT pk) of
+    `relations` (paths sharing one to-many join), joined into one string
+    """
+    parts = []
+    for relation in relations:
+        parts += [
+            Cast(Max(f'{relation}__updated_at'), CharField()), Value('|'),
+            Cast(Count(f'{relation}__pk', distinct=True), CharField()), Value('|'),
+        ]
+    # Grouping on a constant leaves no GROUP BY: one row over the whole queryset
+    return queryset.values(etag_group=Value(1)).annotate(
+        version=Concat(*parts, output_field=CharField())).values('version')
+
+
+class ConditionalGetMixin:
+    """
+    View mixin adding ETag / If-None-Match support to list and retrieve
+
+    The ETag is computed with one aggregate query over the filtered queryset:
+    row count and MAX(updated_at) of the rows and of each relation listed in
+    `etag_dependencies` (plus their row counts, so deletions are seen). It
+    also covers the user and the full path, so pages, filters and ?fields=
+    get distinct tags. Nothing is serialized when the tag still matches.
+
+    Relations reached through to-one joins are aggregated in the main query.
+    Those behind a to-many join are grouped by the path up to that join, and
+    each group is aggregated in its own scalar subquery. Two independent
+    to-many chains (order items and cart items) are therefore never joined
+    together and can't multiply each other's rows.
+
+    Relations must keep `updated_at` current: bulk .update() calls and
+    save(update_fields=...) must include it.
+    """
+    etag_dependencies = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = None
+        if request.method not in ('GET', 'HEAD') or not self.uses_conditional_get():
+            return
+
+        self._etag = self.compute_etag(request)
+        if self._etag is None:
+            return
+
+        if_none_match = request.headers.get('If-None-Match')
+        not_modified = bool(if_none_match) and (
+            if_none_match.strip() == '*' or self._etag in parse_etags(if_none_match)
+        )
+        _record(type(self).__name__, bool(if_none_match), not_modified)
+        if not_modified:
+            raise NotModified()
+
+    def uses_conditional_get(self) -> bool:
+        """
+        ETags are computed for list and retrieve requests
+        """
+        action = getattr(self, 'action', None)
+        if action is not None:
+            return action in ('list', 'retrieve')
+        return True
+
+    def get_etag_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def compute_etag(self, request):
+        """
+        Return a weak ETag for the current response, or None when there's
+        nothing to tag (e.g. a missing object, which is left to 404)
+        """
+        queryset = self.get_etag_queryset().order_by().prefetch_related(None).select_related(None)
+        aggregates = {
+            'count': Count('pk', distinct=True),
+            'updated_at': Max('updated_at'),
+        }
+        groups = defaultdict(list)
+        for index, relation in enumerate(self.etag_dependencies):
+            prefix = _to_many_prefix(queryset.model, relation)
+            if prefix is None:
+                aggregates[f'updated_at_{index}'] = Max(f'{relation}__updated_at')
+                aggregates[f'count_{index}'] = Count(f'{relation}__pk', distinct=True)
+            else:
+                groups[prefix].append(relation)
+        for prefix, relations in groups.items():
+            aggregates[f'version_{prefix}'] = Max(Subquery(_group_version(queryset, relations)))
+
+        version = queryset.aggregate(**aggregates)
+        if not version['count'] and self.kwargs:
+            return None
+
+        user_id = getattr(request.user, 'pk', None)
+        fingerprint = repr((request.get_full_path(), user_id, sorted(version.items())))
+        return 'W/"%s"' % hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': self._etag})
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_etag', None)
+        if etag and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
@@ -0,0 +1,181 @@
+"""
+Fast read path for list endpoints
+Formats .values() rows straight into response dicts instead of building model
+instances and running ModelSerializer field by field for every row
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+
+def fast_list_enabled() -> bool:
+    """
+    Return whether the fast list mode is switched on (FAST_LIST_ENABLED setting)
+    """
+    return getattr(settings, 'FAST_LIST_ENABLED', False)
+
+
+def _identity(value):
+    return value
+
+
+def _file_url_converter(storage, request):
+    """
+    Mirror FileField.to_representation for a stored file name
+    """
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+    return convert
+
+
+class RowFormatter:
+    """
+    Precompiled row-to-dict function for a ModelSerializer
+
+    The serializer's fields are inspected once and turned into a list of
+    (output key, values() column, converter) steps. Calling the formatter on
+    a row dict produces the same keys, order and values as the serializer
+    would for the equivalent model instance.
+
+    Fields that can't be read from a single column (SerializerMethodField,
+    nested serializers) must be provided in `nested` as callables taking the
+    row and returning the representation. Nested RowFormatters reading
+    joined columns contribute their columns automatically.
+
+    Args:
+        serializer_class: The ModelSerializer to mirror
+        context: Serializer context (used for absolute media URLs)
+        prefix: values() lookup prefix when the model is reached via a join,
+            e.g. 'product__'
+        nested: Dict of field name -> callable(row) for non-column fields
+        extra_columns: Additional columns needed by the nested callables
+    """
+
+    def __init__(self, serializer_class, context=None, prefix='', nested=None, extra_columns=()):
+        context = context or {}
+        nested = nested or {}
+        serializer = serializer_class(context=context)
+        model = serializer.Meta.model
+        request = context.get('request')
+
+        self.columns = []
+        self._steps = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if name in nested:
+                formatter = nested[name]
+                if isinstance(formatter, RowFormatter):
+                    self._add_columns(formatter.columns)
+                self._steps.append((name, None, formatter))
+                continue
+
+            if isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} needs a nested formatter for the fast list path"
+                )
+
+            column = prefix + self._column_for(model, field.source)
+            if isinstance(field, serializers.FileField):
+                model_field = model._meta.get_field(field.source)
+                converter = _file_url_converter(model_field.storage, request)
+            elif isinstance(field, (RelatedField, serializers.ReadOnlyField)):
+                # values() already returns the primary key of related objects
+                converter = _identity
+            else:
+                converter = field.to_representation
+
+            self._add_columns([column])
+            self._steps.append((name, column, converter))
+
+        self._add_columns(extra_columns)
+
+    def _add_columns(self, columns):
+        for column in columns:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    @staticmethod
+    def _column_for(model, source):
+        """
+        Map a serializer field source to a values() lookup
+        'cart.id' reads the local 'cart_id' column instead of joining
+        """
+        parts = source.split('.')
+        if len(parts) == 2 and parts[1] in ('id', 'pk'):
+            model_field = model._meta.get_field(parts[0])
+            if model_field.many_to_one:
+                return model_field.attname
+        return '__'.join(parts)
+
+    def __call__(self, row):
+        data = {}
+        for name, column, converter in self._steps:
+            if column is None:
+                data[name] = converter(row)
+                continue
+            value = row[column]
+            data[name] = None if value is None else converter(value)
+        return data
+
+
+class FastList:
+    """
+    Base class for fast list formatters
+
+    Subclasses declare the values() columns of the list queryset and format
+    a page of rows, running any extra queries for related data in bulk.
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    @property
+    def columns(self):
+        raise NotImplementedError
+
+    def format(self, rows):
+        raise NotImplementedError
+
+
+class FastListMixin:
+    """
+    View mixin adding an opt-in fast list path
+
+    When FAST_LIST_ENABLED is on, list() pulls the filtered, ordered and
+    paginated queryset as .values() rows and formats them with the view's
+    `fast_list_class`. Responses are identical to the serializer path.
+    Requests using ?fields= or ?expand= take the serializer path.
+    """
+    fast_list_class = None
+
+    def use_fast_list(self) -> bool:
+        if self.fast_list_class is None or not fast_list_enabled():
+            return False
+        get_field_selection = getattr(self, 'get_field_selection', None)
+        return get_field_selection is None or get_field_selection().is_default
+
+    def get_fast_list(self):
+        return self.fast_list_class(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        fast_list = self.get_fast_list()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(*fast_list.columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_list.format(page))
+
+        return Response(fast_list.format(list(rows)))
@@ -0,0 +1,148 @@
+"""
+Sparse fieldsets for read endpoints
+Parses ?fields= and ?expand= into a selection tree and turns it into queryset pushdown
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_paths(value):
+    """
+    Parse 'id,products.name,products.request' into {'id': {}, 'products': {'name': {}, 'request': {}}}
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSelection:
+    """
+    Fields and expanded relations requested for one serializer level
+
+    `fields` is a tree of field names to include, or None for all fields.
+    `expand` is a tree of relations to render as nested objects, or None to
+    expand every relation (the default, unchanged output). Relations that
+    are included but not expanded are rendered as primary keys.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Build the selection from ?fields= and ?expand= (read requests only)
+
+        ?fields=id,part_name,products.price   keep these fields (dotted paths reach nested fields)
+        ?expand=products                      expand only these relations, others become ids
+        """
+        if request is None or request.method not in SAFE_METHODS:
+            return ALL_FIELDS
+
+        fields = request.query_params.get('fields')
+        expand = request.query_params.get('expand')
+        return cls(
+            fields=_parse_paths(fields) or None if fields else None,
+            expand=_parse_paths(expand) if expand is not None else None
+        )
+
+    @property
+    def is_default(self) -> bool:
+        return self.fields is None and self.expand is None
+
+    def includes(self, name) -> bool:
+        return self.fields is None or name in self.fields
+
+    def expands(self, name) -> bool:
+        return self.expand is None or name in self.expand
+
+    def child(self, name):
+        """
+        Selection for the nested serializer of relation `name`
+        """
+        fields = self.fields.get(name) or None if self.fields is not None else None
+        expand = self.expand.get(name, {}) if self.expand is not None else None
+        return FieldSelection(fields, expand)
+
+
+ALL_FIELDS = FieldSelection()
+
+
+class CollapsedRelationField(serializers.Field):
+    """
+    Render a relation as its primary key (or list of keys) instead of a nested object
+    The field name must match the model relation
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        relation = instance._meta.get_field(self.field_name)
+        if relation.concrete:
+            return getattr(instance, relation.attname)
+        return [item.pk for item in getattr(instance, relation.get_accessor_name()).all()]
+
+
+class QueryPlan:
+    """
+    Columns, joins and prefetches needed to serialize a queryset
+
+    Columns are collected per joined model; only() is applied when any level
+    loads a subset of its columns, listing every column of the other levels.
+    """
+
+    def __init__(self):
+        self.levels = []
+        self.select_related = []
+        self.prefetch = []
+
+    def add_level(self, prefix, model, columns):
+        """
+        Record the columns loaded for `model` at lookup `prefix` (None = all columns)
+        """
+        self.levels.append((prefix, model, columns))
+
+    @property
+    def restricted(self) -> bool:
+        return any(columns is not None for _, _, columns in self.levels)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        if self.restricted:
+            only = []
+            for prefix, model, columns in self.levels:
+                if columns is None:
+                    columns = [field.name for field in model._meta.concrete_fields]
+                only.extend(prefix + column for column in columns)
+            queryset = queryset.only(*only)
+        return queryset
+
+
+class FieldSelectionMixin:
+    """
+    View mixin applying ?fields= and ?expand= to read requests
+
+    The selection is passed to the serializers through the context; views
+    pass get_field_selection() to their serializer's setup_queryset().
+    """
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = FieldSelection.from_request(self.request)
+        return self._field_selection
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
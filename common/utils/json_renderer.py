@@ -0,0 +1,66 @@
+"""
+Fast JSON renderer for API responses
+Drop-in replacement for DRF's JSONRenderer backed by orjson, when installed
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson is not None else 0
+)
+
+
+def fast_json_available() -> bool:
+    """
+    Return whether the orjson backend is installed
+    """
+    return orjson is not None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoded with orjson, matching DRF's output byte for byte
+    except for floats outside the plain decimal range
+
+    UUIDs are encoded natively by orjson. Decimals, datetimes, lazy
+    translation strings and other types go through DRF's encoder so their
+    representation matches the stdlib renderer exactly (datetimes are
+    ECMA-262 formatted, raw Decimals become numbers). Serializer output
+    already holds prices and timestamps as strings.
+
+    Floats that Python writes in exponent form come out in orjson's shorter
+    spelling (1e16 rather than 1e+16, 0.00001 rather than 1e-05); both parse
+    to the same value. NaN and Infinity are written as null, where the
+    stdlib renderer raises ValueError under STRICT_JSON. Our serializers
+    don't emit raw floats, so API responses are unaffected; use
+    JSONRenderer where either difference matters.
+
+    Falls back to the stdlib renderer when orjson isn't installed, when an
+    indent is requested (e.g. `Accept: application/json; indent=4`), when
+    ASCII-escaped output is configured, or when orjson rejects the data
+    (e.g. integers beyond 64 bits).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (orjson is None
+                or self.get_indent(accepted_media_type, renderer_context)
+                or self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+        try:
+            ret = orjson.dumps(data, default=encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, so the output is valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
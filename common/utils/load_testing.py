@@ -0,0 +1,552 @@
+"""
+Load testing driven by the bundled Postman collection
+Virtual users run weighted scenarios built from the collection's requests
+against a server and report throughput, latency percentiles and error rates
+"""
+import http.client
+import io
+import json
+import math
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connections
+from django.test import override_settings
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from PIL import Image
+from common.storage import TracedFileSystemStorage
+from common.utils.metrics import external_call
+
+DEFAULT_COLLECTION = Path(settings.BASE_DIR) / 'Vehicle_Parts_API.postman_collection.json'
+DEFAULT_FAKE_LATENCY = 0.05
+LOAD_TEST_PASSWORD = 'loadtest-password'
+
+_VARIABLE = re.compile(r'{{\s*([\w.-]+)\s*}}')
+_ID_SEGMENT = re.compile(r'/\d+(?=/)')
+
+
+class PostmanCollection:
+    """
+    Requests of a Postman v2.1 collection, by item name
+
+    render() fills {{variables}}, replaces the collection's example IDs in
+    the path and merges overrides into the query string and body.
+    """
+
+    def __init__(self, path=DEFAULT_COLLECTION):
+        with open(path, encoding='utf-8') as collection_file:
+            collection = json.load(collection_file)
+        self.variables = {variable['key']: variable.get('value', '') for variable in collection.get('variable', [])}
+        self.requests = {}
+        self._collect(collection['item'])
+
+    def _collect(self, items):
+        for item in items:
+            if 'item' in item:
+                self._collect(item['item'])
+            else:
+                # The first item wins when names repeat across folders
+                self.requests.setdefault(item['name'], item['request'])
+
+    def render(self, name, variables=None, ids=(), query=None, data=None, files=None):
+        """
+        (method, path with query string, JSON body or None, form fields or None, files or None)
+        """
+        request = self.requests[name]
+        variables = {**self.variables, **(variables or {})}
+
+        def fill(text):
+            return _VARIABLE.sub(lambda match: str(variables.get(match.group(1), '')), text)
+
+        url = request['url']['raw'] if isinstance(request['url'], dict) else request['url']
+        parts = urlsplit(fill(url))
+        ids = iter(ids)
+        path = _ID_SEGMENT.sub(lambda match: f'/{next(ids, match.group(0)[1:])}', parts.path)
+        params = dict(parse_qsl(parts.query))
+        params.update(query or {})
+        params = {key: value for key, value in params.items() if value is not None}
+        if params:
+            path = f'{path}?{urlencode(params)}'
+
+        body = request.get('body') or {}
+        if body.get('mode') == 'formdata':
+            fields = {
+                field['key']: fill(field.get('value', ''))
+                for field in body['formdata'] if field.get('type', 'text') == 'text' and not field.get('disabled')
+            }
+            fields.update(data or {})
+            return request['method'], path, None, fields, files or {}
+        payload = None
+        if body.get('mode') == 'raw' and body.get('raw', '').strip():
+            payload = json.loads(fill(body['raw']))
+        if data is not None:
+            payload = {**(payload or {}), **data}
+        return request['method'], path, payload, None, None
+
+
+def multipart_body(fields, files):
+    """
+    (body bytes, content type) for multipart/form-data
+
+    `files` maps field names to (filename, bytes, content type), or is a
+    list of (field name, file) pairs when a field holds several files.
+    """
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for key, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+    for key, (filename, content, content_type) in (files.items() if isinstance(files, dict) else files):
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+        )
+        body.write(content)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def latency_summary(seconds):
+    """
+    Count, mean and p50/p90/p95/p99/max of latencies, in milliseconds
+    """
+    values = sorted(seconds)
+    if not values:
+        return {'count': 0}
+    summary = {'count': len(values), 'mean_ms': round(sum(values) / len(values) * 1000, 3)}
+    for label, fraction in (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99)):
+        summary[f'{label}_ms'] = round(percentile(values, fraction) * 1000, 3)
+    summary['max_ms'] = round(values[-1] * 1000, 3)
+    return summary
+
+
+class LoadStats:
+    """
+    Thread-safe latencies, status codes and errors per request name and scenario
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+        self.scenarios = {}
+
+    def record(self, name, status, seconds, error=False):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            statuses = self.statuses.setdefault(name, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def record_scenario(self, name, ok):
+        with self._lock:
+            runs = self.scenarios.setdefault(name, {'runs': 0, 'failed': 0})
+            runs['runs'] += 1
+            runs['failed'] += 0 if ok else 1
+
+    def report(self, elapsed):
+        with self._lock:
+            all_latencies = [seconds for values in self.latencies.values() for seconds in values]
+            total = len(all_latencies)
+            errors = sum(self.errors.values())
+            return {
+                'elapsed_s': round(elapsed, 3),
+                'requests': total,
+                'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+                'errors': errors,
+                'error_rate': round(errors / total, 4) if total else 0,
+                'latency': latency_summary(all_latencies),
+                'endpoints': {
+                    name: {
+                        **latency_summary(values),
+                        'errors': self.errors.get(name, 0),
+                        'statuses': self.statuses[name],
+                    }
+                    for name, values in sorted(self.latencies.items())
+                },
+                'scenarios': dict(sorted(self.scenarios.items())),
+            }
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+def page_items(data):
+    """
+    The rows of a list response's `data`, which paginated views wrap in a
+    second envelope
+    """
+    while isinstance(data, dict):
+        data = data.get('data', data.get('results'))
+    return data or []
+
+
+def upload_image(name='part.png', size=(640, 480)):
+    """
+    (filename, bytes, content type) of a generated PNG upload
+    """
+    image = Image.new('RGB', size, (random.randrange(256), random.randrange(256), random.randrange(256)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return name, buffer.getvalue(), 'image/png'
+
+
+class VirtualUser:
+    """
+    One simulated client: logs in (or registers), then runs scenarios in a loop
+
+    Products are only visible to the owner of the request they answer, so
+    browsing and buying need an account with products, such as the ones
+    the load_test command seeds.
+    """
+
+    def __init__(self, collection, base_url, stats, timeout=30):
+        parts = urlsplit(base_url)
+        self.collection = collection
+        self.stats = stats
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.timeout = timeout
+        self.variables = {'base_url': ''}
+        self.product_ids = []
+
+    def call(self, name, expect=(200, 201), **render):
+        """
+        Send one collection request and record it; returns the response's `data`
+        """
+        return self.send(name, *self.collection.render(name, self.variables, **render), expect=expect)
+
+    def send(self, name, method, path, payload=None, fields=None, files=None, expect=(200, 201)):
+        """
+        Send a request as this user and record it under `name`; returns the response's `data`
+        """
+        headers = {'Accept': 'application/json'}
+        if self.variables.get('access_token'):
+            headers['Authorization'] = f"Bearer {self.variables['access_token']}"
+        body = None
+        if fields is not None:
+            body, headers['Content-Type'] = multipart_body(fields, files or {})
+        elif payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+
+        # A connection per request, as with gunicorn's sync workers (which
+        # close every connection); this also avoids delayed-ACK stalls on
+        # kept-alive connections to the development server
+        connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.stats.record(name, 'connection_error', time.perf_counter() - start, error=True)
+            raise ScenarioFailed(f'{name}: connection error')
+        finally:
+            connection.close()
+        self.stats.record(name, status, time.perf_counter() - start, error=status not in expect)
+        if status not in expect:
+            raise ScenarioFailed(f'{name}: HTTP {status}')
+        try:
+            return json.loads(content).get('data')
+        except (ValueError, AttributeError):
+            return None
+
+    def register(self):
+        phone = f'07{random.randrange(9)}{random.randrange(10**7):07d}'
+        data = self.call('Register User', data={
+            'phone': phone, 'email': f'load-{uuid.uuid4().hex[:12]}@example.com',
+            'password': LOAD_TEST_PASSWORD, 'password_confirm': LOAD_TEST_PASSWORD,
+        })
+        self._set_tokens(data)
+        return phone
+
+    def login(self, phone, password):
+        self._set_tokens(self.call('Login User', data={'phone': phone, 'password': password}))
+
+    def _set_tokens(self, data):
+        self.variables['access_token'] = data['tokens']['access']
+        self.variables['refresh_token'] = data['tokens']['refresh']
+
+    def _browse_product_ids(self):
+        products = self.call('List Products', query={'request': None, 'search': None, 'page_size': 20})
+        self.product_ids = [product['id'] for product in page_items(products)] or self.product_ids
+        if not self.product_ids:
+            raise ScenarioFailed('List Products: no products to browse')
+        return self.product_ids
+
+    # Scenarios
+
+    def register_login(self):
+        account = self.variables['access_token'], self.variables['refresh_token']
+        phone = self.register()
+        self.login(phone, LOAD_TEST_PASSWORD)
+        self.call('Get User Profile')
+        # Carry on as the account the other scenarios run under
+        self.variables['access_token'], self.variables['refresh_token'] = account
+
+    def create_request(self):
+        created = self.call(
+            'Create Vehicle Part Request', data={'vehicle_year': random.randint(1995, 2024)},
+            files={'vehicle_image': upload_image('vehicle.png'), 'part_image': upload_image('part.png')}
+        )
+        self.call('List Vehicle Part Requests', query={'vehicle_type': None, 'status': None})
+        self.call('Get Vehicle Part Request Details', ids=[created['id']])
+
+    def browse_products(self):
+        product_ids = self._browse_product_ids()
+        for product_id in random.sample(product_ids, min(3, len(product_ids))):
+            self.call('Get Product Details', ids=[product_id])
+
+    def _fill_cart(self):
+        product_ids = self.product_ids or self._browse_product_ids()
+        cart = self.call('Create Cart')
+        for product_id in random.sample(product_ids, min(random.randint(1, 3), len(product_ids))):
+            self.call('Create Cart Item', data={
+                'cart_id': cart['id'], 'product_id': product_id, 'quantity': random.randint(1, 3)})
+        return cart
+
+    def add_to_cart(self):
+        cart = self._fill_cart()
+        self.call('Get Cart', ids=[cart['id']])
+
+    def checkout(self):
+        cart = self._fill_cart()
+        order = self.call('Create Order', data={'cart_id': cart['id']})
+        self.call('Get Order', ids=[order['id']])
+        self.call('List Orders')
+
+
+# scenario -> default weight
+SCENARIOS = {
+    'register_login': 1,
+    'create_request': 2,
+    'browse_products': 5,
+    'add_to_cart': 3,
+    'checkout': 1,
+}
+
+
+def run_load_test(base_url, collection=None, concurrency=8, duration=30.0, iterations=None,
+                  weights=None, seed=None, accounts=()):
+    """
+    Run `concurrency` virtual users for `duration` seconds (or `iterations`
+    scenarios each) and return the JSON-serializable report
+
+    Virtual users log in round-robin as `accounts` ((phone, password)
+    pairs), or register new accounts when there are none.
+    """
+    collection = collection or PostmanCollection()
+    weights = {name: weight for name, weight in (weights or SCENARIOS).items() if weight > 0}
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if seed is not None:
+        random.seed(seed)
+    stats = LoadStats()
+    names, cumulative = list(weights), list(weights.values())
+    deadline = time.monotonic() + duration
+
+    def virtual_user(index):
+        user = VirtualUser(collection, base_url, stats)
+        try:
+            if accounts:
+                user.login(*accounts[index % len(accounts)])
+            else:
+                user.register()
+        except (ScenarioFailed, KeyError, TypeError):
+            return
+        runs = 0
+        while time.monotonic() < deadline and (iterations is None or runs < iterations):
+            name = random.choices(names, cumulative)[0]
+            try:
+                getattr(user, name)()
+                stats.record_scenario(name, True)
+            except (ScenarioFailed, KeyError, TypeError):
+                stats.record_scenario(name, False)
+            runs += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=virtual_user, args=(index,), name=f'virtual-user-{index}') for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = stats.report(time.perf_counter() - start)
+    report['config'] = {
+        'base_url': base_url, 'concurrency': concurrency, 'duration_s': duration,
+        'iterations': iterations, 'weights': weights, 'seed': seed, 'accounts': len(accounts),
+    }
+    return report
+
+
+class FakeEmailBackend(EmailBackend):
+    """
+    In-memory email backend that takes `FAKE_EXTERNAL_LATENCY` per send, like SMTP
+    """
+
+    def send_messages(self, messages):
+        time.sleep(getattr(settings, 'FAKE_EXTERNAL_LATENCY', DEFAULT_FAKE_LATENCY))
+        return super().send_messages(messages)
+
+
+class FakeS3Storage(TracedFileSystemStorage):
+    """
+    Local storage timed as "s3" external calls, with `FAKE_EXTERNAL_LATENCY` per upload
+    """
+
+    def _save(self, name, content):
+        with external_call('s3'):
+            time.sleep(getattr(settings, 'FAKE_EXTERNAL_LATENCY', DEFAULT_FAKE_LATENCY))
+            return super()._save(name, content)
+
+
+class FakeTwilioClient:
+    """
+    Stands in for twilio.rest.Client: messages.create() only waits and returns a SID
+    """
+
+    class _Message:
+        def __init__(self):
+            self.sid = f'SM{uuid.uuid4().hex}'
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.messages = self
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return self._Message()
+
+
+@contextmanager
+def offline_fakes(latency=DEFAULT_FAKE_LATENCY):
+    """
+    Replace SMTP, S3 and Twilio with in-process fakes taking `latency`
+    seconds per call; media is written to a temporary directory
+    """
+    from store.whatsapp_service import whatsapp_service
+
+    with ExitStack() as stack:
+        media_root = stack.enter_context(tempfile.TemporaryDirectory(prefix='load-test-media-'))
+        stack.enter_context(override_settings(
+            EMAIL_BACKEND='common.utils.load_testing.FakeEmailBackend',
+            MEDIA_ROOT=media_root,
+            DEFAULT_FILE_STORAGE='common.utils.load_testing.FakeS3Storage',
+            FAKE_EXTERNAL_LATENCY=latency,
+        ))
+        saved = whatsapp_service.client, whatsapp_service.enabled
+        whatsapp_service.client, whatsapp_service.enabled = FakeTwilioClient(latency), True
+        stack.callback(lambda: setattr(whatsapp_service, 'client', saved[0]))
+        stack.callback(lambda: setattr(whatsapp_service, 'enabled', saved[1]))
+        yield
+
+
+@contextmanager
+def local_server(fake_latency=DEFAULT_FAKE_LATENCY, keepdb=False):
+    """
+    Serve the API from a thread on a throwaway database with offline fakes,
+    yielding its base URL; seed the database inside the block
+    """
+    connection = connections['default']
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    connections_override = {}
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        # The server threads must see the same in-memory database
+        connection.inc_thread_sharing()
+        connections_override['default'] = connection
+    try:
+        with offline_fakes(fake_latency), override_settings(
+                DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1']):
+            server = LiveServerThread('127.0.0.1', _StaticFilesHandler, connections_override, port=0)
+            server.daemon = True
+            server.start()
+            server.is_ready.wait()
+            if server.error:
+                raise server.error
+            try:
+                yield f'http://127.0.0.1:{server.port}'
+            finally:
+                server.terminate()
+    finally:
+        if connections_override:
+            connection.dec_thread_sharing()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def seed_accounts(count, products=20, orders=0):
+    """
+    `count` accounts (phone, LOAD_TEST_PASSWORD), each owning a request with
+    a gallery image, answered by `products` products, plus a cart holding
+    some of them and `orders` orders; existing seeded accounts are reused
+    """
+    from authentication.models import User
+    from request.models import VehiclePartRequest, VehiclePartRequestImage
+    from store.models import Address, Cart, CartItem, Order, OrderHasItems, Product
+
+    password_hash = make_password(LOAD_TEST_PASSWORD)
+    users = []
+    for index in range(count):
+        phone = f'+9470{index:07d}'
+        user = User.objects.filter(phone=phone).first()
+        if user is None:
+            user = User(phone=phone, email=f'load-test-{index}@example.com', first_name='Load',
+                        last_name=f'Test {index}', password=password_hash)
+            user.save()
+            part_request = VehiclePartRequest.objects.create(
+                user=user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+                part_name='Brake pad'
+            )
+            filename, content, _ = upload_image('gallery.png', size=(64, 48))
+            VehiclePartRequestImage(request=part_request).image.save(filename, ContentFile(content))
+            Product.objects.bulk_create(
+                Product(request=part_request, name=f'Brake pad {position}', description='Load test product',
+                        price=Decimal('1500.00') + position)
+                for position in range(products)
+            )
+            # Read back: MySQL does not return the IDs of bulk inserted rows
+            seeded = list(Product.objects.filter(request=part_request).order_by('pk'))
+            if seeded:
+                cart = Cart.objects.create()
+                # bulk_create skips the signals that keep cart totals current
+                CartItem.objects.bulk_create(CartItem(cart=cart, product=product) for product in seeded[:3])
+                Cart.apply_item_delta(cart.pk, sum(product.price for product in seeded[:3]), len(seeded[:3]))
+                address = Address.objects.create(
+                    first_name='Load', last_name=f'Test {index}', country='Sri Lanka', post_code='00100',
+                    city='Colombo', address1='1 Load Test Road'
+                )
+                for number in range(orders):
+                    order = Order.objects.create(
+                        total=seeded[0].price, reference_number=f'LOAD-{index}-{number}', source='web',
+                        user=user, shipping_address=address, cart=cart
+                    )
+                    OrderHasItems.objects.create(order=order, product=seeded[0], price=seeded[0].price)
+        users.append((phone, LOAD_TEST_PASSWORD))
+    return users
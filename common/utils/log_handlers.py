@@ -0,0 +1,249 @@
+"""
+Non-blocking logging pipeline
+Request threads only put records on a queue; a listener thread per queue
+formats and writes them, so slow handlers (CloudWatch, a blocked stdout)
+never stall a request. Also provides a JSON formatter and a per-call-site
+rate limit for noisy log lines.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from django.utils.module_loading import import_string
+from common.utils.tracing import current_request_id
+
+DEFAULT_LOG_RATE_LIMIT = 20
+DEFAULT_LOG_RATE_LIMIT_PERIOD = 60.0
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, location, the
+    request ID of the traced request that logged it, and any `extra` fields
+    """
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'lineno': record.lineno,
+            'process': record.process,
+        }
+        request_id = getattr(record, 'request_id', None) or current_request_id()
+        if request_id:
+            payload['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through `rate` records per call site every `per` seconds
+
+    Past the limit, records are sampled at `sample_rate` (0 drops them all).
+    The first record of the next window reports how many were dropped, both
+    in its message and as a `suppressed` attribute. Call sites rather than
+    messages are counted, since most messages here are f-strings. Records
+    carrying a traceback (unhandled 500s) are always let through.
+    """
+
+    def __init__(self, rate=DEFAULT_LOG_RATE_LIMIT, per=DEFAULT_LOG_RATE_LIMIT_PERIOD, sample_rate=0.0, name=''):
+        super().__init__(name)
+        self.rate = rate
+        self.per = per
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        # call site -> [window start, records let through, records dropped]
+        self._windows = {}
+
+    def filter(self, record):
+        if not super().filter(record):
+            return False
+        if record.exc_info:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                    record.msg = f'{record.msg} ({suppressed} similar messages suppressed)'
+                return True
+            if window[1] < self.rate or (self.sample_rate and random.random() < self.sample_rate):
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def _resolve_handlers(handlers):
+    """
+    Handler objects from a dictConfig list of "cfg://handlers.<name>" references
+    """
+    resolved = [handlers[index] for index in range(len(handlers))]
+    if any(isinstance(handler, dict) for handler in resolved):
+        # dictConfig retries handlers failing with this cause once the rest are configured
+        raise ValueError('Queued handler is not configured yet') from ValueError('target not configured yet')
+    return resolved
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that owns a QueueListener feeding `handlers`
+
+    For dictConfig: {'()': 'common.utils.log_handlers.QueueListenerHandler',
+    'handlers': ['cfg://handlers.console']}. Records are prepared (message
+    rendered, traceback captured, request ID attached) in the logging thread
+    and handed to the target handlers by the listener thread.
+
+    Listeners are stopped (drained) around fork() and restarted on both
+    sides, so workers forked by gunicorn --preload get live threads.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(
+            self.queue, *_resolve_handlers(handlers), respect_handler_level=respect_handler_level)
+        self._running = False
+        self.start()
+        with _listeners_lock:
+            _listeners.append(self)
+
+    def start(self):
+        if not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not getattr(record, 'request_id', None):
+            record.request_id = current_request_id()
+        return record
+
+    def close(self):
+        self.stop()
+        with _listeners_lock:
+            if self in _listeners:
+                _listeners.remove(self)
+        super().close()
+
+
+def stop_listeners():
+    """
+    Drain every queue; records logged meanwhile wait for start_listeners()
+    """
+    with _listeners_lock:
+        for handler in _listeners:
+            handler.stop()
+
+
+def start_listeners():
+    with _listeners_lock:
+        for handler in _listeners:
+            handler.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=stop_listeners, after_in_parent=start_listeners, after_in_child=start_listeners)
+atexit.register(stop_listeners)
+
+
+class DeferredHandler(logging.Handler):
+    """
+    Build the real handler from `factory` (a dotted path) on the first
+    record it handles
+
+    Behind a QueueListenerHandler this happens on the listener thread, so
+    slow constructors (boto3 clients, creating a CloudWatch log group) block
+    neither startup nor requests. A failed build is reported once on stderr
+    and the handler then drops its records.
+    """
+
+    def __init__(self, factory, level=logging.NOTSET, **options):
+        super().__init__(level)
+        self.factory = factory
+        self.options = options
+        self.target = None
+        self._failed = False
+        self._build_lock = threading.Lock()
+
+    def _build(self):
+        with self._build_lock:
+            if self.target is None and not self._failed:
+                try:
+                    self.target = import_string(self.factory)(**self.options)
+                except Exception as e:
+                    self._failed = True
+                    sys.stderr.write(f'Logging handler {self.factory} could not be built: {e}\n')
+                    return
+                self.target.setLevel(self.level)
+                if self.formatter is not None:
+                    self.target.setFormatter(self.formatter)
+
+    def emit(self, record):
+        if self.target is None:
+            self._build()
+        if self.target is not None:
+            self.target.handle(record)
+
+    def flush(self):
+        if self.target is not None:
+            self.target.flush()
+
+    def close(self):
+        if self.target is not None:
+            self.target.close()
+        super().close()
+
+
+def cloudwatch_handler(access_key_id, secret_access_key, region_name, **options):
+    """
+    DeferredHandler factory for a watchtower CloudWatch Logs handler
+    """
+    import boto3
+    import watchtower
+
+    client = boto3.client(
+        'logs',
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        region_name=region_name
+    )
+    return watchtower.CloudWatchLogHandler(boto3_client=client, **options)
@@ -0,0 +1,366 @@
+"""
+In-process metrics registry with Prometheus text exposition
+Counters and histograms are kept per worker; with METRICS_DIR set, each
+worker also writes its samples to a file there and /metrics merges them all.
+Samples of workers that have exited are folded into an archive file on scrape
+"""
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from common.utils.tracing import span
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_METRICS_FLUSH_INTERVAL = 1.0
+METRICS_FILE_PREFIX = 'metrics-'
+METRICS_ARCHIVE_FILE = f'{METRICS_FILE_PREFIX}archive.json'
+METRICS_LOCK_FILE = f'{METRICS_FILE_PREFIX}archive.lock'
+
+# name -> (type, help)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by route, method and status code'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route and method'),
+    'http_response_size_bytes_total': ('counter', 'Response body bytes by route and method'),
+    'db_queries_total': ('counter', 'Database queries by route'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries by route'),
+    'external_call_duration_seconds': ('histogram', 'Latency of Twilio, SMTP and S3 calls by service and outcome'),
+    'conditional_get_requests_total': ('counter', 'GETs with an ETag computed, by view'),
+    'conditional_get_not_modified_total': ('counter', 'GETs answered 304 Not Modified, by view'),
+    'response_compression_bytes_in_total': ('counter', 'JSON bytes eligible for compression, by endpoint'),
+    'response_compression_bytes_out_total': ('counter', 'JSON bytes sent after compression, by endpoint'),
+}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by (metric name, label tuple)
+
+    Collectors are callables returning extra counter samples as
+    (name, labels dict, value) when a snapshot is taken, for stats kept
+    elsewhere (conditional GET, compression).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._last_flush = 0.0
+        self._exit_directory = None
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        """
+        JSON-serializable copy of every sample in this process
+        """
+        with self._lock:
+            counters = [[name, list(map(list, labels)), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, list(map(list, labels)), dict(histogram, counts=list(histogram['counts']))]
+                for (name, labels), histogram in self._histograms.items()
+            ]
+        for collector in self._collectors:
+            counters.extend(
+                [name, sorted(map(list, labels.items())), value] for name, labels, value in collector()
+            )
+        return {'counters': counters, 'histograms': histograms}
+
+    def maybe_flush(self, directory, interval=DEFAULT_METRICS_FLUSH_INTERVAL):
+        """
+        Write this worker's snapshot to `directory` at most once per `interval` seconds
+        """
+        now = time.monotonic()
+        if now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json(directory / f'{METRICS_FILE_PREFIX}{os.getpid()}.json', self.snapshot())
+
+    def flush_at_exit(self, directory):
+        """
+        Also write this worker's snapshot when it exits, so the samples
+        recorded since its last flush are not lost
+        """
+        if self._exit_directory is None:
+            atexit.register(self._flush_at_exit)
+        self._exit_directory = directory
+
+    def _flush_at_exit(self):
+        # Created by the first request's flush; gone means nothing to keep
+        if not Path(self._exit_directory).is_dir():
+            return
+        try:
+            self.flush(self._exit_directory)
+        except OSError:
+            pass
+
+    def collect(self, directory=None):
+        """
+        Snapshots of every worker: this one live, the others from METRICS_DIR
+
+        Files of workers that are no longer running (recycled by gunicorn's
+        max_requests, or killed on timeout) are folded into the archive file
+        and removed, so totals never go down when a worker exits.
+        """
+        snapshots = [self.snapshot()]
+        if directory is None or not Path(directory).is_dir():
+            return snapshots
+        directory = Path(directory)
+        own_file = f'{METRICS_FILE_PREFIX}{os.getpid()}.json'
+        # Held while reading, so a concurrent scrape can't archive a file
+        # after the archive was read here
+        with _archive_lock(directory):
+            for path in directory.glob(f'{METRICS_FILE_PREFIX}*.json'):
+                pid = path.stem[len(METRICS_FILE_PREFIX):]
+                if path.name == own_file or not pid.isdigit():
+                    continue
+                if not _process_alive(int(pid)):
+                    mark_process_dead(path)
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # Being replaced by its worker; picked up on the next scrape
+                    continue
+            archive = _read_archive(directory)
+        if archive is not None:
+            snapshots.append(archive)
+        return snapshots
+
+
+def _write_json(path, data):
+    """
+    Replace `path` atomically, so readers never see a partial file
+    """
+    descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as temp_file:
+        json.dump(data, temp_file)
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def _archive_lock(directory):
+    """
+    Exclusive lock on the archive, shared by every worker on the host
+    """
+    with open(directory / METRICS_LOCK_FILE, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _read_archive(directory):
+    try:
+        return json.loads((directory / METRICS_ARCHIVE_FILE).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # A live process owned by another user
+        return True
+    return True
+
+
+def mark_process_dead(path):
+    """
+    Fold a dead worker's counters and histograms into the archive file and
+    remove its own file, like prometheus_client's mark_process_dead
+
+    The caller holds the archive lock. Gauges would be dropped here, but
+    every metric in METRICS is a counter or a histogram.
+    """
+    path = Path(path)
+    try:
+        dead = json.loads(path.read_text())
+    except FileNotFoundError:
+        return
+    except ValueError:
+        # Unreadable, so there is nothing to keep
+        dead = None
+    if dead is not None:
+        snapshots = [dead]
+        archive = _read_archive(path.parent)
+        if archive is not None:
+            snapshots.append(archive)
+        counters, histograms = merge_snapshots(snapshots)
+        _write_json(path.parent / METRICS_ARCHIVE_FILE, {
+            'counters': [[name, list(map(list, labels)), value] for (name, labels), value in counters.items()],
+            'histograms': [
+                [name, list(map(list, labels)), histogram] for (name, labels), histogram in histograms.items()],
+        })
+    path.unlink()
+
+
+def merge_snapshots(snapshots):
+    """
+    Sum counters and histogram buckets with the same name and labels
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+            merged['sum'] += histogram['sum']
+            merged['count'] += histogram['count']
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def render_text(snapshots):
+    """
+    Prometheus text exposition format (version 0.0.4)
+    """
+    counters, histograms = merge_snapshots(snapshots)
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        samples = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+        series = sorted(
+            (labels, histogram) for (metric, labels), histogram in histograms.items() if metric == name)
+        if not samples and not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for labels, histogram in series:
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """
+    connection.execute_wrapper callable counting queries and their total time
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def metrics_settings():
+    """
+    (enabled, METRICS_DIR or None, flush interval in seconds)
+    """
+    return (
+        getattr(settings, 'METRICS_ENABLED', True),
+        getattr(settings, 'METRICS_DIR', None) or None,
+        getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_METRICS_FLUSH_INTERVAL),
+    )
+
+
+@contextmanager
+def external_call(service):
+    """
+    Time a call to an external service (twilio, smtp, s3) into
+    external_call_duration_seconds, labelled with its outcome, and as a
+    span of the current trace
+    """
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        with span(service):
+            yield
+        outcome = 'ok'
+    finally:
+        registry.observe(
+            'external_call_duration_seconds', {'service': service, 'outcome': outcome},
+            time.perf_counter() - start
+        )
+
+
+def _stats_collector():
+    from common.utils.conditional_get import conditional_get_stats
+    from common.utils.response_compression import compression_stats
+
+    for view, stats in conditional_get_stats().items():
+        yield 'conditional_get_requests_total', {'view': view}, stats['requests']
+        yield 'conditional_get_not_modified_total', {'view': view}, stats['not_modified']
+    for endpoint, stats in compression_stats().items():
+        yield 'response_compression_bytes_in_total', {'route': endpoint}, stats['bytes_in']
+        yield 'response_compression_bytes_out_total', {'route': endpoint}, stats['bytes_out']
+
+
+registry.register_collector(_stats_collector)
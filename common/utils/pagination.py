@@ -1,17 +1,215 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from common.utils import APIResponse
 from rest_framework import status
 
 
+def estimate_count(queryset):
+    """
+    Return the query planner's row estimate for a queryset, or None when the
+    database doesn't provide one (MySQL and PostgreSQL only)
+    """
+    queryset = queryset.order_by().prefetch_related(None)
+    vendor = connections[queryset.db].vendor
+    try:
+        if vendor == 'postgresql':
+            return int(json.loads(queryset.explain(format='json'))[0]['Plan']['Plan Rows'])
+        if vendor == 'mysql':
+            # rows_produced_per_join of the last joined table estimates the result size
+            tables = []
+            pending = [json.loads(queryset.explain(format='json'))]
+            while pending:
+                node = pending.pop(0)
+                if isinstance(node, dict):
+                    if 'rows_produced_per_join' in node:
+                        tables.append(node)
+                    pending.extend(node.values())
+                elif isinstance(node, list):
+                    pending.extend(node)
+            if tables:
+                return int(tables[-1]['rows_produced_per_join'])
+    except (ValueError, KeyError, IndexError, TypeError):
+        pass
+    return None
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination on (created_at, id) returning APIResponse format
+
+    Pages are read with WHERE (created_at, id) < (last seen) ORDER BY created_at, id
+    LIMIT page_size + 1, so deep pages cost the same as the first one and no
+    COUNT(*) runs. The total is only computed on request:
+        ?count=true       exact COUNT(*)
+        ?count=estimate   the query planner's estimate (null when unavailable)
+
+    Only newest-first (default) and ?ordering=created_at are supported.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    position_field = 'created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ascending = self.get_ascending(request)
+        self.count = self.get_count(queryset, request)
+        cursor = self.decode_cursor(request)
+
+        # Rows keep both keys even when ?fields= defers the column or values() omits it
+        queryset = queryset.annotate(
+            cursor_position=F(self.position_field), cursor_pk=F('pk'))
+
+        reverse = cursor is not None and cursor['reverse']
+        descending = self.ascending == reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.position_field, prefix + 'pk')
+
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            # The plain range on the position column bounds the index scan;
+            # the OR only resolves ties on it
+            queryset = queryset.filter(
+                **{f'{self.position_field}__{lookup}e': cursor['position']}
+            ).filter(
+                Q(**{f'{self.position_field}__{lookup}': cursor['position']})
+                | Q(**{f'pk__{lookup}': cursor['pk']})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ascending(self, request) -> bool:
+        ordering = request.query_params.get('ordering')
+        if ordering in (None, '', f'-{self.position_field}'):
+            return False
+        if ordering == self.position_field:
+            return True
+        raise ValidationError({
+            'ordering': f'Cursor pagination only supports ordering by {self.position_field}'
+        })
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, '').lower()
+        if mode in ('true', '1'):
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'position': datetime.fromisoformat(data['p']),
+                'pk': int(data['i']),
+                'reverse': bool(data.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, item, reverse):
+        if isinstance(item, dict):
+            position, pk = item['cursor_position'], item['cursor_pk']
+        else:
+            position, pk = item.cursor_position, item.cursor_pk
+        data = {'p': position.isoformat(), 'i': pk}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        meta = {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        }
+        if self.count is not None and self.request.query_params.get(self.count_query_param) == 'estimate':
+            meta['count_estimated'] = True
+        return APIResponse.success(
+            data=data,
+            message='Data retrieved successfully',
+            meta=meta
+        )
+
+
 class CustomPageNumberPagination(PageNumberPagination):
     """
         Custom pagination that returns APIResponse format
+        Requests opt in to KeysetPagination with ?pagination=cursor (or by
+        sending a ?cursor=) on models with a created_at column
         """
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_keyset(queryset, request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def wants_keyset(self, queryset, request) -> bool:
+        params = request.query_params
+        if params.get('pagination') != 'cursor' and self.keyset_class.cursor_query_param not in params:
+            return False
+        try:
+            queryset.model._meta.get_field(self.keyset_class.position_field)
+        except FieldDoesNotExist:
+            return False
+        return True
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return APIResponse.success(
             data=data,
             message='Data retrieved successfully',
@@ -0,0 +1,147 @@
+"""
+Sampled request profiling
+A sampling profiler that records the stacks of one request thread and writes
+them as collapsed stacks (flamegraph.pl / speedscope input)
+"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+from django.core import signing
+
+DEFAULT_PROFILING_INTERVAL = 0.005
+DEFAULT_PROFILING_MAX_FILES = 200
+DEFAULT_PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_TOKEN_SALT = 'common.profiling'
+PROFILE_FILE_SUFFIX = '.collapsed'
+
+_ROUTE_CHARS = re.compile(r'[^A-Za-z0-9]+')
+
+
+def profiling_settings():
+    """
+    (enabled, sample rate, sampling interval in seconds, output directory, max files)
+    """
+    return (
+        getattr(settings, 'PROFILING_ENABLED', False),
+        getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0),
+        getattr(settings, 'PROFILING_INTERVAL', DEFAULT_PROFILING_INTERVAL),
+        Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles')),
+        getattr(settings, 'PROFILING_MAX_FILES', DEFAULT_PROFILING_MAX_FILES),
+    )
+
+
+def profiling_token() -> str:
+    """
+    A signed value for the X-Profile header, valid for PROFILING_TOKEN_MAX_AGE seconds
+    """
+    return signing.TimestampSigner(salt=PROFILING_TOKEN_SALT).sign('profile')
+
+
+def is_valid_profiling_token(token: str) -> bool:
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', DEFAULT_PROFILING_TOKEN_MAX_AGE)
+    try:
+        return signing.TimestampSigner(salt=PROFILING_TOKEN_SALT).unsign(token, max_age=max_age) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def _frame_label(code, project_root: str) -> str:
+    filename = code.co_filename
+    if filename.startswith(project_root):
+        filename = filename[len(project_root):].lstrip('/\\')
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages', 1)[1].lstrip('/\\')
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames in the collapsed format
+    return f'{code.co_qualname} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """
+    Sample one thread's stack every `interval` seconds from a helper thread
+
+    Stacks are counted in collapsed form, root first:
+    "WSGIHandler.__call__ (...);OrderViewSet.list (...);... 12"
+    """
+
+    def __init__(self, thread_id=None, interval=DEFAULT_PROFILING_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._labels = {}
+        self._project_root = str(settings.BASE_DIR)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code, self._project_root)
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+def route_tag(endpoint: str) -> str:
+    """
+    File-name safe form of a URL pattern, e.g. /api/v1/store/^orders/$ -> api-v1-store-orders
+    """
+    return _ROUTE_CHARS.sub('-', endpoint).strip('-') or 'root'
+
+
+def write_profile(sampler, directory, endpoint, method, duration, max_files=DEFAULT_PROFILING_MAX_FILES):
+    """
+    Write the sampler's stacks under `directory`, tagged with the route, and
+    delete the oldest profiles beyond `max_files`
+
+    Returns the file name, or None when nothing was sampled.
+    """
+    if not sampler.samples:
+        return None
+    directory.mkdir(parents=True, exist_ok=True)
+    name = (
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{route_tag(endpoint)}-{method.lower()}"
+        f"-{int(duration * 1000)}ms-{uuid.uuid4().hex[:8]}{PROFILE_FILE_SUFFIX}"
+    )
+    (directory / name).write_text(sampler.collapsed())
+
+    profiles = sorted(directory.glob(f'*{PROFILE_FILE_SUFFIX}'), key=lambda path: path.stat().st_mtime)
+    for path in profiles[:max(len(profiles) - max_files, 0)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            # Another worker rotated it first
+            pass
+    return name
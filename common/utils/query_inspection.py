@@ -0,0 +1,102 @@
+"""
+Runtime N+1 query detection
+Groups a request's SQL by fingerprint and attributes repeated statements to
+the Python code that issued them
+"""
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|\?')
+_WHITESPACE = re.compile(r'\s+')
+
+# Frames from these files are the detector itself, not the code issuing queries
+_OWN_FILES = {__file__.rstrip('c'), str(Path(__file__).resolve().parent.parent / 'middleware.py')}
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize SQL so statements differing only in literal values compare equal
+
+    String and number literals become ?, and IN lists of any length collapse
+    to IN (...).
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _is_project_file(filename: str, project_root: str) -> bool:
+    return (
+        filename.startswith(project_root)
+        and 'site-packages' not in filename
+        and filename not in _OWN_FILES
+    )
+
+
+def call_site(project_root=None) -> str:
+    """
+    The innermost project frame on the current stack, as "Qualname (file:line)"
+    e.g. "ProductSerializer.get_request (store/serializers/product_serializer.py:40)"
+    """
+    project_root = str(project_root or settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _is_project_file(filename, project_root):
+            relative = filename[len(project_root):].lstrip('/\\')
+            return f'{frame.f_code.co_qualname} ({relative}:{frame.f_lineno})'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryTracker:
+    """
+    connection.execute_wrapper callable counting queries per fingerprint
+
+    The call site is captured when a fingerprint first repeats, so the
+    stack is only walked for statements that might be N+1s.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.sites = {}
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        self.total += 1
+        self.counts[key] += 1
+        if self.counts[key] == 2:
+            self.sites[key] = call_site()
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold: int):
+        """
+        Fingerprints run more than `threshold` times, most repeated first
+        """
+        return [
+            {'fingerprint': key, 'count': count, 'site': self.sites.get(key, 'unknown')}
+            for key, count in self.counts.most_common()
+            if count > threshold
+        ]
+
+
+def n_plus_one_settings():
+    """
+    (enabled, threshold, response header enabled)
+    """
+    return (
+        getattr(settings, 'N_PLUS_ONE_DETECTION', False),
+        getattr(settings, 'N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD),
+        getattr(settings, 'N_PLUS_ONE_HEADER', False),
+    )
@@ -0,0 +1,122 @@
+"""
+Response body compression for JSON APIs
+gzip from the standard library, plus brotli when installed
+"""
+import gzip
+import re
+import threading
+from collections import defaultdict
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Dynamic responses are compressed on every request: favour speed over the
+# last few percent of size (see the benchmark_compression command)
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+DEFAULT_MIN_SIZE = 1024
+
+_accept_encoding_re = re.compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {
+    'responses': 0, 'compressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0,
+})
+
+
+def brotli_available() -> bool:
+    """
+    Return whether the brotli backend is installed
+    """
+    return brotli is not None
+
+
+def compression_settings():
+    """
+    Return (min_size, gzip_level, brotli_quality) from the RESPONSE_COMPRESSION_* settings
+    """
+    return (
+        getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE),
+        getattr(settings, 'RESPONSE_COMPRESSION_GZIP_LEVEL', DEFAULT_GZIP_LEVEL),
+        getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY),
+    )
+
+
+def choose_encoding(accept_encoding):
+    """
+    Pick the content coding for an Accept-Encoding header value
+
+    Returns 'br' or 'gzip', or None when the client accepts neither.
+    Codings with q=0 are refused; on equal weights brotli is preferred.
+    """
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        match = _accept_encoding_re.match(part)
+        if not match:
+            continue
+        try:
+            weights[match.group(1).lower()] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+
+    wildcard = weights.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_weight = None, 0.0
+    for encoding in candidates:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body, encoding, level=None):
+    """
+    Compress `body` with 'gzip' or 'br' at `level` (the configured level by default)
+    """
+    _, gzip_level, brotli_quality = compression_settings()
+    if encoding == 'br':
+        return brotli.compress(
+            body, mode=brotli.MODE_TEXT,
+            quality=brotli_quality if level is None else level)
+    # mtime=0 keeps the output deterministic for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level if level is None else level, mtime=0)
+
+
+def record_compression(endpoint, encoding, bytes_in, bytes_out, seconds):
+    """
+    Count one eligible response for `endpoint` (encoding None = sent uncompressed)
+    """
+    with _stats_lock:
+        stats = _stats[endpoint]
+        stats['responses'] += 1
+        if encoding is not None:
+            stats['compressed'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['seconds'] += seconds
+            stats[encoding] = stats.get(encoding, 0) + 1
+
+
+def compression_stats():
+    """
+    Return per-endpoint compression counters
+
+    responses: JSON responses above the size threshold
+    compressed: those sent compressed (the rest didn't accept gzip or br)
+    ratio: compressed bytes / original bytes
+    avg_ms: mean compression time
+    """
+    with _stats_lock:
+        snapshot = {endpoint: dict(stats) for endpoint, stats in _stats.items()}
+    for stats in snapshot.values():
+        stats['ratio'] = (
+            round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else None
+        )
+        stats['avg_ms'] = (
+            round(stats['seconds'] * 1000 / stats['compressed'], 3) if stats['compressed'] else None
+        )
+        stats['seconds'] = round(stats['seconds'], 6)
+    return snapshot
@@ -0,0 +1,229 @@
+"""
+Serializer utilities
+Cut the per-row cost of nested ModelSerializers by building their fields once,
+and derive the queryset plan (columns, joins, prefetches) from the fields served
+"""
+import copy
+from contextlib import contextmanager
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from .field_selection import ALL_FIELDS, CollapsedRelationField, QueryPlan
+
+_field_plans = {}
+_field_plan_cache_enabled = True
+
+
+@contextmanager
+def field_plan_cache_disabled():
+    """
+    Temporarily fall back to DRF's uncached behaviour (used by benchmarks)
+    """
+    global _field_plan_cache_enabled
+    previous = _field_plan_cache_enabled
+    _field_plan_cache_enabled = False
+    try:
+        yield
+    finally:
+        _field_plan_cache_enabled = previous
+
+
+def _column_for(model, name, field):
+    """
+    Return the model column a serializer field reads, or None if it can't be told
+    'cart.id' reads the 'cart' foreign key column
+    """
+    source = field.source or name
+    if source == '*':
+        return None
+    try:
+        model_field = model._meta.get_field(source.split('.')[0])
+    except FieldDoesNotExist:
+        return None
+    return model_field.name if model_field.concrete else None
+
+
+class CachedFieldsMixin:
+    """
+    Serializer mixin caching the field plan and nested serializers
+
+    ModelSerializer.get_fields() introspects the model and builds every field
+    from scratch for each serializer instance. The built (unbound) fields are
+    cached per serializer class and deep-copied for new instances instead.
+    Only use it on serializers whose fields don't depend on the context.
+
+    Relations rendered as nested objects are declared in `expandable_fields`
+    (field name -> serializer class, named after the model relation), and
+    SerializerMethodFields reading a relation in `field_dependencies`
+    (field name -> relation). From these, setup_queryset() eager-loads what
+    the serializer tree reads, restricted to the FieldSelection requested
+    through ?fields= and ?expand=.
+
+    nested_representation() reuses one nested serializer per relation for
+    all rows serialized by this instance, so SerializerMethodFields returning
+    nested data build that serializer's fields once per list, not per row.
+    """
+    expandable_fields = {}
+    field_dependencies = {}
+
+    def __init__(self, *args, selection=None, **kwargs):
+        self._selection = selection
+        super().__init__(*args, **kwargs)
+
+    @property
+    def selection(self):
+        """
+        The FieldSelection for this serializer
+        Root serializers read it from the context, nested ones from their parent
+        """
+        if self._selection is None:
+            parent, field_name = self.parent, self.field_name
+            if isinstance(parent, serializers.ListSerializer):
+                parent, field_name = parent.parent, parent.field_name
+            if parent is None:
+                self._selection = self.context.get('field_selection') or ALL_FIELDS
+            elif isinstance(parent, CachedFieldsMixin):
+                self._selection = parent.selection.child(field_name)
+            else:
+                self._selection = ALL_FIELDS
+        return self._selection
+
+    @classmethod
+    def get_field_plan(cls):
+        """
+        Return the cached, unbound fields of this serializer class
+        """
+        fields = _field_plans.get(cls)
+        if fields is None:
+            fields = _field_plans[cls] = super(CachedFieldsMixin, cls()).get_fields()
+        return fields
+
+    def get_fields(self):
+        selection = self.selection
+        if _field_plan_cache_enabled:
+            fields = {
+                name: copy.deepcopy(field)
+                for name, field in self.get_field_plan().items()
+                if selection.includes(name)
+            }
+        else:
+            fields = {
+                name: field
+                for name, field in super().get_fields().items()
+                if selection.includes(name)
+            }
+
+        for name in self.expandable_fields:
+            if name in fields and not selection.expands(name):
+                fields[name] = CollapsedRelationField()
+        return fields
+
+    def nested_representation(self, name, instance, many=False):
+        """
+        Serialize relation `name` with its expandable_fields serializer
+
+        Equivalent to serializer_class(instance, many=many, context=self.context).data,
+        with the nested part of this serializer's FieldSelection
+        """
+        serializer_class = self.expandable_fields[name]
+        if not _field_plan_cache_enabled:
+            return serializer_class(
+                instance, many=many, context=self.context,
+                selection=self.selection.child(name)
+            ).data
+
+        nested = self.__dict__.setdefault('_nested_serializers', {})
+        serializer = nested.get(name)
+        if serializer is None:
+            serializer = nested[name] = serializer_class(
+                context=self.context, selection=self.selection.child(name))
+
+        if many:
+            return [serializer.to_representation(item) for item in instance]
+        return serializer.to_representation(instance)
+
+    @classmethod
+    def setup_queryset(cls, queryset, selection=None):
+        """
+        Eager-load what this serializer tree reads for `selection`, and
+        nothing else: unselected columns are deferred with only() and
+        unselected relations are neither joined nor prefetched
+        """
+        return cls.get_query_plan(selection).apply(queryset)
+
+    @classmethod
+    def get_query_plan(cls, selection=None, prefix='', plan=None, loaded_relation=None):
+        """
+        Build the QueryPlan for this serializer
+
+        Args:
+            selection: FieldSelection for this level (default: everything)
+            prefix: Lookup path when this model is reached through joins
+            plan: Plan to add to (a new one is created for the root)
+            loaded_relation: Relation already filled in by the parent's prefetch
+        """
+        selection = selection or ALL_FIELDS
+        plan = plan if plan is not None else QueryPlan()
+        model = cls.Meta.model
+        fields = {
+            name: field for name, field in cls.get_field_plan().items()
+            if selection.includes(name) and not field.write_only
+        }
+
+        # A relation is expanded when selected and expanded, otherwise only
+        # its keys are loaded (for collapsed fields and method field dependencies)
+        relations = {}
+        for name in fields:
+            if name in cls.expandable_fields:
+                relations[name] = relations.get(name) or selection.expands(name)
+            elif name in cls.field_dependencies:
+                relation = cls.field_dependencies[name]
+                relations[relation] = relations.get(relation, False)
+
+        columns = None
+        if selection.fields is not None:
+            columns = {model._meta.pk.name}
+            for name, field in fields.items():
+                if name in cls.expandable_fields or name in cls.field_dependencies:
+                    continue
+                column = _column_for(model, name, field)
+                if column is None:
+                    # Unknown data needs (e.g. an undeclared method field): load everything
+                    columns = None
+                    break
+                columns.add(column)
+        plan.add_level(prefix, model, columns)
+
+        for name, expanded in relations.items():
+            relation = model._meta.get_field(name)
+            child_class = cls.expandable_fields.get(name)
+            if relation.concrete:
+                if columns is not None:
+                    columns.add(relation.name)
+                if expanded and name != loaded_relation:
+                    plan.select_related.append(prefix + name)
+                    if hasattr(child_class, 'get_query_plan'):
+                        child_class.get_query_plan(
+                            selection.child(name), prefix=prefix + name + '__', plan=plan)
+                continue
+
+            back_relation = relation.field.name
+            if expanded and hasattr(child_class, 'get_query_plan'):
+                # The prefetch sets each child's back relation to its parent,
+                # unless the parent was loaded with deferred columns
+                child_plan = child_class.get_query_plan(
+                    selection.child(name),
+                    loaded_relation=back_relation if columns is None else None
+                )
+                child_columns = child_plan.levels[0][2]
+                if child_columns is not None:
+                    child_columns.add(back_relation)
+                child_queryset = child_plan.apply(relation.related_model.objects.all())
+            elif expanded:
+                child_queryset = relation.related_model.objects.all()
+            else:
+                child_queryset = relation.related_model.objects.only(
+                    relation.related_model._meta.pk.name, back_relation)
+            plan.prefetch.append(Prefetch(prefix + name, queryset=child_queryset))
+
+        return plan
@@ -0,0 +1,232 @@
+"""
+Streaming utilities for large responses
+Helpers to walk big querysets and build archives and exports without buffering them in memory
+"""
+import csv
+import datetime
+import io
+import time
+import zipfile
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Tuple
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+def queryset_batches(queryset, chunk_size: int = 500) -> Iterator[List]:
+    """
+    Walk a queryset in primary key order, one list of at most chunk_size rows at a time
+
+    MySQL drivers load the whole result set of a query into memory, even when
+    QuerySet.iterator() is used, so the queryset is walked in keyset batches
+    (pk > last_pk) and each batch is consumed with .iterator(chunk_size=...).
+
+    Args:
+        queryset: Model or values() queryset (values() must include 'id')
+        chunk_size: Number of rows fetched per batch
+
+    Yields:
+        Lists of model instances or dicts, depending on the queryset
+    """
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+
+        rows = list(batch[:chunk_size].iterator(chunk_size=chunk_size))
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+        last_pk = last['id'] if isinstance(last, dict) else last.pk
+
+
+def queryset_iterator(queryset, chunk_size: int = 500) -> Iterator:
+    """
+    Iterate over a queryset in primary key order with constant memory
+    See queryset_batches
+
+    Yields:
+        Model instances or dicts, depending on the queryset
+    """
+    for rows in queryset_batches(queryset, chunk_size=chunk_size):
+        yield from rows
+
+
+def attach_related(batches: Iterable[List[dict]], related_queryset, related_field: str,
+                   key: str) -> Iterator[List[dict]]:
+    """
+    Add each parent row's related rows under `key`, one query per batch
+
+    Args:
+        batches: Batches of values() rows (as from queryset_batches)
+        related_queryset: values() queryset of the related rows, including related_field
+        related_field: Column on the related rows holding the parent id, e.g. 'order_id'
+        key: Name of the list added to each parent row
+
+    Yields:
+        The same batches, with the related rows attached in primary key order
+    """
+    for rows in batches:
+        related = defaultdict(list)
+        children = related_queryset.filter(
+            **{f'{related_field}__in': [row['id'] for row in rows]}
+        ).order_by(related_field, 'pk')
+        for child in children.iterator(chunk_size=len(rows)):
+            related[child[related_field]].append(child)
+        for row in rows:
+            row[key] = related.get(row['id'], [])
+        yield rows
+
+
+def stream_ndjson(batches: Iterable[List[dict]]) -> Iterator[bytes]:
+    """
+    Yield batches of rows as newline-delimited JSON, one chunk per batch
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for rows in batches:
+        yield ''.join(encoder.encode(row) + '\n' for row in rows).encode('utf-8')
+
+
+_json_encoder = DjangoJSONEncoder()
+
+
+# Leading characters that make spreadsheet apps read a cell as a formula
+_CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    """
+    Format a cell like the NDJSON export (ISO 8601 dates, empty for null)
+    Text that a spreadsheet would run as a formula is prefixed with a quote
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _json_encoder.default(value)
+    if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(batches: Iterable[List[dict]], fields: List[str], related_key: str = None,
+               related_fields: List[str] = ()) -> Iterator[bytes]:
+    """
+    Yield batches of rows as CSV, one chunk per batch (after the header)
+
+    With related_key, each related row becomes a CSV row of the parent's
+    columns followed by its own (headed '<related_key>.<field>'); parents
+    without related rows get one row with those columns empty.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(list(fields) + [f'{related_key}.{field}' for field in related_fields])
+    yield drain()
+
+    empty = [''] * len(related_fields)
+    for rows in batches:
+        for row in rows:
+            values = [_csv_value(row[field]) for field in fields]
+            related = (row.get(related_key) or [None]) if related_key else [None]
+            for child in related:
+                if child is None:
+                    writer.writerow(values + empty)
+                else:
+                    writer.writerow(values + [_csv_value(child[field]) for field in related_fields])
+        yield drain()
+
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def export_response(batches: Iterable[List[dict]], export_format: str, filename: str,
+                    fields: List[str], related_key: str = None,
+                    related_fields: List[str] = ()) -> StreamingHttpResponse:
+    """
+    Stream batches of values() rows as an NDJSON or CSV attachment
+
+    In NDJSON each line is a parent row with its related rows nested under
+    related_key; CSV flattens them (see stream_csv).
+    """
+    if export_format == 'csv':
+        chunks = stream_csv(batches, fields, related_key, related_fields)
+    else:
+        chunks = stream_ndjson(batches)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+class _ZipOutputBuffer:
+    """
+    Write-only, non-seekable file object used as the ZipFile target
+
+    Written bytes are held until drained by the streaming generator, so only
+    the most recent chunk is ever kept in memory.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, Iterable[bytes], int]]) -> Iterator[bytes]:
+    """
+    Build a zip archive on the fly and yield it chunk by chunk
+
+    Args:
+        entries: Iterable of (archive_name, chunk_iterable, compress_type).
+            Chunk iterables are consumed lazily, one entry at a time.
+
+    Yields:
+        Bytes of the zip archive, suitable for StreamingHttpResponse
+    """
+    buffer = _ZipOutputBuffer()
+    with zipfile.ZipFile(buffer, mode='w', allowZip64=True) as archive:
+        for name, chunks, compress_type in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compress_type
+            info.external_attr = 0o600 << 16
+            with archive.open(info, mode='w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+
+    # Central directory is written when the archive is closed
+    data = buffer.drain()
+    if data:
+        yield data
@@ -0,0 +1,365 @@
+"""
+Synthetic dataset generation for performance testing
+Builds referentially consistent users, vehicle part requests, products,
+carts and orders with bulk_create. Primary keys are assigned up front, so
+child rows point at their parents without reading IDs back, which MySQL
+can't do for bulk inserts.
+"""
+import math
+import random
+import time
+import uuid
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from authentication.models import User
+from common.utils.load_testing import LOAD_TEST_PASSWORD, upload_image
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from store.models import Address, Cart, CartItem, Order, OrderHasItems, Product
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Per-parent row counts; see Distribution for the format
+DEFAULT_DISTRIBUTIONS = {
+    'requests_per_user': 'poisson:3',
+    'products_per_request': 'poisson:4',
+    'images_per_request': 'uniform:0-3',
+    'carts_per_user': 'geometric:0.5',
+    'items_per_cart': 'uniform:1-5',
+    'orders_per_user': 'geometric:2',
+}
+
+# Parents first, so every flush satisfies the foreign keys
+MODELS = [User, Address, VehiclePartRequest, VehiclePartRequestImage, Product, Cart, CartItem, Order, OrderHasItems]
+
+VEHICLE_MODELS = {
+    'car': ['Toyota Corolla', 'Honda Civic', 'Suzuki Swift', 'Nissan Sunny', 'Toyota Axio'],
+    'truck': ['Isuzu Elf', 'Tata 1613', 'Mitsubishi Canter'],
+    'motorcycle': ['Bajaj Pulsar', 'Honda Dio', 'Yamaha FZ'],
+    'bus': ['Ashok Leyland Viking', 'Tata LP 909'],
+    'van': ['Toyota HiAce', 'Nissan Caravan', 'Suzuki Every'],
+    'suv': ['Toyota Prado', 'Mitsubishi Montero', 'Honda Vezel'],
+    'other': ['Bajaj RE', 'Massey Ferguson 240'],
+}
+VEHICLE_TYPE_WEIGHTS = {'car': 40, 'motorcycle': 20, 'van': 12, 'suv': 10, 'truck': 8, 'bus': 5, 'other': 5}
+PART_NAMES = [
+    'Brake pad', 'Oil filter', 'Air filter', 'Headlight', 'Side mirror', 'Radiator', 'Alternator',
+    'Starter motor', 'Clutch plate', 'Shock absorber', 'Timing belt', 'Fuel pump', 'Wiper blade', 'Spark plug',
+]
+BRANDS = ['Genuine', 'Bosch', 'Denso', 'NGK', 'Valeo', 'Aisin', 'Generic']
+CITIES = ['Colombo', 'Kandy', 'Galle', 'Jaffna', 'Kurunegala', 'Negombo', 'Matara', 'Anuradhapura']
+REQUEST_STATUS_WEIGHTS = {'pending': 40, 'in_progress': 25, 'completed': 30, 'cancelled': 5}
+ORDER_SOURCE_WEIGHTS = {'android': 50, 'web': 30, 'ios': 20}
+ORDER_STATUS_WEIGHTS = {'completed': 70, 'pending': 30}
+# Share of cart lines picked from the account's own products (the ones the API shows it)
+OWN_PRODUCT_SHARE = 0.8
+
+
+class Distribution:
+    """
+    Row count per parent, from a spec: fixed:N, uniform:A-B, poisson:MEAN or
+    geometric:MEAN (many parents with few rows, a long tail with many)
+    """
+
+    KINDS = ('fixed', 'uniform', 'poisson', 'geometric')
+
+    def __init__(self, spec):
+        kind, _, value = spec.partition(':')
+        if kind not in self.KINDS or not value:
+            raise ValueError(f"Unknown distribution {spec!r}, expected one of: {', '.join(self.KINDS)}")
+        self.spec = spec
+        self.kind = kind
+        if kind == 'uniform':
+            low, _, high = value.partition('-')
+            self.low, self.high = int(low), int(high or low)
+            if not 0 <= self.low <= self.high:
+                raise ValueError(f'Invalid range in {spec!r}')
+        else:
+            self.mean = float(value)
+            if self.mean < 0:
+                raise ValueError(f'Negative mean in {spec!r}')
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            return int(self.mean)
+        if self.kind == 'uniform':
+            return rng.randint(self.low, self.high)
+        if self.kind == 'poisson':
+            if self.mean > 30:
+                return max(round(rng.gauss(self.mean, math.sqrt(self.mean))), 0)
+            # Knuth's method
+            limit, count, product = math.exp(-self.mean), 0, rng.random()
+            while product > limit:
+                count += 1
+                product *= rng.random()
+            return count
+        # Failures before the first success, with success probability 1 / (1 + mean)
+        success, count = 1 / (1 + self.mean), 0
+        while rng.random() >= success:
+            count += 1
+        return count
+
+    def expected(self):
+        return (self.low + self.high) / 2 if self.kind == 'uniform' else self.mean
+
+    def __str__(self):
+        return self.spec
+
+
+@contextmanager
+def explicit_timestamps(models):
+    """
+    Let bulk_create keep the created_at/updated_at values set on the rows
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def next_ids():
+    """
+    First free primary key of each model
+    """
+    return {model: (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1 for model in MODELS}
+
+
+def placeholder_media():
+    """
+    Store one small placeholder image per upload directory and return their names
+    """
+    names = {}
+    for key, directory in (('vehicle_image', 'vehicle_images'), ('part_image', 'part_images'),
+                           ('product_image', 'product_images'), ('gallery_image', 'request_images')):
+        filename, content, _ = upload_image(f'synthetic-{key}.png', size=(320, 240))
+        names[key] = default_storage.save(f'{directory}/{filename}', ContentFile(content))
+    return names
+
+
+class DatasetGenerator:
+    """
+    Generate `users` accounts and their rows, `batch_size` rows per INSERT
+
+    Every account owns requests answered by products, open carts, and orders
+    each made from its own checkout cart, in the amounts drawn from
+    `distributions`. Cart lines mostly pick the account's own products.
+    Timestamps are spread over the last `days` days, children after their
+    parents. With `media_rate` > 0 that share of requests and products point
+    at placeholder images, and requests get gallery images.
+    """
+
+    def __init__(self, users, distributions=None, batch_size=DEFAULT_BATCH_SIZE, media_rate=0.0, days=365,
+                 seed=None, password=LOAD_TEST_PASSWORD, progress=None):
+        self.users = users
+        self.distributions = {
+            name: Distribution(spec) if isinstance(spec, str) else spec
+            for name, spec in {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}.items()
+        }
+        self.batch_size = batch_size
+        self.media_rate = media_rate
+        self.days = days
+        self.rng = random.Random(seed)
+        self.password = password
+        self.progress = progress
+        self.counts = {model._meta.label: 0 for model in MODELS}
+        self._pending = {model: [] for model in MODELS}
+
+    def generate(self):
+        """
+        Insert the dataset; returns rows inserted per model and the elapsed seconds
+        """
+        start = time.perf_counter()
+        self.now = timezone.now()
+        self.ids = next_ids()
+        self.first_product_id = self.ids[Product]
+        # Prices of every generated product, by pk - first_product_id
+        self.product_prices = array('d')
+        self.password_hash = make_password(self.password)
+        self.media = placeholder_media() if self.media_rate > 0 else None
+
+        with explicit_timestamps(MODELS):
+            for _ in range(self.users):
+                self._add_user()
+                if self._pending_rows() >= self.batch_size:
+                    self._flush()
+            self._flush()
+        self._reset_sequences()
+        return self.counts, time.perf_counter() - start
+
+    # Row builders
+
+    def _next_id(self, model):
+        pk = self.ids[model]
+        self.ids[model] += 1
+        return pk
+
+    def _after(self, moment):
+        return moment + (self.now - moment) * self.rng.random()
+
+    def _choice(self, weights):
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+
+    def _add(self, instance):
+        self._pending[type(instance)].append(instance)
+        return instance
+
+    def _add_user(self):
+        rng = self.rng
+        pk = self._next_id(User)
+        joined = self.now - timedelta(days=self.days) * rng.random()
+        user = self._add(User(
+            id=pk, phone=self._phone(pk), email=f'synthetic-{pk}@example.com', first_name='Synthetic',
+            last_name=f'User {pk}', password=self.password_hash, created_at=joined, updated_at=joined,
+            date_joined=joined,
+        ))
+        address = self._add(Address(
+            id=self._next_id(Address), first_name=user.first_name, last_name=user.last_name, country='Sri Lanka',
+            post_code=f'{rng.randrange(10000, 99999)}', city=rng.choice(CITIES),
+            address1=f'{rng.randint(1, 500)} Synthetic Road', created_at=joined, updated_at=joined,
+        ))
+
+        own_products = []
+        for _ in range(self.distributions['requests_per_user'].sample(rng)):
+            own_products.extend(self._add_request(user))
+        for _ in range(self.distributions['carts_per_user'].sample(rng)):
+            self._add_cart(self._after(joined), own_products)
+        for _ in range(self.distributions['orders_per_user'].sample(rng)):
+            ordered = self._after(joined)
+            cart, lines = self._add_cart(ordered, own_products)
+            if lines:
+                self._add_order(user, address, cart, lines, ordered)
+
+    def _phone(self, pk):
+        # Mobile prefixes 071-078, which the phone validator accepts
+        return f'+947{1 + pk // 10**7 % 8}{pk % 10**7:07d}'
+
+    def _add_request(self, user):
+        rng = self.rng
+        created = self._after(user.created_at)
+        vehicle_type = self._choice(VEHICLE_TYPE_WEIGHTS)
+        part_name = rng.choice(PART_NAMES)
+        with_media = self.media is not None and rng.random() < self.media_rate
+        part_request = self._add(VehiclePartRequest(
+            id=self._next_id(VehiclePartRequest), user_id=user.pk, vehicle_type=vehicle_type,
+            vehicle_model=rng.choice(VEHICLE_MODELS[vehicle_type]), vehicle_year=rng.randint(1995, self.now.year),
+            part_name=part_name, part_number=f'PN-{rng.randrange(10**6):06d}' if rng.random() < 0.4 else None,
+            description='Synthetic request for performance testing' if rng.random() < 0.5 else None,
+            status=self._choice(REQUEST_STATUS_WEIGHTS), created_at=created, updated_at=created,
+            vehicle_image=self.media['vehicle_image'] if with_media else None,
+            part_image=self.media['part_image'] if with_media else None,
+        ))
+        if with_media:
+            for position in range(self.distributions['images_per_request'].sample(rng)):
+                self._add(VehiclePartRequestImage(
+                    id=self._next_id(VehiclePartRequestImage), request_id=part_request.pk,
+                    image=self.media['gallery_image'], position=position, created_at=created, updated_at=created,
+                ))
+
+        products = []
+        for _ in range(self.distributions['products_per_request'].sample(rng)):
+            answered = self._after(created)
+            price = Decimal(str(round(max(rng.lognormvariate(8.5, 1.0), 100), 2)))
+            product = self._add(Product(
+                id=self._next_id(Product), request_id=part_request.pk,
+                name=f'{rng.choice(BRANDS)} {part_name.lower()}', description='Synthetic product',
+                price=price, created_at=answered, updated_at=answered,
+                image=self.media['product_image'] if self.media is not None and rng.random() < self.media_rate
+                else None,
+            ))
+            self.product_prices.append(float(price))
+            products.append((product.pk, price))
+        return products
+
+    def _pick_products(self, count, own_products):
+        """
+        `count` distinct (pk, price) pairs, mostly from `own_products`
+        """
+        total = len(self.product_prices)
+        picked = {}
+        attempts = 0
+        while len(picked) < count and attempts < count * 4 and (own_products or total):
+            attempts += 1
+            if own_products and (not total or self.rng.random() < OWN_PRODUCT_SHARE):
+                pk, price = self.rng.choice(own_products)
+            else:
+                index = self.rng.randrange(total)
+                pk = self.first_product_id + index
+                price = Decimal(str(self.product_prices[index]))
+            picked[pk] = price
+        return list(picked.items())
+
+    def _add_cart(self, created, own_products):
+        """
+        A cart with its items; returns (cart, [(product pk, price, quantity)])
+        """
+        rng = self.rng
+        lines = [
+            (pk, price, rng.choices((1, 2, 3), (70, 20, 10))[0])
+            for pk, price in self._pick_products(self.distributions['items_per_cart'].sample(rng), own_products)
+        ]
+        cart = self._add(Cart(
+            id=self._next_id(Cart), session_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            total=sum((price * quantity for _, price, quantity in lines), Decimal('0.00')),
+            item_count=sum(quantity for _, _, quantity in lines), created_at=created, updated_at=created,
+        ))
+        for pk, _, quantity in lines:
+            self._add(CartItem(
+                id=self._next_id(CartItem), cart_id=cart.pk, product_id=pk, quantity=quantity,
+                created_at=created, updated_at=created,
+            ))
+        return cart, lines
+
+    def _add_order(self, user, address, cart, lines, created):
+        pk = self._next_id(Order)
+        order = self._add(Order(
+            id=pk, total=cart.total, reference_number=f'SYN-{pk:010d}',
+            source=self._choice(ORDER_SOURCE_WEIGHTS), status=self._choice(ORDER_STATUS_WEIGHTS),
+            user_id=user.pk, shipping_address_id=address.pk, cart_id=cart.pk, created_at=created, updated_at=created,
+        ))
+        for pk, price, quantity in lines:
+            self._add(OrderHasItems(
+                id=self._next_id(OrderHasItems), order_id=order.pk, product_id=pk, price=price, quantity=quantity,
+                created_at=created, updated_at=created,
+            ))
+
+    # Writing
+
+    def _pending_rows(self):
+        return sum(len(rows) for rows in self._pending.values())
+
+    def _flush(self):
+        with transaction.atomic():
+            for model in MODELS:
+                rows = self._pending[model]
+                if rows:
+                    model.objects.bulk_create(rows, batch_size=self.batch_size)
+                    self.counts[model._meta.label] += len(rows)
+                    self._pending[model] = []
+        if self.progress:
+            self.progress(self.counts)
+
+    def _reset_sequences(self):
+        """
+        Move sequences past the explicit IDs (PostgreSQL; MySQL and SQLite track them)
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
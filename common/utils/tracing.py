@@ -0,0 +1,155 @@
+"""
+Lightweight request tracing
+Each request gets an ID and a list of timed spans (DB queries, image
+compression, storage, Twilio, SMTP), reported as a Server-Timing header, a
+structured log line and, optionally, a JSONL file for offline analysis
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+DEFAULT_TRACING_MAX_SPANS = 200
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+_current_trace = ContextVar('current_trace', default=None)
+_sink_lock = threading.Lock()
+
+
+def tracing_settings():
+    """
+    (enabled, JSONL span file or None, max spans kept per request,
+    Server-Timing sent to every client)
+    """
+    return (
+        getattr(settings, 'TRACING_ENABLED', True),
+        getattr(settings, 'TRACING_SPAN_FILE', None) or None,
+        getattr(settings, 'TRACING_MAX_SPANS', DEFAULT_TRACING_MAX_SPANS),
+        getattr(settings, 'TRACING_SERVER_TIMING', False),
+    )
+
+
+def request_id_from(value) -> str:
+    """
+    The caller's X-Request-ID when it is a safe token, otherwise a new one
+    """
+    if value and _REQUEST_ID.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+class Trace:
+    """
+    Spans of one request
+
+    Totals per span name are always kept; individual spans are kept up to
+    `max_spans` so a request running thousands of queries stays cheap.
+    """
+
+    def __init__(self, request_id, max_spans=DEFAULT_TRACING_MAX_SPANS):
+        self.request_id = request_id
+        self.max_spans = max_spans
+        self.start = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.totals = {}
+
+    def add(self, name, start, duration, attrs=None):
+        count, seconds = self.totals.get(name, (0, 0.0))
+        self.totals[name] = (count + 1, seconds + duration)
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        span_record = {
+            'name': name,
+            'start_ms': round((start - self.start) * 1000, 3),
+            'duration_ms': round(duration * 1000, 3),
+        }
+        if attrs:
+            span_record['attrs'] = attrs
+        self.spans.append(span_record)
+
+    def server_timing(self, total) -> str:
+        """
+        Server-Timing value with one entry per span name plus the total, e.g.
+        db;dur=12.3;desc="14 calls", image_compression;dur=80.1, total;dur=101.4
+        """
+        entries = []
+        for name, (count, seconds) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            entry = f'{name};dur={seconds * 1000:.1f}'
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+    def summary(self):
+        return {
+            name: {'count': count, 'duration_ms': round(seconds * 1000, 3)}
+            for name, (count, seconds) in self.totals.items()
+        }
+
+
+@contextmanager
+def tracing(request_id, max_spans=DEFAULT_TRACING_MAX_SPANS):
+    """
+    Make a new Trace current for the enclosed code
+    """
+    trace = Trace(request_id, max_spans)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_request_id():
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the enclosed code as a span of the current trace
+
+    A no-op outside a traced request, and in worker threads, which do not
+    inherit the request's context. Also usable as a decorator.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        attrs['error'] = True
+        raise
+    finally:
+        trace.add(name, start, time.perf_counter() - start, attrs)
+
+
+def trace_queries(execute, sql, params, many, context):
+    """
+    connection.execute_wrapper callable recording each query as a "db" span
+    """
+    with span('db', sql=sql[:200]):
+        return execute(sql, params, many, context)
+
+
+def write_spans(path, record):
+    """
+    Append one request's record to the JSONL span file
+    """
+    line = json.dumps(record, default=str) + '\n'
+    with _sink_lock, open(path, 'a', encoding='utf-8') as sink:
+        sink.write(line)
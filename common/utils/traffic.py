@@ -0,0 +1,350 @@
+"""
+Traffic capture and replay
+Captured requests keep their shape (route, method, query, body schema and
+sizes, a hash of the user) but no user data; replay turns them back into
+equivalent requests against seeded accounts and times them
+"""
+import hashlib
+import hmac
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+from django.conf import settings
+from django.db.models import Q
+from django.urls import NoReverseMatch, reverse
+from PIL import Image
+
+DEFAULT_TRAFFIC_CAPTURE_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_TRAFFIC_CAPTURE_MAX_FILES = 20
+DEFAULT_TRAFFIC_CAPTURE_MAX_BODY = 1024 * 1024
+TRAFFIC_FILE_PREFIX = 'traffic-'
+TRAFFIC_FILE_SUFFIX = '.jsonl'
+
+# Choice fields whose string values are kept, since they carry no user data and
+# replayed requests must pass validation; other strings keep their length only
+SAFE_FIELDS = {'vehicle_type', 'status', 'source', 'currency', 'user_type'}
+SAFE_QUERY_PARAMS = SAFE_FIELDS | {'page', 'page_size', 'ordering', 'fields', 'format'}
+# Longer digit strings in forms (phone numbers) are treated as text
+MAX_FORM_NUMBER_DIGITS = 6
+
+# URL kwargs and body fields that hold object IDs, by the kind of seeded object they name
+ID_FIELDS = {
+    'cart_id': 'cart',
+    'product_id': 'product',
+    'request': 'request',
+    'request_id': 'request',
+}
+
+# Views whose requests need the captured secrets (passwords, tokens, OTPs) or
+# would lock or delete the replaying account; they are skipped on replay
+UNREPLAYABLE_VIEWS = {
+    'login', 'logout', 'refresh-token', 'verify-otp', 'password-reset-confirm', 'change-password',
+    'delete-account',
+}
+# Password fields of replayed registrations; captured lengths would not pass validation
+REPLAY_PASSWORD = 'Replay-password-1'
+
+# View name -> kind of seeded object whose IDs fill the URL kwargs
+PATH_OBJECTS = {
+    'request:vehicle-part-request-detail': 'request',
+    'request:vehicle-part-request-image-list-create': 'request',
+    'request:vehicle-part-request-image-detail': 'image',
+    'product-detail': 'product',
+    'cart-detail': 'cart',
+    'cart-item-detail': 'cart_item',
+    'order-detail': 'order',
+}
+
+
+def traffic_capture_settings():
+    """
+    (enabled, sample rate, directory, max bytes per file, max files, max JSON body bytes)
+    """
+    return (
+        getattr(settings, 'TRAFFIC_CAPTURE_ENABLED', False),
+        getattr(settings, 'TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0),
+        Path(getattr(settings, 'TRAFFIC_CAPTURE_DIR', Path(settings.BASE_DIR) / 'traffic')),
+        getattr(settings, 'TRAFFIC_CAPTURE_MAX_BYTES', DEFAULT_TRAFFIC_CAPTURE_MAX_BYTES),
+        getattr(settings, 'TRAFFIC_CAPTURE_MAX_FILES', DEFAULT_TRAFFIC_CAPTURE_MAX_FILES),
+        getattr(settings, 'TRAFFIC_CAPTURE_MAX_BODY', DEFAULT_TRAFFIC_CAPTURE_MAX_BODY),
+    )
+
+
+def user_hash(user) -> str:
+    """
+    Stable pseudonym for an account, keyed with SECRET_KEY; 'anonymous' when logged out
+    """
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    digest = hmac.new(settings.SECRET_KEY.encode(), f'common.traffic:{user.pk}'.encode(), hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def value_schema(value, key=None):
+    """
+    Shape of a parsed JSON value: strings keep their length only (unless in
+    SAFE_FIELDS); numbers, booleans and null are kept, since they carry IDs,
+    quantities and flags rather than personal data
+    """
+    if isinstance(value, dict):
+        return {'type': 'object', 'fields': {name: value_schema(item, name) for name, item in value.items()}}
+    if isinstance(value, list):
+        return {'type': 'array', 'len': len(value), 'items': value_schema(value[0], key) if value else None}
+    if isinstance(value, str) and key not in SAFE_FIELDS:
+        return {'type': 'string', 'len': len(value)}
+    return {'type': 'value', 'value': value}
+
+
+def form_schema(key, value):
+    """
+    Shape of a form field, where every value is a string: short digit
+    strings (years, IDs, quantities) are kept as numbers
+    """
+    if value.isdigit() and len(value) <= MAX_FORM_NUMBER_DIGITS:
+        return {'type': 'value', 'value': int(value)}
+    return value_schema(value, key)
+
+
+def query_schema(query_dict):
+    return {
+        key: values if key in SAFE_QUERY_PARAMS else [{'len': len(value)} for value in values]
+        for key, values in query_dict.lists()
+    }
+
+
+class CaptureWriter:
+    """
+    Append records to traffic-<pid>.jsonl in `directory`
+
+    A file over `max_bytes` is renamed with a timestamp and a new one is
+    started; only the newest `max_files` rotated files are kept. One file per
+    worker process keeps gunicorn workers from interleaving writes.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_TRAFFIC_CAPTURE_MAX_BYTES,
+                 max_files=DEFAULT_TRAFFIC_CAPTURE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self.directory / f'{TRAFFIC_FILE_PREFIX}{os.getpid()}{TRAFFIC_FILE_SUFFIX}'
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.path
+            try:
+                if path.stat().st_size + len(line) > self.max_bytes:
+                    self._rotate(path)
+            except FileNotFoundError:
+                pass
+            with open(path, 'a', encoding='utf-8') as capture_file:
+                capture_file.write(line)
+
+    def _rotate(self, path):
+        path.rename(path.with_name(f'{path.stem}-{time.strftime("%Y%m%dT%H%M%S")}{TRAFFIC_FILE_SUFFIX}'))
+        rotated = sorted(
+            self.directory.glob(f'{TRAFFIC_FILE_PREFIX}*-*{TRAFFIC_FILE_SUFFIX}'),
+            key=lambda rotated_path: rotated_path.stat().st_mtime
+        )
+        for old in rotated[:max(len(rotated) - self.max_files, 0)]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                # Another worker pruned it first
+                pass
+
+
+def load_captures(paths):
+    """
+    Records from capture files or directories, oldest first
+    """
+    records = []
+    for path in map(Path, paths):
+        files = sorted(path.glob(f'*{TRAFFIC_FILE_SUFFIX}')) if path.is_dir() else [path]
+        for capture_file in files:
+            with open(capture_file, encoding='utf-8') as lines:
+                records.extend(json.loads(line) for line in lines if line.strip())
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def account_inventory(user):
+    """
+    IDs of the objects `user` can reach, by kind, for filling replayed URLs and bodies
+    """
+    from request.models import VehiclePartRequest, VehiclePartRequestImage
+    from store.models import Cart, CartItem, Order, Product
+
+    return {
+        'request': [{'pk': pk} for pk in VehiclePartRequest.objects.filter(user=user).values_list('pk', flat=True)],
+        'image': [
+            {'pk': request_id, 'image_id': pk}
+            for pk, request_id in VehiclePartRequestImage.objects.filter(
+                request__user=user).values_list('pk', 'request_id')
+        ],
+        'product': [{'pk': pk} for pk in Product.objects.filter(request__user=user).values_list('pk', flat=True)],
+        'cart': [
+            {'pk': pk} for pk in Cart.objects.filter(
+                Q(items__product__request__user=user) | Q(orders__user=user)).distinct().values_list('pk', flat=True)
+        ],
+        'cart_item': [
+            {'pk': pk} for pk in CartItem.objects.filter(product__request__user=user).values_list('pk', flat=True)
+        ],
+        'order': [{'pk': pk} for pk in Order.objects.filter(user=user).values_list('pk', flat=True)],
+    }
+
+
+def _pick(inventory, kind):
+    objects = inventory.get(kind) or []
+    return random.choice(objects) if objects else None
+
+
+def synthesize(schema, inventory, key=None):
+    """
+    A value with the captured shape; ID fields point at the account's own objects
+    """
+    if schema is None:
+        return None
+    if key in ID_FIELDS and schema['type'] == 'value' and isinstance(schema['value'], int):
+        picked = _pick(inventory, ID_FIELDS[key])
+        return picked['pk'] if picked else schema['value']
+    if schema['type'] == 'object':
+        return {name: synthesize(field, inventory, name) for name, field in schema['fields'].items()}
+    if schema['type'] == 'array':
+        return [synthesize(schema['items'], inventory, key) for _ in range(schema['len'])]
+    if schema['type'] == 'string':
+        key = key or ''
+        if key == 'email':
+            return f'replay-{random.randrange(10**9)}@example.com'
+        if key == 'phone':
+            return f'07{random.randrange(9)}{random.randrange(10**7):07d}'
+        if 'password' in key:
+            return REPLAY_PASSWORD
+        return 'x' * schema['len']
+    return schema['value']
+
+
+def synthetic_file(size, content_type):
+    """
+    (bytes, content type) of about `size` bytes; images are real noise PNGs so
+    compression does the same work
+    """
+    if content_type.startswith('image/'):
+        side = max(int((size / 3) ** 0.5), 1)
+        image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue(), 'image/png'
+    return os.urandom(size), content_type
+
+
+def replay_request(record, inventory):
+    """
+    (method, path, JSON body or None, form fields or None, files or None) for a captured record,
+    or None when it cannot be replayed for this account
+    """
+    if record['view'] in UNREPLAYABLE_VIEWS:
+        return None
+    kwargs = {}
+    if record['kwargs']:
+        picked = _pick(inventory, PATH_OBJECTS.get(record['view']))
+        if picked is None or set(record['kwargs']) - set(picked):
+            return None
+        kwargs = {name: picked[name] for name in record['kwargs']}
+    try:
+        path = reverse(record['view'], kwargs=kwargs)
+    except NoReverseMatch:
+        return None
+
+    query = []
+    for key, values in (record.get('query') or {}).items():
+        for value in values:
+            if isinstance(value, dict):
+                picked = _pick(inventory, ID_FIELDS[key]) if key in ID_FIELDS else None
+                value = picked['pk'] if picked else 'x' * value['len']
+            query.append((key, value))
+    if query:
+        path = f'{path}?{urlencode(query)}'
+
+    body = record.get('body') or {}
+    if 'json' in body:
+        return record['method'], path, synthesize(body['json'], inventory), None, None
+    if 'form' in body or 'files' in body:
+        fields = {name: synthesize(schema, inventory, name) for name, schema in body.get('form', {}).items()}
+        files = []
+        for name, uploads in body.get('files', {}).items():
+            for index, upload in enumerate(uploads):
+                content, content_type = synthetic_file(upload['size'], upload['content_type'])
+                extension = 'png' if content_type == 'image/png' else 'bin'
+                files.append((name, (f'{name}-{index}.{extension}', content, content_type)))
+        return record['method'], path, None, fields, files
+    return record['method'], path, None, None, None
+
+
+def replay(records, send, accounts, speed=1.0, concurrency=16):
+    """
+    Re-issue `records` through `send(account, request)` with their original
+    spacing divided by `speed` (0 sends as fast as the workers allow)
+
+    Each captured user hash is mapped to one of `accounts` round-robin;
+    anonymous traffic stays anonymous. Returns (sent, skipped, max lag in seconds).
+    """
+    assigned = {}
+    skipped = 0
+    max_lag = 0.0
+    futures = []
+    start = time.monotonic()
+    first = records[0]['ts'] if records else 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='replay') as executor:
+        for record in records:
+            user = record.get('user', 'anonymous')
+            account = None
+            if user != 'anonymous' and accounts:
+                account = assigned.setdefault(user, accounts[len(assigned) % len(accounts)])
+            request = replay_request(record, account['inventory'] if account else {})
+            if request is None:
+                skipped += 1
+                continue
+            if speed:
+                delay = (record['ts'] - first) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            futures.append(executor.submit(send, record, account, request))
+    for future in futures:
+        future.result()
+    return len(futures), skipped, max_lag
+
+
+def compare_reports(base, candidate):
+    """
+    Per-endpoint latency changes between two replay reports, plus an
+    'overall' row: {name: {metric: (base, candidate, change in percent)}}
+    """
+    def row(base_summary, candidate_summary):
+        changes = {}
+        for metric in ('count', 'p50_ms', 'p95_ms', 'p99_ms'):
+            before, after = base_summary.get(metric), candidate_summary.get(metric)
+            change = round((after - before) / before * 100, 1) if before and after is not None else None
+            changes[metric] = (before, after, change)
+        return changes
+
+    endpoints = sorted(set(base['endpoints']) | set(candidate['endpoints']))
+    comparison = {
+        name: row(base['endpoints'].get(name, {}), candidate['endpoints'].get(name, {}))
+        for name in endpoints
+    }
+    comparison['overall'] = row(base['latency'], candidate['latency'])
+    return comparison
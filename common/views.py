@@ -1,3 +1,78 @@
-from django.shortcuts import render
+import hmac
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from common.serializers import BatchRequestSerializer
+from common.utils import APIResponse
+from common.utils.batch import execute_batch
+from common.utils.conditional_get import conditional_get_stats
+from common.utils.metrics import metrics_settings, registry, render_text
+from common.utils.response_compression import compression_stats
 
-# Create your views here.
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def performance_stats_view(request):
+    """
+    Get in-process performance counters (admin only)
+    Counters are per worker process and reset on restart
+    """
+    stats = {
+        'conditional_get': conditional_get_stats(),
+        'compression': compression_stats(),
+    }
+
+    return APIResponse.success(
+        data=stats,
+        message='Performance statistics retrieved successfully'
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_view(request):
+    """
+    Run several API requests in one round trip
+
+    Each item is dispatched in-process as the authenticated user and gets
+    its own status and body. "concurrent" runs consecutive GETs in parallel;
+    "atomic" runs everything in one transaction, rolled back on any error.
+    """
+    serializer = BatchRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    results, rolled_back = execute_batch(
+        request,
+        serializer.validated_data['requests'],
+        atomic=serializer.validated_data['atomic'],
+        concurrent=serializer.validated_data['concurrent']
+    )
+
+    return APIResponse.success(
+        data=results,
+        message='Batch rolled back' if rolled_back else 'Batch executed successfully',
+        meta={'rolled_back': rolled_back}
+    )
+
+
+def metrics_view(request):
+    """
+    Metrics of every worker in Prometheus text format
+
+    Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+    the endpoint does not exist while METRICS_TOKEN is unset.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        response = HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+
+    _, directory, _ = metrics_settings()
+    return HttpResponse(
+        render_text(registry.collect(directory)),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -3,7 +3,7 @@ from django.contrib import messages
 from django.shortcuts import render, redirect
 from django import forms
 from django.conf import settings
-from .models import VehiclePartRequest
+from .models import VehiclePartRequest, VehiclePartRequestImage
 from store.models import Shop, RequestHasShop
 from store.whatsapp_service import whatsapp_service
 
@@ -50,6 +50,16 @@ class AssignShopsForm(forms.Form):
             # Still show the checkbox but it won't do anything if not configured
 
 
+class VehiclePartRequestImageInline(admin.TabularInline):
+    """
+    Inline admin for gallery images within VehiclePartRequest admin
+    """
+    model = VehiclePartRequestImage
+    extra = 0
+    readonly_fields = ['created_at']
+    fields = ['image', 'position', 'created_at']
+
+
 @admin.register(VehiclePartRequest)
 class VehiclePartRequestAdmin(admin.ModelAdmin):
     """
@@ -68,7 +78,10 @@ class VehiclePartRequestAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
+    # Skip the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
     actions = ['assign_shops_action']
+    inlines = [VehiclePartRequestImageInline]
     
     fieldsets = (
         ('Vehicle Information', {
@@ -222,7 +235,7 @@ class VehiclePartRequestAdmin(admin.ModelAdmin):
             # Update request status to 'in_progress' if WhatsApp messages were sent successfully
             if send_whatsapp and request_whatsapp_sent and req.status == 'pending':
                 req.status = 'in_progress'
-                req.save(update_fields=['status'])
+                req.save(update_fields=['status', 'updated_at'])
         
         if success_count > 0:
             messages.success(
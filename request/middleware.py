@@ -14,6 +14,8 @@ from .utils.compression_utils import (
 
 logger = logging.getLogger(__name__)
 
+GALLERY_FIELD_NAME = 'images'
+
 
 class FileCompressionMiddleware:
     """
@@ -41,8 +43,12 @@ class FileCompressionMiddleware:
                 if not isinstance(uploaded_file, UploadedFile):
                     continue
                 
+                # Gallery uploads carry several files under one field name
+                if field_name == GALLERY_FIELD_NAME:
+                    self._compress_gallery_images(request, field_name)
+                
                 # Determine compression type based on field name
-                if 'vehicle_image' in field_name.lower():
+                elif 'vehicle_image' in field_name.lower():
                     compressed_file = self._compress_vehicle_image(uploaded_file)
                     if compressed_file:
                         request.FILES[field_name] = compressed_file
@@ -75,6 +81,35 @@ class FileCompressionMiddleware:
         
         return request
     
+    def _compress_gallery_images(self, request, field_name):
+        """Compress all gallery images of a field in one batch"""
+        try:
+            uploaded_files = request.FILES.getlist(field_name)
+            valid_indexes = []
+            for index, uploaded_file in enumerate(uploaded_files):
+                is_valid, error_msg = FileSizeValidator.validate_image_file(uploaded_file)
+                if is_valid:
+                    valid_indexes.append(index)
+                else:
+                    logger.warning(f"Gallery image validation failed: {error_msg}")
+            
+            compressed_files, stats = ImageCompressor.compress_images(
+                [uploaded_files[index] for index in valid_indexes],
+                image_type='part',
+                max_size_mb=1.5
+            )
+            for index, compressed_file in zip(valid_indexes, compressed_files):
+                uploaded_files[index] = compressed_file
+            request.FILES.setlist(field_name, uploaded_files)
+            
+            request_stats = getattr(request, '_compression_stats', {})
+            request_stats['images'] = request_stats.get('images', 0) + stats['images']
+            request_stats['bytes_saved'] = request_stats.get('bytes_saved', 0) + stats['bytes_saved']
+            request._compression_stats = request_stats
+            
+        except Exception as e:
+            logger.error(f"Gallery image compression failed: {str(e)}")
+    
     def _compress_vehicle_image(self, uploaded_file):
         """Compress vehicle image with specific settings"""
         try:
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-19 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0002_alter_vehiclepartrequest_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiclePartRequestImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(help_text='Gallery image of the vehicle or part', upload_to='request_images/')),
+                ('position', models.PositiveIntegerField(default=0, help_text='Display order of the image within the gallery')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('request', models.ForeignKey(help_text='The vehicle part request this image belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='images', to='request.vehiclepartrequest')),
+            ],
+            options={
+                'verbose_name': 'Vehicle Part Request Image',
+                'verbose_name_plural': 'Vehicle Part Request Images',
+                'db_table': 'vehicle_part_request_images',
+                'ordering': ['position', 'id'],
+                'indexes': [models.Index(fields=['request', 'position'], name='vehicle_par_request_365f8a_idx')],
+            },
+        ),
+    ]
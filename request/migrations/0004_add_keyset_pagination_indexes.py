@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0003_vehiclepartrequestimage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclepartrequest',
+            index=models.Index(fields=['created_at', 'id'], name='vehicle_par_created_914242_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclepartrequest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='vehicle_par_user_id_bd00aa_idx'),
+        ),
+    ]
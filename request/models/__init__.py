@@ -1 +1,2 @@
-from .vehicle_part_request_model import VehiclePartRequest
\ No newline at end of file
+from .vehicle_part_request_model import VehiclePartRequest
+from .vehicle_part_request_image_model import VehiclePartRequestImage
@@ -0,0 +1,70 @@
+from django.db import models
+from django.db.models import Max
+from django.core.files.uploadedfile import UploadedFile
+from ..utils import compress_gallery_images
+
+
+class VehiclePartRequestImage(models.Model):
+    """
+    Model for additional gallery images attached to a vehicle part request
+    """
+    MAX_IMAGES_PER_REQUEST = 10
+
+    request = models.ForeignKey(
+        'request.VehiclePartRequest',
+        on_delete=models.CASCADE,
+        related_name='images',
+        help_text="The vehicle part request this image belongs to"
+    )
+    image = models.ImageField(
+        upload_to='request_images/',
+        help_text="Gallery image of the vehicle or part"
+    )
+    position = models.PositiveIntegerField(
+        default=0,
+        help_text="Display order of the image within the gallery"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vehicle_part_request_images'
+        ordering = ['position', 'id']
+        verbose_name = 'Vehicle Part Request Image'
+        verbose_name_plural = 'Vehicle Part Request Images'
+        indexes = [
+            models.Index(fields=['request', 'position']),
+        ]
+
+    def __str__(self):
+        return f"Image {self.position} - {self.request}"
+
+    @classmethod
+    def add_images(cls, vehicle_part_request, image_files):
+        """
+        Append a batch of images to a request's gallery
+
+        Files that were not already compressed by FileCompressionMiddleware
+        are compressed together in one batch, then all rows are inserted
+        with a single bulk_create.
+        """
+        image_files = list(image_files)
+        pending_indexes = [
+            index for index, image_file in enumerate(image_files)
+            if isinstance(image_file, UploadedFile)
+        ]
+        if pending_indexes:
+            compressed_files, _ = compress_gallery_images(
+                [image_files[index] for index in pending_indexes])
+            for index, compressed_file in zip(pending_indexes, compressed_files):
+                image_files[index] = compressed_file
+
+        last_position = cls.objects.filter(
+            request=vehicle_part_request
+        ).aggregate(last=Max('position'))['last']
+        start = 0 if last_position is None else last_position + 1
+
+        return cls.objects.bulk_create([
+            cls(request=vehicle_part_request, image=image_file, position=start + offset)
+            for offset, image_file in enumerate(image_files)
+        ])
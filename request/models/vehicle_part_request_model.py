@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import NotSupportedError, connection, models
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
@@ -108,6 +108,11 @@ class VehiclePartRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Vehicle Part Request'
         verbose_name_plural = 'Vehicle Part Requests'
+        indexes = [
+            # Keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.vehicle_model} ({self.vehicle_year}) - {self.part_name}"
@@ -161,3 +166,48 @@ class VehiclePartRequest(models.Model):
                 self.part_video = compressed_file
         
         super().save(*args, **kwargs)
+
+    @classmethod
+    def bulk_insert(cls, vehicle_part_requests):
+        """
+        Insert requests with bulk_create and set the id of each
+
+        bulk_create skips save(), so media must already be compressed and
+        stored. Backends that can't return ids from a multi-row INSERT
+        (MySQL) have them computed from the id the database reports for the
+        statement, so each batch is inserted with exactly one INSERT. This
+        relies on one statement getting consecutive ids, which InnoDB only
+        guarantees with innodb_autoinc_lock_mode 0 or 1; at 2 (the MySQL 8
+        default) concurrent inserts may interleave with the batch.
+        """
+        if not vehicle_part_requests:
+            return vehicle_part_requests
+        if connection.features.can_return_rows_from_bulk_insert:
+            return cls.objects.bulk_create(vehicle_part_requests)
+
+        fields = [field for field in cls._meta.concrete_fields if not field.primary_key]
+        batch_size = max(connection.ops.bulk_batch_size(fields, vehicle_part_requests), 1)
+        for start in range(0, len(vehicle_part_requests), batch_size):
+            batch = vehicle_part_requests[start:start + batch_size]
+            cls.objects.bulk_create(batch)
+            for vehicle_part_request, pk in zip(batch, _last_insert_ids(len(batch))):
+                vehicle_part_request.pk = pk
+        return vehicle_part_requests
+
+
+def _last_insert_ids(count):
+    """
+    Ids of the `count` rows added by the last INSERT on the default connection
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            # LAST_INSERT_ID() is the id of the statement's first row
+            cursor.execute('SELECT LAST_INSERT_ID(), @@SESSION.auto_increment_increment')
+            first, step = cursor.fetchone()
+            return [first + index * step for index in range(count)]
+        if connection.vendor == 'sqlite':
+            # last_insert_rowid() is the id of the statement's last row
+            cursor.execute('SELECT last_insert_rowid()')
+            last, = cursor.fetchone()
+            return list(range(last - count + 1, last + 1))
+    raise NotSupportedError(f'Reading back bulk inserted ids is not supported on {connection.vendor}')
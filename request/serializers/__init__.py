@@ -1,11 +1,21 @@
+from .vehicle_part_request_image_serializer import (
+    VehiclePartRequestImageSerializer,
+    VehiclePartRequestImageUploadSerializer
+)
 from .vehicle_part_request_serializer import (
     VehiclePartRequestSerializer,
     VehiclePartRequestCreateSerializer,
-    VehiclePartRequestUpdateSerializer
+    VehiclePartRequestUpdateSerializer,
+    VehiclePartRequestBulkCreateSerializer
 )
+from .fast_list import VehiclePartRequestFastList
 
 __all__ = [
     'VehiclePartRequestSerializer',
     'VehiclePartRequestCreateSerializer',
-    'VehiclePartRequestUpdateSerializer'
+    'VehiclePartRequestUpdateSerializer',
+    'VehiclePartRequestBulkCreateSerializer',
+    'VehiclePartRequestImageSerializer',
+    'VehiclePartRequestImageUploadSerializer',
+    'VehiclePartRequestFastList'
 ]
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Fast list formatter for vehicle part request endpoints
+Produces the same output as VehiclePartRequestSerializer from .values() rows
+"""
+from collections import defaultdict
+from common.utils.fast_list import FastList, RowFormatter
+from authentication.serializers import UserSerializer
+from request.models import VehiclePartRequestImage
+from store.models import Product
+from store.serializers.fast_list import build_product_formatter
+from .vehicle_part_request_serializer import VehiclePartRequestSerializer
+from .vehicle_part_request_image_serializer import VehiclePartRequestImageSerializer
+
+
+class VehiclePartRequestFastList(FastList):
+    """
+    Fast list formatter for VehiclePartRequestListCreateView
+
+    Products and gallery images for the whole page are loaded with one query
+    each and grouped in Python.
+    """
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.gallery_limit = context.get('gallery_limit')
+        self.product_formatter = build_product_formatter(
+            context, extra_columns=['request_id'])
+        self.image_formatter = RowFormatter(
+            VehiclePartRequestImageSerializer, context, extra_columns=['request_id'])
+        self.user_formatter = RowFormatter(
+            UserSerializer, context, prefix='user__',
+            nested={'full_name': lambda row: f"{row['user__first_name']} {row['user__last_name']}".strip()}
+        )
+        self.request_formatter = RowFormatter(
+            VehiclePartRequestSerializer, context,
+            nested={
+                'user': self.user_formatter,
+                'products': lambda row: self._products.get(row['id'], []),
+                'images': lambda row: self._images.get(row['id'], [])[:self.gallery_limit],
+                'image_count': lambda row: len(self._images.get(row['id'], [])),
+            }
+        )
+        self._products = {}
+        self._images = {}
+
+    @property
+    def columns(self):
+        return self.request_formatter.columns
+
+    def format(self, rows):
+        rows = list(rows)
+        request_ids = [row['id'] for row in rows]
+
+        products = defaultdict(list)
+        product_rows = Product.objects.filter(
+            request_id__in=request_ids).values(*self.product_formatter.columns)
+        for row in product_rows:
+            products[row['request_id']].append(self.product_formatter(row))
+        self._products = products
+
+        images = defaultdict(list)
+        image_rows = VehiclePartRequestImage.objects.filter(
+            request_id__in=request_ids).values(*self.image_formatter.columns)
+        for row in image_rows:
+            images[row['request_id']].append(self.image_formatter(row))
+        self._images = images
+
+        return [self.request_formatter(row) for row in rows]
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+from request.models import VehiclePartRequestImage
+from common.utils import CachedFieldsMixin
+
+
+class VehiclePartRequestImageSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for VehiclePartRequestImage model
+    """
+    class Meta:
+        model = VehiclePartRequestImage
+        fields = [
+            'id',
+            'image',
+            'position',
+            'created_at'
+        ]
+        read_only_fields = ['id', 'image', 'position', 'created_at']
+
+
+class VehiclePartRequestImageUploadSerializer(serializers.Serializer):
+    """
+    Serializer for appending images to a vehicle part request gallery
+    """
+    images = serializers.ListField(
+        child=serializers.ImageField(),
+        allow_empty=False,
+        max_length=VehiclePartRequestImage.MAX_IMAGES_PER_REQUEST
+    )
+
+    def validate_images(self, value):
+        """
+        Validate the gallery does not grow past the per-request limit
+        """
+        vehicle_part_request = self.context['vehicle_part_request']
+        existing = vehicle_part_request.images.count()
+        limit = VehiclePartRequestImage.MAX_IMAGES_PER_REQUEST
+        if existing + len(value) > limit:
+            raise serializers.ValidationError(
+                f"A request can have at most {limit} gallery images ({existing} already attached)."
+            )
+        return value
+
+    def create(self, validated_data):
+        """
+        Add the uploaded images to the request gallery
+        """
+        return VehiclePartRequestImage.add_images(
+            self.context['vehicle_part_request'],
+            validated_data['images']
+        )
@@ -1,15 +1,29 @@
+import json
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from rest_framework import serializers
-from request.models import VehiclePartRequest
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from request.utils import compress_vehicle_image, FileSizeValidator
 from authentication.serializers import UserSerializer
 from store.serializers import ProductSerializer
+from common.utils import CachedFieldsMixin
+from .vehicle_part_request_image_serializer import VehiclePartRequestImageSerializer
 
 
-class VehiclePartRequestSerializer(serializers.ModelSerializer):
+class VehiclePartRequestSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for VehiclePartRequest model
     """
     user = UserSerializer(read_only=True)
     products = ProductSerializer(many=True, read_only=True)
+    images = serializers.SerializerMethodField()
+    image_count = serializers.SerializerMethodField()
+    expandable_fields = {
+        'user': UserSerializer,
+        'products': ProductSerializer,
+        'images': VehiclePartRequestImageSerializer,
+    }
+    field_dependencies = {'image_count': 'images'}
 
     class Meta:
         model = VehiclePartRequest
@@ -27,16 +41,44 @@ class VehiclePartRequestSerializer(serializers.ModelSerializer):
             'status',
             'user',
             'products',
+            'images',
+            'image_count',
             'created_at',
             'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
+    def get_images(self, obj):
+        """
+        Return the gallery images for this request
+        List endpoints pass a 'gallery_limit' in the context to cap the
+        payload to the first few images; use prefetch_related('images')
+        so all galleries on a page are loaded in one query
+        """
+        images = list(obj.images.all())
+        limit = self.context.get('gallery_limit')
+        if limit is not None:
+            images = images[:limit]
+        return self.nested_representation('images', images, many=True)
+
+    def get_image_count(self, obj):
+        """
+        Return the total number of gallery images (from the prefetch cache)
+        """
+        return len(obj.images.all())
+
 
 class VehiclePartRequestCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating vehicle part requests (without user field)
     """
+    images = serializers.ListField(
+        child=serializers.ImageField(),
+        write_only=True,
+        required=False,
+        max_length=VehiclePartRequestImage.MAX_IMAGES_PER_REQUEST
+    )
+
     class Meta:
         model = VehiclePartRequest
         fields = [
@@ -48,16 +90,22 @@ class VehiclePartRequestCreateSerializer(serializers.ModelSerializer):
             'vehicle_image',
             'part_image',
             'part_video',
-            'description'
+            'description',
+            'images'
         ]
 
     def create(self, validated_data):
         """
-        Create a new vehicle part request
+        Create a new vehicle part request along with its gallery images
         """
+        images = validated_data.pop('images', [])
         # Set the user from the request context
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        with transaction.atomic():
+            vehicle_part_request = super().create(validated_data)
+            if images:
+                VehiclePartRequestImage.add_images(vehicle_part_request, images)
+        return vehicle_part_request
 
     def validate_vehicle_year(self, value):
         """
@@ -105,3 +153,121 @@ class VehiclePartRequestUpdateSerializer(serializers.ModelSerializer):
                 f"Vehicle year must be between 1900 and {current_year + 1}"
             )
         return value
+
+
+class VehiclePartRequestBulkItemSerializer(VehiclePartRequestCreateSerializer):
+    """
+    One request of a bulk create (text fields only, the vehicle image is shared)
+    """
+    class Meta(VehiclePartRequestCreateSerializer.Meta):
+        fields = [
+            'vehicle_type',
+            'vehicle_model',
+            'vehicle_year',
+            'part_name',
+            'part_number',
+            'description'
+        ]
+
+
+class VehiclePartRequestBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer for creating many vehicle part requests at once
+
+    Each item is validated on its own. One vehicle image is compressed and
+    stored once, then shared by every created request. With `atomic`, a
+    single invalid item cancels the whole batch; otherwise the valid items
+    are created. save() returns per-item results in request order.
+
+    Multipart uploads send `requests` as a JSON-encoded string.
+    """
+    MAX_REQUESTS = 50
+
+    requests = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_REQUESTS
+    )
+    vehicle_image = serializers.ImageField(required=False, allow_null=True)
+    atomic = serializers.BooleanField(default=False)
+
+    def to_internal_value(self, data):
+        requests = data.get('requests')
+        if isinstance(requests, str):
+            try:
+                requests = json.loads(requests)
+            except ValueError:
+                raise serializers.ValidationError({'requests': ['Must be a JSON list of requests.']})
+            data = {
+                'requests': requests,
+                'vehicle_image': data.get('vehicle_image'),
+                'atomic': data.get('atomic', False),
+            }
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        """
+        Validate every item with one item serializer; invalid items are kept
+        in attrs['errors'] (index -> errors) instead of failing the batch
+        """
+        item_serializer = VehiclePartRequestBulkItemSerializer(context=self.context)
+        attrs['items'], attrs['errors'] = {}, {}
+        for index, item in enumerate(attrs['requests']):
+            try:
+                attrs['items'][index] = item_serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                attrs['errors'][index] = exc.detail
+
+        vehicle_image = attrs.get('vehicle_image')
+        if isinstance(vehicle_image, UploadedFile):
+            is_valid, error_msg = FileSizeValidator.validate_image_file(vehicle_image)
+            if not is_valid:
+                raise serializers.ValidationError({'vehicle_image': [error_msg]})
+        return attrs
+
+    @property
+    def failed(self) -> bool:
+        """
+        Whether nothing may be created (atomic batch with an invalid item)
+        """
+        return bool(self.validated_data['errors']) and self.validated_data['atomic']
+
+    def _store_vehicle_image(self, vehicle_image):
+        """
+        Compress (unless the upload middleware already did) and store the shared image once
+        """
+        if isinstance(vehicle_image, UploadedFile):
+            vehicle_image = compress_vehicle_image(vehicle_image)
+        field = VehiclePartRequest._meta.get_field('vehicle_image')
+        name = field.generate_filename(None, vehicle_image.name)
+        return field.storage.save(name, vehicle_image, max_length=field.max_length)
+
+    def create(self, validated_data):
+        items, errors = validated_data['items'], validated_data['errors']
+        created = {}
+        if items and not self.failed:
+            user = self.context['request'].user
+            vehicle_image = validated_data.get('vehicle_image')
+            image_name = self._store_vehicle_image(vehicle_image) if vehicle_image else None
+            instances = {
+                index: VehiclePartRequest(user=user, vehicle_image=image_name, **item)
+                for index, item in items.items()
+            }
+            try:
+                with transaction.atomic():
+                    VehiclePartRequest.bulk_insert(list(instances.values()))
+            except Exception:
+                if image_name:
+                    VehiclePartRequest._meta.get_field('vehicle_image').storage.delete(image_name)
+                raise
+            created = instances
+
+        results = []
+        for index in range(len(validated_data['requests'])):
+            if index in created:
+                results.append({'index': index, 'status': 'created', 'id': created[index].pk})
+            elif index in errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': errors[index]})
+            else:
+                results.append({'index': index, 'status': 'skipped'})
+        return results
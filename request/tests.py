@@ -1,3 +1,232 @@
-from django.test import TestCase
+import io
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+from authentication.models import User
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from store.models import Product
 
-# Create your tests here.
+
+def upload_image(name='part.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class VehiclePartRequestQueryCountTests(TestCase):
+    """
+    The request list must serialize a page in a constant number of queries
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test',
+            last_name='User', email='0771234567@example.com'
+        )
+        for index in range(5):
+            vehicle_part_request = VehiclePartRequest.objects.create(
+                user=self.user, vehicle_type='car', vehicle_model='Corolla',
+                vehicle_year=2018, part_name=f'Part {index}',
+                description='Front bumper in good condition'
+            )
+            for position in range(2):
+                Product.objects.create(
+                    request=vehicle_part_request, name=f'Product {index}-{position}',
+                    price=Decimal('100.00')
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_vehicle_part_request_list(self):
+        # etag, count, requests (+ user), products, images
+        for page_size in (1, 5):
+            with self.assertNumQueries(5):
+                response = self.client.get(
+                    '/api/v1/requests/vehicle-part-requests/', {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+
+    def test_vehicle_part_request_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/v1/requests/vehicle-part-requests/', {'fields': 'id,part_name,products.price'})
+        self.assertEqual(response.status_code, 200)
+        vehicle_part_request = response.data['data'][0]
+        self.assertEqual(list(vehicle_part_request), ['id', 'part_name', 'products'])
+        self.assertEqual(list(vehicle_part_request['products'][0]), ['price'])
+
+        # etag, count, requests, products: no user join, images or descriptions
+        self.assertEqual(len(queries), 4)
+        sql = ' '.join(query['sql'] for query in queries.captured_queries[1:])
+        self.assertNotIn('description', sql)
+        self.assertNotIn('users', sql)
+
+
+class VehiclePartRequestBulkCreateTests(TestCase):
+    """
+    Bulk creation inserts valid items in one statement and reports per item
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test',
+            last_name='User', email='0771234567@example.com'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item(self, part_name, vehicle_year=2019):
+        return {
+            'vehicle_type': 'truck', 'vehicle_model': 'Actros',
+            'vehicle_year': vehicle_year, 'part_name': part_name
+        }
+
+    def without_returning_ids(self):
+        # A property on SQLite's features, so it is patched on the class
+        return mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False)
+
+    def bulk(self, requests, **options):
+        return self.client.post(
+            '/api/v1/requests/vehicle-part-requests/bulk/',
+            {'requests': requests, **options}, format='json'
+        )
+
+    def test_partial_success(self):
+        requests = [self.item(f'Filter {index}') for index in range(3)]
+        requests.append(self.item('Filter', vehicle_year=1800))
+        # begin, insert, commit
+        with self.assertNumQueries(3):
+            response = self.bulk(requests)
+        self.assertEqual(response.status_code, 207)
+        results = response.data['data']
+        self.assertEqual([result['status'] for result in results], ['created'] * 3 + ['invalid'])
+        self.assertIn('vehicle_year', results[3]['errors'])
+        created = VehiclePartRequest.objects.filter(user=self.user).order_by('id')
+        self.assertEqual([result['id'] for result in results[:3]], [request.id for request in created])
+
+    def test_atomic_rejects_batch(self):
+        response = self.bulk([self.item('Filter'), self.item('Filter', vehicle_year=1800)], atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details']['results'][0]['status'], 'skipped')
+        self.assertFalse(VehiclePartRequest.objects.exists())
+
+    def test_invalid_batch_envelope(self):
+        response = self.bulk([self.item('Filter')] * 51)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error_code'], 'VALIDATION_ERROR')
+        self.assertFalse(response.data['success'])
+        self.assertIn('requests', response.data['errors'])
+
+    def test_ids_read_back_without_returning(self):
+        # MySQL cannot return ids from a multi-row INSERT
+        with self.without_returning_ids():
+            response = self.bulk([self.item('Filter'), self.item('Filter'), self.item('Belt')])
+        self.assertEqual(response.status_code, 201)
+        ids = [result['id'] for result in response.data['data']]
+        self.assertEqual(ids, list(VehiclePartRequest.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_ids_read_back_with_identical_concurrent_rows(self):
+        # Another request with the same user and content is inserted between
+        # the start of the batch and its INSERT; ids come from the INSERT itself
+        real_bulk_create = VehiclePartRequest.objects.bulk_create
+        concurrent = []
+
+        def bulk_create_after_concurrent_insert(objs, *args, **kwargs):
+            twin = {field.attname: getattr(objs[0], field.attname)
+                    for field in VehiclePartRequest._meta.concrete_fields if not field.primary_key}
+            concurrent.append(VehiclePartRequest.objects.create(**twin))
+            return real_bulk_create(objs, *args, **kwargs)
+
+        with self.without_returning_ids(), mock.patch.object(
+                VehiclePartRequest.objects, 'bulk_create', bulk_create_after_concurrent_insert):
+            response = self.bulk([self.item('Filter'), self.item('Filter'), self.item('Belt')])
+        self.assertEqual(response.status_code, 201)
+        ids = [result['id'] for result in response.data['data']]
+        self.assertNotIn(concurrent[0].pk, ids)
+        inserted = VehiclePartRequest.objects.exclude(pk=concurrent[0].pk).order_by('id')
+        self.assertEqual(ids, [vehicle_part_request.pk for vehicle_part_request in inserted])
+        self.assertEqual(
+            [VehiclePartRequest.objects.get(pk=pk).part_name for pk in ids], ['Filter', 'Filter', 'Belt'])
+
+
+class VehiclePartRequestGalleryTests(TestCase):
+    """
+    Gallery images are appended in position order, capped per request, and
+    previewed on the list
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone='0771234567', password='password', first_name='Test',
+            last_name='User', email='0771234567@example.com'
+        )
+        self.vehicle_part_request = VehiclePartRequest.objects.create(
+            user=self.user, vehicle_type='car', vehicle_model='Corolla',
+            vehicle_year=2018, part_name='Mirror'
+        )
+        self.url = f'/api/v1/requests/vehicle-part-requests/{self.vehicle_part_request.pk}/images/'
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = Path(directory.name)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, count):
+        return self.client.post(
+            self.url, {'images': [upload_image(f'part-{index}.png') for index in range(count)]},
+            format='multipart'
+        )
+
+    def test_appends_in_position_order(self):
+        self.assertEqual(self.upload(2).status_code, 201)
+        response = self.upload(3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([image['position'] for image in response.data['data']], [2, 3, 4])
+
+        # Listed by position, whatever the insertion order
+        VehiclePartRequestImage.objects.filter(position=0).update(position=9)
+        images = self.client.get(self.url).data['data']
+        self.assertEqual([image['position'] for image in images], [1, 2, 3, 4, 9])
+
+    def test_upload_limit(self):
+        limit = VehiclePartRequestImage.MAX_IMAGES_PER_REQUEST
+        self.assertEqual(self.upload(limit - 1).status_code, 201)
+        response = self.upload(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('at most 10 gallery images (9 already attached)', response.data['message'])
+        self.assertEqual(self.upload(1).status_code, 201)
+        self.assertEqual(self.vehicle_part_request.images.count(), limit)
+        self.assertEqual(self.upload(1).status_code, 400)
+
+    def test_delete_removes_file(self):
+        image = self.upload(1).data['data'][0]
+        stored = VehiclePartRequestImage.objects.get(pk=image['id']).image
+        path = Path(stored.path)
+        self.assertTrue(path.exists())
+
+        response = self.client.delete(f"{self.url}{image['id']}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(path.exists())
+        self.assertFalse(VehiclePartRequestImage.objects.filter(pk=image['id']).exists())
+        self.assertEqual(self.client.delete(f"{self.url}{image['id']}/").status_code, 404)
+
+    def test_list_embeds_gallery_preview(self):
+        self.upload(5)
+        for fast_list in (False, True):
+            with self.subTest(fast_list=fast_list), override_settings(FAST_LIST_ENABLED=fast_list):
+                response = self.client.get('/api/v1/requests/vehicle-part-requests/')
+                row, = response.data['data']
+                self.assertEqual([image['position'] for image in row['images']], [0, 1, 2])
+                self.assertEqual(row['image_count'], 5)
+
+                detail = self.client.get(f'/api/v1/requests/vehicle-part-requests/{self.vehicle_part_request.pk}/')
+                self.assertEqual(len(detail.data['data']['images']), 5)
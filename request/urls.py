@@ -1,5 +1,13 @@
 from django.urls import path
-from request.views import VehiclePartRequestListCreateView, VehiclePartRequestDetailView,   vehicle_part_request_stats_view
+from request.views import (
+    VehiclePartRequestListCreateView,
+    VehiclePartRequestDetailView,
+    VehiclePartRequestBulkCreateView,
+    VehiclePartRequestExportView,
+    vehicle_part_request_stats_view,
+    VehiclePartRequestImageListCreateView,
+    VehiclePartRequestImageDetailView
+)
 
 app_name = 'request'
 
@@ -11,6 +19,18 @@ urlpatterns = [
     path('vehicle-part-requests/<int:pk>/',
          VehiclePartRequestDetailView.as_view(),
          name='vehicle-part-request-detail'),
+    path('vehicle-part-requests/<int:pk>/images/',
+         VehiclePartRequestImageListCreateView.as_view(),
+         name='vehicle-part-request-image-list-create'),
+    path('vehicle-part-requests/<int:pk>/images/<int:image_id>/',
+         VehiclePartRequestImageDetailView.as_view(),
+         name='vehicle-part-request-image-detail'),
+    path('vehicle-part-requests/bulk/',
+         VehiclePartRequestBulkCreateView.as_view(),
+         name='vehicle-part-request-bulk-create'),
+    path('vehicle-part-requests/export/',
+         VehiclePartRequestExportView.as_view(),
+         name='vehicle-part-request-export'),
     path('vehicle-part-requests/stats/',
          vehicle_part_request_stats_view,
          name='vehicle-part-request-stats'),
@@ -2,6 +2,7 @@
 from .compression_utils import (
     compress_vehicle_image,
     compress_part_image,
+    compress_gallery_images,
     compress_part_video,
     FileSizeValidator
 )
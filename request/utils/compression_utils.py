@@ -7,13 +7,34 @@ Simplified version without OpenCV dependencies for Docker compatibility
 import os
 import io
 import logging
-from typing import Tuple, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
 from PIL import Image, ImageOps
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import UploadedFile
+from common.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for batched image compression (Pillow releases the GIL while encoding)
+COMPRESSION_WORKERS = 4
+_compression_executor = None
+_compression_executor_lock = threading.Lock()
+
+
+def get_compression_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool used for batched compression"""
+    global _compression_executor
+    if _compression_executor is None:
+        with _compression_executor_lock:
+            if _compression_executor is None:
+                _compression_executor = ThreadPoolExecutor(
+                    max_workers=COMPRESSION_WORKERS,
+                    thread_name_prefix='image-compression'
+                )
+    return _compression_executor
+
 
 class ImageCompressor:
     """
@@ -77,6 +98,7 @@ class ImageCompressor:
             return image_data  # Return original if compression fails
 
     @staticmethod
+    @span('image_compression')
     def compress_image(
         image_file: UploadedFile, 
         image_type: str = 'vehicle',
@@ -146,6 +168,42 @@ class ImageCompressor:
             # Return original file if compression fails
             return image_file
     
+    @staticmethod
+    @span('image_compression_batch')
+    def compress_images(
+        image_files: List[UploadedFile],
+        image_type: str = 'part',
+        max_size_mb: float = 2.0
+    ) -> Tuple[List[ContentFile], Dict[str, int]]:
+        """
+        Compress a batch of image files on the shared compression pool
+        
+        Args:
+            image_files: The uploaded image files
+            image_type: 'vehicle' or 'part' (affects quality settings)
+            max_size_mb: Maximum file size in MB per image
+            
+        Returns:
+            Tuple of (compressed files in input order, compression stats)
+        """
+        if not image_files:
+            return [], {'images': 0, 'bytes_saved': 0}
+        
+        executor = get_compression_executor()
+        compressed_files = list(executor.map(
+            lambda image_file: ImageCompressor.compress_image(image_file, image_type, max_size_mb),
+            image_files
+        ))
+        
+        stats = {'images': 0, 'bytes_saved': 0}
+        for original, compressed in zip(image_files, compressed_files):
+            if compressed is not original:
+                stats['images'] += 1
+                stats['bytes_saved'] += max(0, original.size - compressed.size)
+        
+        logger.info(f"Batch compressed {stats['images']}/{len(image_files)} images, saved {stats['bytes_saved']} bytes")
+        return compressed_files, stats
+    
     @staticmethod
     def _resize_image(image: Image.Image) -> Image.Image:
         """Resize image if it's too large"""
@@ -299,6 +357,11 @@ def compress_part_image(image_file: UploadedFile) -> ContentFile:
     return ImageCompressor.compress_image(image_file, 'part', max_size_mb=1.5)
 
 
+def compress_gallery_images(image_files: List[UploadedFile]) -> Tuple[List[ContentFile], Dict[str, int]]:
+    """Compress a batch of request gallery images with optimized settings"""
+    return ImageCompressor.compress_images(image_files, 'part', max_size_mb=1.5)
+
+
 def compress_part_video(video_file: UploadedFile) -> ContentFile:
     """Compress part video with optimized settings (placeholder)"""
     return VideoCompressor.compress_video(video_file, max_size_mb=10.0)
\ No newline at end of file
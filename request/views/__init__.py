@@ -1,7 +1,12 @@
-from .vehicle_part_request_view import VehiclePartRequestListCreateView, VehiclePartRequestDetailView, vehicle_part_request_stats_view
+from .vehicle_part_request_view import VehiclePartRequestListCreateView, VehiclePartRequestDetailView, VehiclePartRequestBulkCreateView, VehiclePartRequestExportView, vehicle_part_request_stats_view
+from .vehicle_part_request_image_view import VehiclePartRequestImageListCreateView, VehiclePartRequestImageDetailView
 
 __all__ = [
     'VehiclePartRequestListCreateView',
     'VehiclePartRequestDetailView',
-    'vehicle_part_request_stats_view'
-]
\ No newline at end of file
+    'VehiclePartRequestBulkCreateView',
+    'VehiclePartRequestExportView',
+    'vehicle_part_request_stats_view',
+    'VehiclePartRequestImageListCreateView',
+    'VehiclePartRequestImageDetailView'
+]
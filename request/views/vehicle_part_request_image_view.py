@@ -0,0 +1,101 @@
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from request.serializers import (
+    VehiclePartRequestImageSerializer,
+    VehiclePartRequestImageUploadSerializer
+)
+from common.utils import APIResponse
+
+
+class VehiclePartRequestImageListCreateView(generics.ListCreateAPIView):
+    """
+    List the full gallery of a vehicle part request or append images to it
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return VehiclePartRequestImageUploadSerializer
+        return VehiclePartRequestImageSerializer
+
+    def get_vehicle_part_request(self):
+        """
+        Get the parent request, restricted to the authenticated user
+        """
+        return get_object_or_404(
+            VehiclePartRequest, pk=self.kwargs['pk'], user=self.request.user)
+
+    def get_queryset(self):
+        """
+        Return the gallery images of the parent request
+        """
+        return VehiclePartRequestImage.objects.filter(
+            request__pk=self.kwargs['pk'], request__user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.get_vehicle_part_request()
+        except Http404:
+            return APIResponse.not_found(
+                message="Vehicle part request does not exist",
+                error_code="NOT_FOUND"
+            )
+        response = super().list(request, *args, **kwargs)
+        return APIResponse.success(
+            data=response.data,
+            message='Request images retrieved successfully'
+        )
+
+    def create(self, request, *args, **kwargs):
+        try:
+            vehicle_part_request = self.get_vehicle_part_request()
+        except Http404:
+            return APIResponse.not_found(
+                message="Vehicle part request does not exist",
+                error_code="NOT_FOUND"
+            )
+
+        serializer = self.get_serializer(
+            data=request.data,
+            context={'request': request, 'vehicle_part_request': vehicle_part_request}
+        )
+        if not serializer.is_valid():
+            return APIResponse.validation_error(serializer.errors)
+
+        images = serializer.save()
+
+        return APIResponse.success(
+            data=VehiclePartRequestImageSerializer(images, many=True).data,
+            message='Request images added successfully',
+            status_code=status.HTTP_201_CREATED
+        )
+
+
+class VehiclePartRequestImageDetailView(generics.DestroyAPIView):
+    """
+    Delete a single image from a vehicle part request gallery
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_url_kwarg = 'image_id'
+
+    def get_queryset(self):
+        return VehiclePartRequestImage.objects.filter(
+            request__pk=self.kwargs['pk'], request__user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            instance = self.get_object()
+        except Http404:
+            return APIResponse.not_found(
+                message="Request image does not exist",
+                error_code="NOT_FOUND"
+            )
+        instance.image.delete(save=False)
+        instance.delete()
+        return APIResponse.success(
+            message='Request image deleted successfully'
+        )
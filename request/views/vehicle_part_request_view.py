@@ -5,20 +5,40 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import Http404
 from request.models import VehiclePartRequest
+from store.models import Product
 from request.serializers import (
     VehiclePartRequestSerializer,
     VehiclePartRequestCreateSerializer,
-    VehiclePartRequestUpdateSerializer
+    VehiclePartRequestUpdateSerializer,
+    VehiclePartRequestBulkCreateSerializer,
+    VehiclePartRequestFastList
 )
-from common.utils import APIResponse, CustomPageNumberPagination
+from common.utils import (
+    APIResponse, CustomPageNumberPagination, FastListMixin, FieldSelectionMixin, ConditionalGetMixin,
+    queryset_batches, attach_related, export_response
+)
+
+# Number of gallery images included per request on list endpoints
+GALLERY_PREVIEW_LIMIT = 3
+
+EXPORT_CHUNK_SIZE = 500
+REQUEST_EXPORT_FIELDS = [
+    'id', 'user_id', 'vehicle_type', 'vehicle_model', 'vehicle_year', 'part_name',
+    'part_number', 'description', 'status', 'created_at', 'updated_at'
+]
+PRODUCT_EXPORT_FIELDS = [
+    'id', 'name', 'description', 'price', 'image', 'created_at'
+]
 
 
-class VehiclePartRequestListCreateView(generics.ListCreateAPIView):
+class VehiclePartRequestListCreateView(ConditionalGetMixin, FastListMixin, FieldSelectionMixin, generics.ListCreateAPIView):
     """
     List all vehicle part requests or create a new one
     """
     permission_classes = [IsAuthenticated]
+    etag_dependencies = ('user', 'products', 'images')
     pagination_class = CustomPageNumberPagination
+    fast_list_class = VehiclePartRequestFastList
     filter_backends = [DjangoFilterBackend,
                        filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['vehicle_type', 'status', 'vehicle_year']
@@ -36,7 +56,18 @@ class VehiclePartRequestListCreateView(generics.ListCreateAPIView):
         """
         Return requests for the authenticated user
         """
-        return VehiclePartRequest.objects.filter(user=self.request.user)
+        return VehiclePartRequestSerializer.setup_queryset(
+            VehiclePartRequest.objects.filter(user=self.request.user),
+            self.get_field_selection()
+        )
+
+    def get_serializer_context(self):
+        """
+        Cap gallery payloads to a thumbnail subset on the list endpoint
+        """
+        context = super().get_serializer_context()
+        context['gallery_limit'] = GALLERY_PREVIEW_LIMIT
+        return context
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
@@ -57,11 +88,12 @@ class VehiclePartRequestListCreateView(generics.ListCreateAPIView):
         )
 
 
-class VehiclePartRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
+class VehiclePartRequestDetailView(ConditionalGetMixin, FieldSelectionMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a vehicle part request
     """
     permission_classes = [IsAuthenticated]
+    etag_dependencies = ('user', 'products', 'images')
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -72,14 +104,10 @@ class VehiclePartRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
         """
         Return requests for the authenticated user
         """
-        queryset = VehiclePartRequest.objects.filter(user=self.request.user)
-        #! Prefetch related products if the Product model exists
-        try:
-            queryset = queryset.prefetch_related('products')
-        except Exception:
-            #! If prefetch fails (e.g., migration not run), continue without it
-            pass
-        return queryset
+        return VehiclePartRequestSerializer.setup_queryset(
+            VehiclePartRequest.objects.filter(user=self.request.user),
+            self.get_field_selection()
+        )
 
     def get_object(self):
         """
@@ -147,6 +175,75 @@ class VehiclePartRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
+class VehiclePartRequestBulkCreateView(generics.GenericAPIView):
+    """
+    Create many vehicle part requests in one call, sharing one vehicle image
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = VehiclePartRequestBulkCreateSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return APIResponse.validation_error(serializer.errors)
+
+        results = serializer.save()
+        created = sum(1 for result in results if result['status'] == 'created')
+        meta = {'created': created, 'failed': len(results) - created}
+        if not created:
+            return APIResponse.error(
+                message='No vehicle part requests were created',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                error_code='BULK_CREATE_FAILED',
+                details={'results': results, **meta}
+            )
+
+        return APIResponse.success(
+            data=results,
+            message=f'{created} of {len(results)} vehicle part requests created',
+            status_code=status.HTTP_201_CREATED if created == len(results) else status.HTTP_207_MULTI_STATUS,
+            meta=meta
+        )
+
+
+class VehiclePartRequestExportView(generics.GenericAPIView):
+    """
+    Stream the full request history with products as NDJSON or CSV
+    Staff export every user's requests (filter with ?user=); others their own
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = {
+        'vehicle_type': ['exact'],
+        'status': ['exact'],
+        'vehicle_year': ['exact'],
+        'user': ['exact'],
+        'created_at': ['gte', 'lte'],
+    }
+    search_fields = ['vehicle_model', 'part_name', 'part_number', 'description']
+
+    def get_queryset(self):
+        queryset = VehiclePartRequest.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in ('ndjson', 'csv'):
+            return APIResponse.validation_error({'output': ['Must be one of: ndjson, csv.']})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        products = Product.objects.values('request_id', *PRODUCT_EXPORT_FIELDS)
+        batches = attach_related(
+            queryset_batches(queryset.values(*REQUEST_EXPORT_FIELDS), chunk_size=EXPORT_CHUNK_SIZE),
+            products, 'request_id', 'products')
+        return export_response(
+            batches, export_format, 'vehicle-part-requests', REQUEST_EXPORT_FIELDS,
+            related_key='products', related_fields=PRODUCT_EXPORT_FIELDS
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def vehicle_part_request_stats_view(request):
@@ -74,6 +74,8 @@ class ProductAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
+    # Skip the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
     
     fieldsets = (
         ('Product Information', {
@@ -121,6 +123,8 @@ class OrderAdmin(admin.ModelAdmin):
         'total_display', 'item_count_display'
     ]
     ordering = ['-created_at']
+    # Skip the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
     inlines = [OrderHasItemsInline]
     date_hierarchy = 'created_at'
     
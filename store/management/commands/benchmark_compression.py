@@ -0,0 +1,89 @@
+"""
+Benchmark for response compression
+Measures CPU time against bytes saved for gzip and brotli on rendered API pages
+"""
+import gzip
+import time
+from django.core.management.base import BaseCommand
+from common.utils import FastJSONRenderer
+from common.utils.response_compression import brotli, brotli_available
+from store.serializers import ProductSerializer, OrderSerializer, CartItemSerializer
+from .benchmark_serializers import build_products, build_orders, build_cart_items
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 11)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark gzip and brotli CPU cost against bytes saved on representative JSON pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1, 20, 100],
+                            help='Page sizes to render (default: 1 20 100)')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per case (best is reported)')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        codecs = [(f'gzip-{level}', self._gzip(level)) for level in GZIP_LEVELS]
+        if brotli_available():
+            codecs += [(f'br-{quality}', self._brotli(quality)) for quality in BROTLI_QUALITIES]
+        else:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip is measured'))
+
+        self.stdout.write(
+            f"{'page':<14} {'codec':<8} {'size KB':>9} {'out KB':>8} {'ratio':>7} "
+            f"{'ms':>8} {'KB saved/ms':>12}"
+        )
+        for rows in options['rows']:
+            for name, body in self._pages(rows):
+                label = f'{name}x{rows}'
+                for codec_name, codec in codecs:
+                    elapsed, compressed = self._time(codec, body, repeat)
+                    saved_kb = (len(body) - len(compressed)) / 1024
+                    self.stdout.write(
+                        f"{label:<14} {codec_name:<8} {len(body) / 1024:>9.1f} "
+                        f"{len(compressed) / 1024:>8.1f} {len(compressed) / len(body):>7.3f} "
+                        f"{elapsed:>8.3f} {saved_kb / elapsed if elapsed else 0:>12.0f}"
+                    )
+
+    @staticmethod
+    def _pages(rows):
+        """
+        Rendered response bodies, in the APIResponse list envelope
+        """
+        renderer = FastJSONRenderer()
+        for name, data in (
+            ('products', ProductSerializer(build_products(rows), many=True).data),
+            ('cart-items', CartItemSerializer(build_cart_items(rows), many=True).data),
+            ('orders', OrderSerializer(build_orders(rows), many=True).data),
+        ):
+            payload = {
+                'success': True,
+                'message': 'Data retrieved successfully',
+                'data': data,
+                'status_code': 200,
+                'meta': {'count': rows, 'next': None, 'previous': None,
+                         'current_page': 1, 'total_pages': 1},
+            }
+            yield name, renderer.render(payload, 'application/json')
+
+    @staticmethod
+    def _gzip(level):
+        return lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+
+    @staticmethod
+    def _brotli(quality):
+        return lambda body: brotli.compress(body, mode=brotli.MODE_TEXT, quality=quality)
+
+    @staticmethod
+    def _time(codec, body, repeat):
+        """
+        Best compression time in milliseconds, and the compressed bytes
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compressed = codec(body)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, compressed
@@ -0,0 +1,63 @@
+"""
+Microbenchmark for the JSON renderers
+Renders large order and product pages with DRF's JSONRenderer and FastJSONRenderer
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from common.utils import FastJSONRenderer
+from common.utils.json_renderer import fast_json_available
+from store.serializers import ProductSerializer, OrderSerializer
+from .benchmark_serializers import build_products, build_orders
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering large product and order pages with the stdlib and orjson renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per rendered page')
+        parser.add_argument('--repeat', type=int, default=10, help='Runs per case (best is reported)')
+
+    def handle(self, *args, **options):
+        if not fast_json_available():
+            raise CommandError('orjson is not installed; FastJSONRenderer would use the stdlib renderer')
+
+        rows = options['rows']
+        repeat = options['repeat']
+        pages = [
+            ('products', ProductSerializer(build_products(rows), many=True).data),
+            ('orders', OrderSerializer(build_orders(rows), many=True).data),
+        ]
+
+        self.stdout.write(f"{'page':<10} {'size KB':>9} {'json ms':>9} {'orjson ms':>10} {'speedup':>8}")
+        for name, data in pages:
+            # Same envelope as APIResponse.success with pagination meta
+            payload = {
+                'success': True,
+                'message': 'Data retrieved successfully',
+                'data': data,
+                'status_code': 200,
+                'meta': {'count': rows, 'next': None, 'previous': None,
+                         'current_page': 1, 'total_pages': 1},
+            }
+            stdlib_ms, body = self._render(JSONRenderer(), payload, repeat)
+            fast_ms, fast_body = self._render(FastJSONRenderer(), payload, repeat)
+            if body != fast_body:
+                raise CommandError(f'Renderers disagree on the {name} page')
+            self.stdout.write(
+                f"{name:<10} {len(body) / 1024:>9.0f} {stdlib_ms:>9.2f} {fast_ms:>10.2f} "
+                f"{stdlib_ms / fast_ms:>7.1f}x"
+            )
+
+    @staticmethod
+    def _render(renderer, payload, repeat):
+        """
+        Best render time in milliseconds, and the rendered bytes
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = renderer.render(payload, 'application/json')
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, body
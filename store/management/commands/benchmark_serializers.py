@@ -0,0 +1,354 @@
+"""
+Microbenchmark for the read serializers
+Measures per-row serialization cost with and without the cached field plans,
+and with --suite the ops/sec and allocations of serializing and rendering
+pages of products, carts, orders and vehicle part requests
+"""
+import json
+import platform
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from authentication.models import User
+from common.utils.serializer_utils import field_plan_cache_disabled
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from request.serializers import VehiclePartRequestSerializer
+from store.models import Product, Cart, CartItem, Address, Order, OrderHasItems
+from store.serializers import ProductSerializer, CartItemSerializer, CartSerializer, OrderSerializer
+
+DEFAULT_PAGE_SIZES = (1, 20, 100)
+# Changes in ops/sec smaller than this (in percent) are reported as noise
+DEFAULT_THRESHOLD = 5.0
+
+
+def build_products(count):
+    """
+    Build unsaved products with their request attached (no database access)
+    """
+    now = timezone.now()
+    products = []
+    for index in range(count):
+        vehicle_part_request = VehiclePartRequest(
+            id=index + 1, vehicle_type='car', vehicle_model='Corolla',
+            vehicle_year=2018, part_name=f'Part {index}', part_number=f'PN-{index}',
+            description='Front bumper in good condition', status='completed',
+            user_id=1, created_at=now, updated_at=now
+        )
+        products.append(Product(
+            id=index + 1, request=vehicle_part_request, name=f'Product {index}',
+            description='Genuine part', price=Decimal('1250.00') + index,
+            created_at=now, updated_at=now
+        ))
+    return products
+
+
+def build_cart_items(count):
+    """
+    Build unsaved cart items, one product each, all in the same cart
+    """
+    now = timezone.now()
+    cart = Cart(id=1, session_id=uuid.uuid4(), created_at=now, updated_at=now)
+    return [
+        CartItem(id=index + 1, cart=cart, product=product, quantity=2,
+                 created_at=now, updated_at=now)
+        for index, product in enumerate(build_products(count))
+    ]
+
+
+def build_orders(count, items_per_order=3):
+    """
+    Build unsaved orders with items, a shipping address and a cart, with the
+    reverse relations pre-filled as if they had been prefetched
+    """
+    now = timezone.now()
+    products = build_products(items_per_order)
+    orders = []
+    for index in range(count):
+        address = Address(
+            id=index + 1, first_name='Test', last_name='User', country='LK',
+            post_code='10100', city='Colombo', address1='1 Main Street',
+            created_at=now, updated_at=now
+        )
+        cart = Cart(id=index + 1, session_id=uuid.uuid4(), total=Decimal('0.00'),
+                    item_count=0, created_at=now, updated_at=now)
+        cart_items = [
+            CartItem(id=position + 1, cart=cart, product=product, quantity=1,
+                     created_at=now, updated_at=now)
+            for position, product in enumerate(products)
+        ]
+        cart._prefetched_objects_cache = {'items': cart_items}
+
+        order = Order(
+            id=index + 1, total=Decimal('3750.00'), currency='LKR',
+            reference_number=f'ORD-BENCH-{index}', source='web', status='pending',
+            user_id=1, shipping_address=address, cart=cart,
+            created_at=now, updated_at=now
+        )
+        order._prefetched_objects_cache = {'items': [
+            OrderHasItems(id=position + 1, order=order, product=product,
+                          price=product.price, currency='LKR', quantity=1,
+                          created_at=now, updated_at=now)
+            for position, product in enumerate(products)
+        ]}
+        orders.append(order)
+    return orders
+
+
+def build_carts(count, items_per_cart=3):
+    """
+    Build unsaved carts with their items pre-filled as if prefetched
+    """
+    now = timezone.now()
+    products = build_products(items_per_cart)
+    carts = []
+    for index in range(count):
+        cart = Cart(id=index + 1, session_id=uuid.uuid4(), total=Decimal('3750.00'),
+                    item_count=items_per_cart, created_at=now, updated_at=now)
+        cart._prefetched_objects_cache = {'items': [
+            CartItem(id=position + 1, cart=cart, product=product, quantity=1,
+                     created_at=now, updated_at=now)
+            for position, product in enumerate(products)
+        ]}
+        carts.append(cart)
+    return carts
+
+
+def build_vehicle_part_requests(count, products_per_request=2, images_per_request=3):
+    """
+    Build unsaved vehicle part requests with their user, and their products
+    and gallery images pre-filled as if prefetched
+    """
+    now = timezone.now()
+    user = User(id=1, phone='+94771234567', email='bench@example.com', first_name='Bench',
+                last_name='User', user_type='user', created_at=now, updated_at=now)
+    vehicle_part_requests = []
+    for index in range(count):
+        vehicle_part_request = VehiclePartRequest(
+            id=index + 1, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+            part_name=f'Part {index}', part_number=f'PN-{index}',
+            description='Front bumper in good condition', status='pending',
+            vehicle_image='vehicle_images/bench.jpg', part_image='part_images/bench.jpg',
+            user=user, created_at=now, updated_at=now
+        )
+        products = build_products(products_per_request)
+        for product in products:
+            product.request = vehicle_part_request
+        vehicle_part_request._prefetched_objects_cache = {
+            'products': products,
+            'images': [
+                VehiclePartRequestImage(id=position + 1, request=vehicle_part_request,
+                                        image=f'request_images/bench-{position}.jpg', position=position,
+                                        created_at=now, updated_at=now)
+                for position in range(images_per_request)
+            ],
+        }
+        vehicle_part_requests.append(vehicle_part_request)
+    return vehicle_part_requests
+
+
+# Suite case -> (serializer, builder of `count` instances)
+SUITE_CASES = {
+    'product': (ProductSerializer, build_products),
+    'cart': (CartSerializer, build_carts),
+    'order': (OrderSerializer, build_orders),
+    'vehicle_part_request': (VehiclePartRequestSerializer, build_vehicle_part_requests),
+}
+
+
+def page_payload(data, rows):
+    """
+    The envelope list views render: APIResponse.success with pagination meta
+    """
+    return {
+        'success': True,
+        'message': 'Data retrieved successfully',
+        'data': data,
+        'status_code': 200,
+        'meta': {'count': rows, 'next': None, 'previous': None, 'current_page': 1, 'total_pages': 1},
+    }
+
+
+def measure(operation, min_time=0.2, repeat=5):
+    """
+    Best ops/sec of `operation` over `repeat` rounds of at least `min_time`
+    seconds each, and its allocations: peak traced bytes while it runs, and
+    blocks and bytes still held by its result
+    """
+    # Warm up (field plan caches, lazy imports), then calibrate the loop
+    # count so a round takes about min_time
+    for _ in range(3):
+        operation()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(int(min_time / elapsed * 1.2), 10))
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = operation()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    held = [stat for stat in after.compare_to(before, 'filename') if stat.size_diff > 0]
+    del result
+    return {
+        'ops_per_sec': round(loops / best, 2),
+        'us_per_op': round(best / loops * 1_000_000, 2),
+        'loops': loops,
+        'peak_alloc_kb': round(peak / 1024, 2),
+        'held_kb': round(sum(stat.size_diff for stat in held) / 1024, 2),
+        'held_blocks': sum(max(stat.count_diff, 0) for stat in held),
+    }
+
+
+def run_suite(page_sizes=DEFAULT_PAGE_SIZES, cases=None, min_time=0.2, repeat=5):
+    """
+    Measure serialize+render of each case at each page size with the
+    configured renderer; returns the JSON-serializable report
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    results = {}
+    for name in cases or SUITE_CASES:
+        serializer_class, build = SUITE_CASES[name]
+        for rows in page_sizes:
+            instances = build(rows)
+
+            def serialize_and_render():
+                data = serializer_class(instances, many=True).data
+                return renderer.render(page_payload(data, rows), 'application/json')
+
+            result = measure(serialize_and_render, min_time, repeat)
+            result['rows'] = rows
+            result['items_per_sec'] = round(result['ops_per_sec'] * rows, 2)
+            result['bytes'] = len(serialize_and_render())
+            results[f'{name}/{rows}'] = result
+    return {
+        'renderer': f'{type(renderer).__module__}.{type(renderer).__name__}',
+        'python': platform.python_version(),
+        'min_time_s': min_time,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_suites(base, candidate, threshold=DEFAULT_THRESHOLD):
+    """
+    Rows of (case, base ops/sec, candidate ops/sec, change %, base peak KB,
+    candidate peak KB, verdict) for the cases both runs measured
+    """
+    rows = []
+    for case, before in base['results'].items():
+        after = candidate['results'].get(case)
+        if after is None:
+            continue
+        change = (after['ops_per_sec'] - before['ops_per_sec']) / before['ops_per_sec'] * 100
+        verdict = 'faster' if change > threshold else 'slower' if change < -threshold else 'same'
+        rows.append((case, before['ops_per_sec'], after['ops_per_sec'], round(change, 1),
+                     before['peak_alloc_kb'], after['peak_alloc_kb'], verdict))
+    return rows
+
+
+def page_sizes(value):
+    return tuple(int(size) for size in value.split(','))
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark per-row serialization cost of products, cart items and orders; with --suite, '
+        'report ops/sec and allocations of serializing and rendering pages as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per serialized page')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case (best is reported)')
+        parser.add_argument('--suite', action='store_true',
+                            help='Run the serialize+render suite and print a JSON report')
+        parser.add_argument('--pages', type=page_sizes, default=DEFAULT_PAGE_SIZES, metavar='SIZES',
+                            help='Suite page sizes, comma separated (default: 1,20,100)')
+        parser.add_argument('--case', action='append', choices=list(SUITE_CASES),
+                            help='Suite case to run (repeatable; default: all)')
+        parser.add_argument('--min-time', type=float, default=0.2,
+                            help='Minimum seconds per suite round (default: 0.2)')
+        parser.add_argument('--output', help='Write the suite report to this file instead of stdout')
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'CANDIDATE'),
+                            help='Compare two suite reports')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Percent change in ops/sec below which a case counts as unchanged (default: 5)')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self._compare(*options['compare'], options['threshold'])
+        if options['suite']:
+            report = run_suite(options['pages'], options['case'], options['min_time'], options['repeat'])
+            output = json.dumps(report, indent=2)
+            if options['output']:
+                with open(options['output'], 'w', encoding='utf-8') as report_file:
+                    report_file.write(output + '\n')
+            else:
+                self.stdout.write(output)
+            return
+
+        rows = options['rows']
+        repeat = options['repeat']
+        cases = [
+            ('products', ProductSerializer, build_products(rows)),
+            ('cart items', CartItemSerializer, build_cart_items(rows)),
+            ('orders', OrderSerializer, build_orders(rows)),
+        ]
+
+        self.stdout.write(f"{'serializer':<12} {'uncached us/row':>16} {'cached us/row':>14} {'speedup':>8}")
+        for name, serializer_class, instances in cases:
+            with field_plan_cache_disabled():
+                uncached = self._per_row(serializer_class, instances, repeat)
+            cached = self._per_row(serializer_class, instances, repeat)
+            self.stdout.write(
+                f"{name:<12} {uncached:>16.1f} {cached:>14.1f} {uncached / cached:>7.1f}x"
+            )
+
+    def _compare(self, base_path, candidate_path, threshold):
+        try:
+            with open(base_path, encoding='utf-8') as base_file, open(candidate_path, encoding='utf-8') as candidate_file:
+                rows = compare_suites(json.load(base_file), json.load(candidate_file), threshold)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Could not compare reports: {e}')
+
+        self.stdout.write(
+            f"{'case':<26} {'base ops/s':>11} {'new ops/s':>11} {'change':>8} {'base KB':>9} {'new KB':>9}"
+        )
+        for case, before, after, change, before_kb, after_kb, verdict in rows:
+            self.stdout.write(
+                f"{case:<26} {before:>11.1f} {after:>11.1f} {change:>+7.1f}% {before_kb:>9.1f} {after_kb:>9.1f}"
+                f"  {verdict}"
+            )
+
+    @staticmethod
+    def _per_row(serializer_class, instances, repeat):
+        """
+        Best per-row time in microseconds for serializing `instances` as one page
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serializer_class(instances, many=True).data
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(instances) * 1_000_000
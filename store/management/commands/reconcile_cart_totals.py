@@ -0,0 +1,44 @@
+"""
+Reconcile the denormalized cart totals with the cart items
+"""
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from store.models import Cart
+
+CENTS = Decimal('0.01')
+
+
+class Command(BaseCommand):
+    help = 'Recompute Cart.total and Cart.item_count for carts whose stored values drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted carts without fixing them',
+        )
+
+    def handle(self, *args, **options):
+        drifted = Cart.with_computed_totals().filter(
+            ~Q(total=F('computed_total')) | ~Q(item_count=F('computed_item_count'))
+        ).values('id', 'total', 'item_count', 'computed_total', 'computed_item_count')
+
+        fixed = 0
+        for row in drifted:
+            self.stdout.write(
+                f"Cart {row['id']}: total {row['total'].quantize(CENTS)} -> {row['computed_total'].quantize(CENTS)}, "
+                f"item_count {row['item_count']} -> {row['computed_item_count']}"
+            )
+            if options['dry_run']:
+                continue
+            with transaction.atomic():
+                cart = Cart.objects.select_for_update().get(pk=row['id'])
+                cart.recalculate_totals()
+            fixed += 1
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} cart(s) drifted (dry run, nothing changed)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} cart(s)"))
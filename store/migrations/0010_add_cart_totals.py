@@ -0,0 +1,45 @@
+# Generated by Django 4.2.25 on 2026-10-19 06:54
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill_cart_totals(apps, schema_editor):
+    """
+    Populate total and item_count for existing carts from their items
+    """
+    Cart = apps.get_model('store', 'Cart')
+    CartItem = apps.get_model('store', 'CartItem')
+
+    rows = CartItem.objects.values('cart_id').annotate(
+        total=Sum(F('product__price') * F('quantity'),
+                  output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        item_count=Sum('quantity')
+    ).order_by()
+    for row in rows.iterator():
+        Cart.objects.filter(pk=row['cart_id']).update(
+            total=row['total'] or Decimal('0.00'),
+            item_count=row['item_count'] or 0
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_add_user_to_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, help_text='Denormalized total quantity of products in the cart'),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Denormalized sum of price * quantity over the cart items', max_digits=12),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import connection, models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
 
 class CartItem(models.Model):
@@ -36,3 +37,48 @@ class CartItem(models.Model):
     def __str__(self):
         return f"CartItem {self.id} - {self.product.name} in Cart {self.cart.session_id}"
 
+    @classmethod
+    def add_quantities(cls, cart_id, quantities):
+        """
+        Add quantities of several products to a cart with one upsert
+        New products are inserted; existing cart items get the quantity added
+
+        Args:
+            cart_id: The cart to add to
+            quantities: Dict of product id -> quantity to add
+        """
+        if not quantities:
+            return
+        opts = cls._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        cart_column = qn(opts.get_field('cart').column)
+        product_column = qn(opts.get_field('product').column)
+        quantity_column, created_column, updated_column = (
+            qn(opts.get_field(name).column) for name in ('quantity', 'created_at', 'updated_at'))
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        params = []
+        for product_id, quantity in quantities.items():
+            params.extend([cart_id, product_id, quantity, now, now])
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(quantities))
+
+        if connection.vendor == 'mysql':
+            conflict = (
+                f'ON DUPLICATE KEY UPDATE {quantity_column} = {quantity_column} + VALUES({quantity_column}), '
+                f'{updated_column} = VALUES({updated_column})'
+            )
+        else:
+            # PostgreSQL / SQLite spelling of the same upsert
+            conflict = (
+                f'ON CONFLICT ({cart_column}, {product_column}) DO UPDATE SET '
+                f'{quantity_column} = {table}.{quantity_column} + excluded.{quantity_column}, '
+                f'{updated_column} = excluded.{updated_column}'
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({cart_column}, {product_column}, {quantity_column}, '
+                f'{created_column}, {updated_column}) VALUES {values} {conflict}',
+                params
+            )
@@ -1,5 +1,9 @@
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Sum, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
 
 
 class Cart(models.Model):
@@ -12,6 +16,16 @@ class Cart(models.Model):
         unique=True,
         help_text="Unique session identifier for the cart"
     )
+    total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Denormalized sum of price * quantity over the cart items"
+    )
+    item_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Denormalized total quantity of products in the cart"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -24,3 +38,82 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart {self.session_id}"
 
+    @classmethod
+    def apply_item_delta(cls, cart_id, total_delta, count_delta):
+        """
+        Atomically adjust the denormalized totals of a cart
+        Uses F-expressions so concurrent cart item changes don't overwrite each other
+        Returns the number of carts updated (0 when the cart doesn't exist)
+        """
+        if not total_delta and not count_delta:
+            return cls.objects.filter(pk=cart_id).count()
+        return cls.objects.filter(pk=cart_id).update(
+            total=F('total') + total_delta,
+            item_count=F('item_count') + count_delta,
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def apply_product_price_change(cls, product_id, old_price, new_price):
+        """
+        Adjust the totals of every cart holding a product after its price changed
+        Each cart moves by (new_price - old_price) * its own quantity, in one UPDATE
+        Product.save() calls it; QuerySet.update(price=...) doesn't
+        """
+        from store.models import CartItem
+
+        price_delta = new_price - old_price
+        if not price_delta:
+            return
+        quantity = Subquery(CartItem.objects.filter(
+            cart=OuterRef('pk'), product_id=product_id
+        ).values('quantity')[:1])
+        cls.objects.filter(items__product_id=product_id).update(
+            total=F('total') + quantity * price_delta,
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def apply_product_removal(cls, product_id, price):
+        """
+        Remove a product's contribution from every cart holding it
+        Used before the product (and its cart items) is deleted
+        """
+        from store.models import CartItem
+
+        quantity = Subquery(CartItem.objects.filter(
+            cart=OuterRef('pk'), product_id=product_id
+        ).values('quantity')[:1])
+        cls.objects.filter(items__product_id=product_id).update(
+            total=F('total') - quantity * price,
+            item_count=F('item_count') - quantity,
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def with_computed_totals(cls):
+        """
+        Annotate carts with totals computed from their items
+        (computed_total, computed_item_count), used to detect drift
+        """
+        return cls.objects.annotate(
+            # Rounded to cents, since SQLite sums decimals as floats
+            computed_total=Round(Coalesce(
+                Sum(F('items__product__price') * F('items__quantity'),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ), 2, output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+            computed_item_count=Coalesce(Sum('items__quantity'), Value(0))
+        )
+
+    def recalculate_totals(self, save=True):
+        """
+        Recompute total and item_count from the cart items
+        """
+        computed = type(self).with_computed_totals().values(
+            'computed_total', 'computed_item_count').get(pk=self.pk)
+        self.total = computed['computed_total']
+        self.item_count = computed['computed_item_count']
+        if save:
+            self.save(update_fields=['total', 'item_count', 'updated_at'])
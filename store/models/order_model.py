@@ -81,6 +81,9 @@ class Order(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['source']),
             models.Index(fields=['user']),
+            # Keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
@@ -42,6 +42,43 @@ class Product(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
+        indexes = [
+            # Keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.request}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Price as loaded (None when deferred), so save() can tell it changed
+        instance._loaded_price = instance.__dict__.get('price')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save the product, moving the totals of carts holding it when its price changed
+
+        A price equal to the loaded one costs no extra query. Otherwise the
+        stored price is re-read under select_for_update() and the carts are
+        adjusted in the same transaction, so concurrent price changes apply
+        their deltas one after the other. QuerySet.update(price=...) skips
+        this: call Cart.apply_product_price_change() for each product, or
+        run `manage.py reconcile_cart_totals` afterwards.
+        """
+        from store.models import Cart
+
+        update_fields = kwargs.get('update_fields')
+        price_saved = update_fields is None or 'price' in update_fields
+        if (self._state.adding or not price_saved
+                or getattr(self, '_loaded_price', None) == self.price):
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                previous_price = type(self).objects.select_for_update().values_list(
+                    'price', flat=True).get(pk=self.pk)
+                super().save(*args, **kwargs)
+                Cart.apply_product_price_change(self.pk, previous_price, self.price)
+        self._loaded_price = self.price
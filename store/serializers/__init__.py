@@ -1,8 +1,9 @@
 from .product_serializer import ProductSerializer
 from .cart_serializer import CartSerializer, CreateCartSerializer
-from .cart_item_serializer import CartItemSerializer, CreateCartItemSerializer
+from .cart_item_serializer import CartItemSerializer, CreateCartItemSerializer, BulkCreateCartItemSerializer
 from .address_serializer import AddressSerializer, CreateAddressSerializer
 from .order_serializer import OrderSerializer, CreateOrderSerializer, OrderItemSerializer
+from .fast_list import ProductFastList, OrderFastList
 
 __all__ = [
     'ProductSerializer',
@@ -10,9 +11,12 @@ __all__ = [
     'CreateCartSerializer',
     'CartItemSerializer',
     'CreateCartItemSerializer',
+    'BulkCreateCartItemSerializer',
     'AddressSerializer',
     'CreateAddressSerializer',
     'OrderSerializer',
     'CreateOrderSerializer',
-    'OrderItemSerializer'
+    'OrderItemSerializer',
+    'ProductFastList',
+    'OrderFastList'
 ]
\ No newline at end of file
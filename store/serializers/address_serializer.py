@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from store.models import Address
+from common.utils import CachedFieldsMixin
 
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Address model
     """
@@ -1,36 +1,40 @@
 from rest_framework import serializers
-from store.models import CartItem, Cart
+from store.models import CartItem, Cart, Product
+from common.utils import CachedFieldsMixin
+from .product_serializer import ProductSerializer
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class MinimalCartSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    """
+    Minimal Cart serializer nested inside cart items
+    Doesn't include items to avoid circular dependency (cart -> items -> cart)
+    """
+    class Meta:
+        model = Cart
+        fields = ['id', 'session_id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'session_id', 'created_at', 'updated_at']
+
+
+class CartItemSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for CartItem model
     """
     product = serializers.SerializerMethodField()
     product_id = serializers.IntegerField(write_only=True, required=False)
     cart = serializers.SerializerMethodField()
+    expandable_fields = {'cart': MinimalCartSerializer, 'product': ProductSerializer}
     
     def get_product(self, obj):
         """
         Return product data
-        Uses lazy import to avoid circular dependency
         """
-        from store.serializers import ProductSerializer
-        return ProductSerializer(obj.product, context=self.context).data
+        return self.nested_representation('product', obj.product)
     
     def get_cart(self, obj):
         """
         Return cart data (minimal to avoid circular dependency)
-        Uses a minimal serializer to avoid circular import
         """
-        # Create a minimal cart serializer inline to avoid circular dependency
-        class MinimalCartSerializer(serializers.ModelSerializer):
-            class Meta:
-                model = Cart
-                fields = ['id', 'session_id', 'created_at', 'updated_at']
-                read_only_fields = ['id', 'session_id', 'created_at', 'updated_at']
-        
-        return MinimalCartSerializer(obj.cart, context=self.context).data
+        return self.nested_representation('cart', obj.cart)
 
     class Meta:
         model = CartItem
@@ -54,6 +58,17 @@ class CartItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Quantity must be at least 1.")
         return value
 
+    def validate_product_id(self, value):
+        """
+        Validate the product exists and is not already in the item's cart
+        """
+        if not Product.objects.filter(pk=value).exists():
+            raise serializers.ValidationError(f"Invalid product ID: {value}")
+        if self.instance is not None and value != self.instance.product_id and CartItem.objects.filter(
+                cart_id=self.instance.cart_id, product_id=value).exists():
+            raise serializers.ValidationError("This product is already in the cart.")
+        return value
+
 
 class CreateCartItemSerializer(serializers.ModelSerializer):
     """
@@ -74,3 +89,38 @@ class CreateCartItemSerializer(serializers.ModelSerializer):
         if value < 1:
             raise serializers.ValidationError("Quantity must be at least 1.")
         return value
+
+
+class CartItemQuantitySerializer(serializers.Serializer):
+    """
+    One product and quantity of a bulk cart item request
+    """
+    product_id = serializers.IntegerField(required=True)
+    quantity = serializers.IntegerField(default=1, min_value=1)
+
+
+class BulkCreateCartItemSerializer(serializers.Serializer):
+    """
+    Serializer for adding several products to a cart at once
+
+    validated_data gains `quantities` (product id -> summed quantity) and
+    `prices` (product id -> price), read with one query for all products
+    """
+    cart_id = serializers.IntegerField(required=True)
+    items = CartItemQuantitySerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate(self, attrs):
+        quantities = {}
+        for item in attrs['items']:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+
+        prices = dict(Product.objects.filter(id__in=quantities).order_by().values_list('id', 'price'))
+        missing = sorted(set(quantities) - set(prices))
+        if missing:
+            raise serializers.ValidationError({
+                'items': [f"Invalid product IDs: {', '.join(map(str, missing))}"]
+            })
+
+        attrs['quantities'] = quantities
+        attrs['prices'] = prices
+        return attrs
@@ -1,15 +1,15 @@
 from rest_framework import serializers
 from store.models import Cart
-from decimal import Decimal
-from django.db.models import Sum, F
+from common.utils import CachedFieldsMixin
+from .cart_item_serializer import CartItemSerializer
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Cart model
     """
     items = serializers.SerializerMethodField()
-    total = serializers.SerializerMethodField()
+    expandable_fields = {'items': CartItemSerializer}
 
     class Meta:
         model = Cart
@@ -18,34 +18,18 @@ class CartSerializer(serializers.ModelSerializer):
             'session_id',
             'items',
             'total',
+            'item_count',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'session_id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'session_id', 'total', 'item_count', 'created_at', 'updated_at']
     
     def get_items(self, obj):
         """
         Return cart items for this cart
-        Uses lazy import to avoid circular dependency
         """
-        from store.serializers import CartItemSerializer
         items = obj.items.all()
-        return CartItemSerializer(items, many=True, context=self.context).data
-    
-    def get_total(self, obj):
-        """
-        Calculate the total price of all items in the cart
-        Total = sum(product.price * quantity) for all items
-        Uses database aggregation for better performance
-        """
-        from store.models import CartItem
-        
-        total = CartItem.objects.filter(cart=obj).aggregate(
-            total=Sum(F('product__price') * F('quantity'))
-        )['total']
-        
-        # Return '0.00' if cart is empty, otherwise return the total as string
-        return str(total) if total else '0.00'
+        return self.nested_representation('items', items, many=True)
 
 
 class CreateCartSerializer(serializers.ModelSerializer):
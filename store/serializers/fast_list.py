@@ -0,0 +1,133 @@
+"""
+Fast list formatters for store endpoints
+Produce the same output as ProductSerializer and OrderSerializer from .values() rows
+"""
+from collections import defaultdict
+from common.utils.fast_list import FastList, RowFormatter
+from store.models import OrderHasItems, Cart, CartItem
+from .product_serializer import ProductSerializer, MinimalRequestSerializer
+from .cart_serializer import CartSerializer
+from .cart_item_serializer import CartItemSerializer, MinimalCartSerializer
+from .address_serializer import AddressSerializer
+from .order_serializer import OrderSerializer, OrderItemSerializer
+
+
+def build_product_formatter(context, prefix='', extra_columns=()):
+    """
+    Build a formatter mirroring ProductSerializer, with its nested request
+    read from a join on the request table
+    """
+    request_formatter = RowFormatter(
+        MinimalRequestSerializer, context, prefix=prefix + 'request__')
+    request_id = prefix + 'request__id'
+    return RowFormatter(
+        ProductSerializer, context, prefix=prefix,
+        nested={'request': _optional(request_formatter, request_id)},
+        extra_columns=request_formatter.columns + list(extra_columns)
+    )
+
+
+def _optional(formatter, column):
+    """
+    Wrap a joined formatter so a NULL foreign key formats as None
+    """
+    def format_row(row):
+        if row[column] is None:
+            return None
+        return formatter(row)
+    return format_row
+
+
+class ProductFastList(FastList):
+    """
+    Fast list formatter for ProductViewSet
+    """
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.product_formatter = build_product_formatter(context)
+
+    @property
+    def columns(self):
+        return self.product_formatter.columns
+
+    def format(self, rows):
+        return [self.product_formatter(row) for row in rows]
+
+
+class OrderFastList(FastList):
+    """
+    Fast list formatter for OrderViewSet
+
+    Order items, carts and cart items for the whole page are loaded with one
+    query each and grouped in Python.
+    """
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.item_formatter = RowFormatter(
+            OrderItemSerializer, context,
+            nested={'product': build_product_formatter(context, prefix='product__')},
+            extra_columns=['order_id']
+        )
+        self.cart_item_formatter = RowFormatter(
+            CartItemSerializer, context,
+            nested={
+                'cart': RowFormatter(MinimalCartSerializer, context, prefix='cart__'),
+                'product': build_product_formatter(context, prefix='product__'),
+            },
+            extra_columns=['cart_id']
+        )
+        self.cart_formatter = RowFormatter(
+            CartSerializer, context,
+            nested={
+                'items': lambda row: self._cart_items.get(row['id'], []),
+            }
+        )
+        self.order_formatter = RowFormatter(
+            OrderSerializer, context,
+            nested={
+                'shipping_address': RowFormatter(
+                    AddressSerializer, context, prefix='shipping_address__'),
+                'items': lambda row: self._order_items.get(row['id'], []),
+                'cart': lambda row: self._carts.get(row['cart_id']),
+            },
+            extra_columns=['cart_id']
+        )
+        self._order_items = {}
+        self._carts = {}
+        self._cart_items = {}
+
+    @property
+    def columns(self):
+        return self.order_formatter.columns
+
+    def format(self, rows):
+        rows = list(rows)
+        order_ids = [row['id'] for row in rows]
+        cart_ids = {row['cart_id'] for row in rows if row['cart_id'] is not None}
+
+        order_items = defaultdict(list)
+        item_rows = OrderHasItems.objects.filter(
+            order_id__in=order_ids).values(*self.item_formatter.columns)
+        for row in item_rows:
+            order_items[row['order_id']].append(self.item_formatter(row))
+        self._order_items = order_items
+
+        cart_items = defaultdict(list)
+        if cart_ids:
+            cart_item_rows = CartItem.objects.filter(
+                cart_id__in=cart_ids).values(*self.cart_item_formatter.columns)
+            for row in cart_item_rows:
+                cart_items[row['cart_id']].append(self.cart_item_formatter(row))
+        self._cart_items = cart_items
+
+        carts = {}
+        if cart_ids:
+            cart_rows = Cart.objects.filter(
+                id__in=cart_ids).values(*self.cart_formatter.columns)
+            for row in cart_rows:
+                carts[row['id']] = self.cart_formatter(row)
+        self._carts = carts
+
+        return [self.order_formatter(row) for row in rows]
@@ -1,22 +1,25 @@
 from rest_framework import serializers
 from store.models import Order, OrderHasItems, Address
+from common.utils import CachedFieldsMixin
+from .product_serializer import ProductSerializer
+from .cart_serializer import CartSerializer
+from .address_serializer import AddressSerializer
 from decimal import Decimal
 import uuid
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for OrderHasItems (order items)
     """
     product = serializers.SerializerMethodField()
+    expandable_fields = {'product': ProductSerializer}
     
     def get_product(self, obj):
         """
         Return product data
-        Uses lazy import to avoid circular dependency
         """
-        from store.serializers import ProductSerializer
-        return ProductSerializer(obj.product, context=self.context).data
+        return self.nested_representation('product', obj.product)
     
     class Meta:
         model = OrderHasItems
@@ -32,29 +35,32 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Order model (read)
     """
     shipping_address = serializers.SerializerMethodField()
     items = serializers.SerializerMethodField()
     cart = serializers.SerializerMethodField()
-    cart_id = serializers.IntegerField(source='cart.id', read_only=True, allow_null=True)
+    cart_id = serializers.IntegerField(read_only=True, allow_null=True)
+    expandable_fields = {
+        'shipping_address': AddressSerializer,
+        'items': OrderItemSerializer,
+        'cart': CartSerializer,
+    }
     
     def get_shipping_address(self, obj):
         """
         Return shipping address data
-        Uses lazy import to avoid circular dependency
         """
-        from store.serializers import AddressSerializer
-        return AddressSerializer(obj.shipping_address, context=self.context).data
+        return self.nested_representation('shipping_address', obj.shipping_address)
     
     def get_items(self, obj):
         """
         Return order items for this order
         """
         items = obj.items.all()
-        return OrderItemSerializer(items, many=True, context=self.context).data
+        return self.nested_representation('items', items, many=True)
     
     def get_cart(self, obj):
         """
@@ -63,8 +69,7 @@ class OrderSerializer(serializers.ModelSerializer):
         if not obj.cart:
             return None
         
-        from store.serializers import CartSerializer
-        return CartSerializer(obj.cart, context=self.context).data
+        return self.nested_representation('cart', obj.cart)
     
     class Meta:
         model = Order
@@ -185,15 +190,10 @@ class CreateOrderSerializer(serializers.Serializer):
             cart=cart
         )
         
-        # Create order items
-        for item_data in order_items_to_create:
-            OrderHasItems.objects.create(
-                order=order,
-                product=item_data['product'],
-                price=item_data['price'],
-                currency=item_data['currency'],
-                quantity=item_data['quantity']
-            )
+        # Create order items in one INSERT
+        OrderHasItems.objects.bulk_create([
+            OrderHasItems(order=order, **item_data) for item_data in order_items_to_create
+        ])
         
         return order
 
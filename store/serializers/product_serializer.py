@@ -1,12 +1,40 @@
 from rest_framework import serializers
 from store.models import Product
+from request.models import VehiclePartRequest
+from common.utils import CachedFieldsMixin
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class MinimalRequestSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    """
+    Minimal VehiclePartRequest serializer nested inside products
+    Doesn't include products to avoid infinite recursion (products -> request -> products)
+    """
+    class Meta:
+        model = VehiclePartRequest
+        fields = [
+            'id',
+            'vehicle_type',
+            'vehicle_model',
+            'vehicle_year',
+            'part_name',
+            'part_number',
+            'vehicle_image',
+            'part_image',
+            'part_video',
+            'description',
+            'status',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ProductSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Product model
     """
     request = serializers.SerializerMethodField()
+    expandable_fields = {'request': MinimalRequestSerializer}
 
     class Meta:
         model = Product
@@ -28,30 +56,5 @@ class ProductSerializer(serializers.ModelSerializer):
         Uses a minimal serializer to avoid infinite recursion (products -> request -> products)
         """
         if obj.request:
-            # Use a minimal serializer that doesn't include products to avoid recursion
-            from rest_framework import serializers
-            # Create a minimal request serializer inline to avoid circular imports
-            class MinimalRequestSerializer(serializers.ModelSerializer):
-
-                class Meta:
-                    from request.models import VehiclePartRequest
-                    model = VehiclePartRequest
-                    fields = [
-                        'id',
-                        'vehicle_type',
-                        'vehicle_model',
-                        'vehicle_year',
-                        'part_name',
-                        'part_number',
-                        'vehicle_image',
-                        'part_image',
-                        'part_video',
-                        'description',
-                        'status',
-                        'created_at',
-                        'updated_at'
-                    ]
-                    read_only_fields = ['id', 'created_at', 'updated_at']
-
-            return MinimalRequestSerializer(obj.request, context=self.context).data
+            return self.nested_representation('request', obj.request)
         return None
@@ -1,6 +1,6 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
-from .models import Product
+from .models import Product, Cart
 
 
 @receiver(post_save, sender=Product)
@@ -12,5 +12,12 @@ def update_request_status_on_product_creation(sender, instance, created, **kwarg
         # Only update if the request is not already completed or cancelled
         if instance.request.status in ['pending', 'in_progress']:
             instance.request.status = 'completed'
-            instance.request.save(update_fields=['status'])
+            instance.request.save(update_fields=['status', 'updated_at'])
 
+
+@receiver(pre_delete, sender=Product)
+def update_cart_totals_on_product_deletion(sender, instance, **kwargs):
+    """
+    Remove the product from cart totals before its cart items are cascade-deleted
+    """
+    Cart.apply_product_removal(instance.pk, instance.price)
@@ -1,3 +1,617 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from request.models import VehiclePartRequest, VehiclePartRequestImage
+from common.utils.serializer_utils import field_plan_cache_disabled
+from store.models import Product, Cart, CartItem, Address, Order, OrderHasItems
+from store.serializers import ProductSerializer
+from store.management.commands.benchmark_serializers import SUITE_CASES, compare_suites, run_suite
 
-# Create your tests here.
+
+def create_user(phone='0771234567'):
+    return User.objects.create_user(
+        phone=phone, password='password', first_name='Test', last_name='User',
+        email=f'{phone}@example.com'
+    )
+
+
+def create_order(user, index):
+    """
+    Create an order with two items and a cart holding the same two products
+    """
+    vehicle_part_request = VehiclePartRequest.objects.create(
+        user=user, vehicle_type='car', vehicle_model='Corolla', vehicle_year=2018,
+        part_name=f'Part {index}', description='Front bumper in good condition'
+    )
+    products = [
+        Product.objects.create(
+            request=vehicle_part_request, name=f'Product {index}-{position}',
+            price=Decimal('100.00') + position
+        )
+        for position in range(2)
+    ]
+    cart = Cart.objects.create()
+    for product in products:
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+    cart.recalculate_totals()
+
+    address = Address.objects.create(
+        first_name='Test', last_name='User', country='LK', post_code='10100',
+        city='Colombo', address1='1 Main Street'
+    )
+    order = Order.objects.create(
+        total=cart.total, reference_number=f'ORD-TEST-{index}', source='web',
+        user=user, shipping_address=address, cart=cart
+    )
+    for product in products:
+        OrderHasItems.objects.create(order=order, product=product, price=product.price, quantity=2)
+    return order
+
+
+class SerializerQueryCountTests(TestCase):
+    """
+    Read endpoints must serialize a page in a constant number of queries,
+    however many rows it holds (see the serializers' setup_queryset)
+    Each count includes the ETag query
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.orders = [create_order(self.user, index) for index in range(5)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertConstantQueries(self, num, url):
+        """
+        Assert `url` takes `num` queries for a single-row page and a full page
+        """
+        for page_size in (1, 5):
+            with self.assertNumQueries(num):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+
+    def test_order_list(self):
+        # etag, count, orders (+ shipping address, cart), order items, cart items
+        self.assertConstantQueries(5, '/api/v1/store/orders/')
+
+    def test_order_detail(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/v1/store/orders/{self.orders[0].id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_list(self):
+        self.assertConstantQueries(3, '/api/v1/store/products/')
+
+    def test_cart_item_list(self):
+        self.assertConstantQueries(3, '/api/v1/store/cart-items/')
+
+    def test_cart_detail(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/store/carts/{self.orders[0].cart_id}/')
+        self.assertEqual(response.status_code, 200)
+
+
+class FastListParityTests(TestCase):
+    """
+    FAST_LIST_ENABLED must not change a single byte of the list responses
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.orders = [create_order(self.user, index) for index in range(5)]
+        vehicle_part_request = VehiclePartRequest.objects.filter(user=self.user).first()
+        # update() skips save(), which opens media files to compress them
+        VehiclePartRequest.objects.filter(pk=vehicle_part_request.pk).update(
+            part_number='PN-1', vehicle_image='vehicle_images/front.jpg')
+        for position in range(2):
+            VehiclePartRequestImage.objects.create(
+                request=vehicle_part_request, image=f'request_images/gallery-{position}.jpg', position=position)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertSameBytes(self, url, params):
+        with override_settings(FAST_LIST_ENABLED=False):
+            expected = self.client.get(url, params)
+        with override_settings(FAST_LIST_ENABLED=True):
+            actual = self.client.get(url, params)
+        self.assertEqual(expected.status_code, 200)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        return expected
+
+    def assertParity(self, url, params_list):
+        for params in params_list:
+            with self.subTest(url=url, params=params):
+                response = self.assertSameBytes(url, params)
+                # Follow the cursor so later pages are compared too; request
+                # lists carry meta beside data, the store lists inside it
+                body = json.loads(response.content)
+                meta = body.get('meta') or body['data'].get('meta') or {}
+                next_url = meta.get('next')
+                if params.get('pagination') == 'cursor':
+                    self.assertTrue(next_url)
+                    self.assertSameBytes(next_url, {})
+
+    def test_products(self):
+        self.assertParity('/api/v1/store/products/', [
+            {},
+            {'search': 'Product 3'},
+            {'ordering': 'price'},
+            {'ordering': '-price', 'page': 2, 'page_size': 3},
+            {'pagination': 'cursor', 'page_size': 4},
+        ])
+
+    def test_vehicle_part_requests(self):
+        self.assertParity('/api/v1/requests/vehicle-part-requests/', [
+            {},
+            {'search': 'Part 2'},
+            {'ordering': 'vehicle_year'},
+            {'page': 2, 'page_size': 2},
+            {'pagination': 'cursor', 'page_size': 2},
+        ])
+
+    def test_orders(self):
+        self.assertParity('/api/v1/store/orders/', [
+            {},
+            {'ordering': 'created_at'},
+            {'page': 2, 'page_size': 2},
+            {'pagination': 'cursor', 'page_size': 2},
+        ])
+
+
+class CachedFieldsTests(TestCase):
+    """
+    Serializers built from the cached field plan get their own fields and
+    render exactly what the uncached fields render
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.orders = [create_order(self.user, index) for index in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_instances_do_not_share_fields(self):
+        first, second = ProductSerializer(), ProductSerializer()
+        self.assertIsNot(first.fields['name'], second.fields['name'])
+        self.assertIs(first.fields['name'].parent, first)
+        self.assertIs(second.fields['name'].parent, second)
+
+        def reject(value):
+            raise ValueError(value)
+
+        first.fields['name'].validators.append(reject)
+        first.fields['price'].error_messages['invalid'] = 'Changed'
+        for other in (second, ProductSerializer()):
+            self.assertNotIn(reject, other.fields['name'].validators)
+            self.assertNotEqual(other.fields['price'].error_messages['invalid'], 'Changed')
+        self.assertNotIn(reject, ProductSerializer.get_field_plan()['name'].validators)
+
+    def test_output_matches_uncached(self):
+        cases = [
+            ('/api/v1/store/products/', {}),
+            ('/api/v1/store/products/', {'fields': 'id,name,request.part_name'}),
+            ('/api/v1/store/orders/', {}),
+            ('/api/v1/store/orders/', {'fields': 'id,items.product.name'}),
+            ('/api/v1/store/cart-items/', {}),
+            (f'/api/v1/store/carts/{self.orders[0].cart_id}/', {}),
+            ('/api/v1/requests/vehicle-part-requests/', {}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                cached = self.client.get(url, params)
+                with field_plan_cache_disabled():
+                    uncached = self.client.get(url, params)
+                self.assertEqual(cached.status_code, 200)
+                self.assertEqual(cached.content, uncached.content)
+
+
+class FieldSelectionTests(TestCase):
+    """
+    ?fields= and ?expand= trim the output and the columns and relations loaded
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.orders = [create_order(self.user, index) for index in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_product_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/store/products/', {'fields': 'id,name,price'})
+        self.assertEqual(response.status_code, 200)
+        for product in response.data['data']['data']:
+            self.assertEqual(list(product), ['id', 'name', 'price'])
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('vehicle_part_requests"."part_name', sql)
+
+    def test_order_nested_fields(self):
+        response = self.client.get(
+            '/api/v1/store/orders/', {'fields': 'id,items.quantity,items.product.name'})
+        self.assertEqual(response.status_code, 200)
+        order = response.data['data']['data'][0]
+        self.assertEqual(list(order), ['id', 'items'])
+        self.assertEqual(list(order['items'][0]), ['product', 'quantity'])
+        self.assertEqual(list(order['items'][0]['product']), ['name'])
+
+    def test_order_collapsed_relations(self):
+        # etag, count, orders, order item ids; the cart is neither joined nor prefetched
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/v1/store/orders/', {'expand': ''})
+        order = response.data['data']['data'][0]
+        self.assertEqual(order['cart'], order['cart_id'])
+        self.assertEqual(order['shipping_address'], self.orders[-1].shipping_address_id)
+        self.assertEqual(len(order['items']), 2)
+        self.assertIsInstance(order['items'][0], int)
+
+    def test_cart_expand(self):
+        cart_id = self.orders[0].cart_id
+        response = self.client.get(f'/api/v1/store/carts/{cart_id}/', {'expand': 'items'})
+        item = response.data['data']['items'][0]
+        self.assertEqual(item['cart'], cart_id)
+        self.assertIsInstance(item['product'], int)
+
+    def test_writes_ignore_field_selection(self):
+        cart_item = CartItem.objects.filter(cart_id=self.orders[0].cart_id).first()
+        response = self.client.patch(
+            f'/api/v1/store/cart-items/{cart_item.id}/?fields=id', {'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('product', response.data['data']['data'])
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Read endpoints answer 304 while the ETag computed from the data still matches
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.order = create_order(self.user, 0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertNotModified(self, url):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_order_list_not_modified(self):
+        self.assertNotModified('/api/v1/store/orders/')
+
+    def test_order_list_modified_by_cart_change(self):
+        etag = self.assertNotModified('/api/v1/store/orders/')
+        CartItem.objects.filter(cart_id=self.order.cart_id).first().delete()
+        response = self.client.get('/api/v1/store/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_price_change(self):
+        etag = self.assertNotModified('/api/v1/store/products/')
+        product = Product.objects.first()
+        product.price += 1
+        product.save()
+        response = self.client.get('/api/v1/store/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_string_changes_etag(self):
+        first = self.client.get('/api/v1/store/orders/')['ETag']
+        second = self.client.get('/api/v1/store/orders/', {'fields': 'id'})['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_cart_detail_not_modified(self):
+        self.assertNotModified(f'/api/v1/store/carts/{self.order.cart_id}/')
+
+    def test_order_list_modified_by_order_item_change(self):
+        etag = self.assertNotModified('/api/v1/store/orders/')
+        OrderHasItems.objects.filter(order=self.order).first().delete()
+        response = self.client.get('/api/v1/store/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_list_modified_by_image_change(self):
+        url = '/api/v1/requests/vehicle-part-requests/'
+        etag = self.client.get(url)['ETag']
+        VehiclePartRequestImage.objects.create(
+            request=VehiclePartRequest.objects.first(), image='request_images/extra.jpg')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_independent_relations_not_joined(self):
+        """
+        Order items and cart items are aggregated in separate subqueries, so
+        the ETag query never joins one to-many chain against the other
+        """
+        for index in range(1, 3):
+            create_order(self.user, index)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/store/orders/')
+        sql = queries.captured_queries[0]['sql']
+        for select in sql.split('SELECT')[1:]:
+            self.assertFalse('order_has_items' in select and 'cart_items' in select, select)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    ?pagination=cursor pages on (created_at, id) without COUNT(*) or OFFSET
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        orders = [create_order(self.user, index) for index in range(5)]
+        # Ties on created_at must be broken by id
+        Order.objects.filter(id__in=[order.id for order in orders[1:4]]).update(created_at=timezone.now())
+        self.expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(order['id'] for order in response.data['data']['data'])
+            url = response.data['data']['meta'][link]
+            pages += 1
+        return ids, pages
+
+    def test_forward_and_back(self):
+        ids, pages = self.walk('/api/v1/store/orders/?pagination=cursor&page_size=2', 'next')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+
+        second_page = self.client.get(
+            '/api/v1/store/orders/?pagination=cursor&page_size=2').data['data']['meta']['next']
+        previous = self.client.get(second_page).data['data']['meta']['previous']
+        self.assertEqual(self.client.get(previous).data['data']['data'][0]['id'], self.expected[0])
+
+    def test_no_count_query(self):
+        # etag, orders (+ shipping address, cart), order items, cart items
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/v1/store/orders/', {'pagination': 'cursor'})
+        self.assertIsNone(response.data['data']['meta']['count'])
+
+        response = self.client.get('/api/v1/store/orders/', {'pagination': 'cursor', 'count': 'true'})
+        self.assertEqual(response.data['data']['meta']['count'], 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/store/orders/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderExportTests(TestCase):
+    """
+    The order export streams every matching order with its items
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.orders = [create_order(self.user, index) for index in range(3)]
+        create_order(create_user('0777654321'), 3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get('/api/v1/store/orders/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        lines = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [order.id for order in self.orders])
+        self.assertEqual([len(line['items']) for line in lines], [2, 2, 2])
+        self.assertEqual(lines[0]['items'][0]['product_name'], 'Product 0-0')
+
+    def test_csv_with_filters(self):
+        Order.objects.filter(id=self.orders[0].id).update(status='completed')
+        rows = list(csv.DictReader(io.StringIO(self.export(output='csv', status='completed'))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['id'] for row in rows}, {str(self.orders[0].id)})
+        self.assertEqual(rows[0]['items.quantity'], '2')
+
+    def test_csv_neutralizes_formulas(self):
+        Product.objects.filter(id__in=OrderHasItems.objects.filter(
+            order=self.orders[0]).values('product_id')).update(name='=HYPERLINK("http://example.com")')
+        rows = list(csv.DictReader(io.StringIO(self.export(output='csv'))))
+        names = {row['items.product_name'] for row in rows if row['id'] == str(self.orders[0].id)}
+        self.assertEqual(names, {'\'=HYPERLINK("http://example.com")'})
+        # Numbers keep their sign
+        self.assertTrue(all(not row['total'].startswith("'") for row in rows))
+
+    def test_staff_export_all_users(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(len(self.export().splitlines()), 4)
+
+    def test_batches_cover_all_rows(self):
+        with patch('store.views.order_view.EXPORT_CHUNK_SIZE', 2):
+            self.assertEqual(len(self.export(output='csv').splitlines()), 1 + 6)
+
+
+class CartTotalsTests(TestCase):
+    """
+    Cart.total and Cart.item_count move with every cart item and product change
+    """
+
+    def setUp(self):
+        self.cart = create_order(create_user(), 0).cart
+        self.products = list(Product.objects.order_by('id'))
+        self.extra = Product.objects.create(
+            request=self.products[0].request, name='Extra', price=Decimal('9.99'))
+        self.item = CartItem.objects.get(cart=self.cart, product=self.products[0])
+        self.client = APIClient()
+
+    def assertTotals(self, total, item_count):
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.total, self.cart.item_count), (Decimal(total), item_count))
+        stored = (self.cart.total, self.cart.item_count)
+        self.cart.recalculate_totals(save=False)
+        self.assertEqual(stored, (self.cart.total, self.cart.item_count))
+
+    def test_create(self):
+        self.assertTotals('402.00', 4)
+        response = self.client.post('/api/v1/store/cart-items/', {
+            'cart_id': self.cart.id, 'product_id': self.extra.id, 'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTotals('431.97', 7)
+
+    def test_update_quantity(self):
+        response = self.client.patch(f'/api/v1/store/cart-items/{self.item.id}/', {'quantity': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals('702.00', 7)
+
+    def test_update_product(self):
+        response = self.client.patch(
+            f'/api/v1/store/cart-items/{self.item.id}/', {'product_id': self.extra.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals('221.98', 4)
+
+    def test_update_invalid_product(self):
+        for product_id in (999999, self.products[1].id):
+            response = self.client.patch(
+                f'/api/v1/store/cart-items/{self.item.id}/', {'product_id': product_id}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertTotals('402.00', 4)
+
+    def test_delete_item(self):
+        response = self.client.delete(f'/api/v1/store/cart-items/{self.item.id}/')
+        self.assertIn(response.status_code, (200, 204))
+        self.assertTotals('202.00', 2)
+
+    def test_price_change(self):
+        self.products[0].price = Decimal('150.50')
+        self.products[0].save()
+        self.assertTotals('503.00', 4)
+
+    def test_save_without_price_change(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.name = 'Renamed'
+        # Only the UPDATE: the loaded price shows it didn't change
+        with self.assertNumQueries(1):
+            product.save()
+        self.assertTotals('402.00', 4)
+
+    def test_stale_instances_change_price(self):
+        first = Product.objects.get(pk=self.products[0].pk)
+        second = Product.objects.get(pk=self.products[0].pk)
+        first.price = Decimal('110.00')
+        first.save()
+        # Loaded at 100.00, but the delta is taken from the stored 110.00
+        second.price = Decimal('120.00')
+        second.save()
+        self.assertTotals('442.00', 4)
+        second.price = Decimal('100.00')
+        second.save()
+        self.assertTotals('402.00', 4)
+
+    def test_queryset_price_update(self):
+        Product.objects.filter(pk=self.products[0].pk).update(price=Decimal('150.50'))
+        Cart.apply_product_price_change(self.products[0].pk, Decimal('100.00'), Decimal('150.50'))
+        self.assertTotals('503.00', 4)
+
+    def test_product_delete(self):
+        self.products[1].delete()
+        self.assertTotals('200.00', 2)
+
+    def test_reconcile(self):
+        Cart.objects.filter(pk=self.cart.pk).update(total=Decimal('1.00'), item_count=1)
+        out = io.StringIO()
+        call_command('reconcile_cart_totals', '--dry-run', stdout=out)
+        self.assertIn(f'Cart {self.cart.id}: total 1.00 -> 402.00, item_count 1 -> 4', out.getvalue())
+        self.assertIn('1 cart(s) drifted', out.getvalue())
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total, Decimal('1.00'))
+
+        call_command('reconcile_cart_totals', stdout=io.StringIO())
+        self.assertTotals('402.00', 4)
+        out = io.StringIO()
+        call_command('reconcile_cart_totals', '--dry-run', stdout=out)
+        self.assertIn('0 cart(s) drifted', out.getvalue())
+
+
+class BulkCartItemTests(TestCase):
+    """
+    POST /cart-items/bulk/ adds several products with one upsert
+    """
+
+    def setUp(self):
+        self.order = create_order(create_user(), 0)
+        self.cart = self.order.cart
+        self.products = list(Product.objects.order_by('id'))
+        self.client = APIClient()
+
+    def test_upsert_adds_quantities(self):
+        extra = Product.objects.create(
+            request=self.products[0].request, name='Extra', price=Decimal('5.00'))
+        items = [
+            {'product_id': self.products[0].id, 'quantity': 3},
+            {'product_id': extra.id, 'quantity': 1},
+            {'product_id': extra.id, 'quantity': 1},
+        ]
+        # products, savepoint, cart totals, upsert, release, cart, cart items (+ products, requests)
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                '/api/v1/store/cart-items/bulk/', {'cart_id': self.cart.id, 'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        quantities = dict(CartItem.objects.filter(cart=self.cart).values_list('product_id', 'quantity'))
+        self.assertEqual(quantities, {self.products[0].id: 5, self.products[1].id: 2, extra.id: 2})
+        data = response.data['data']
+        self.assertEqual(data['item_count'], 9)
+        self.assertEqual(len(data['items']), 3)
+
+        self.cart.refresh_from_db()
+        stored = (self.cart.total, self.cart.item_count)
+        self.cart.recalculate_totals(save=False)
+        self.assertEqual(stored, (self.cart.total, self.cart.item_count))
+
+    def test_invalid_products_change_nothing(self):
+        response = self.client.post('/api/v1/store/cart-items/bulk/', {
+            'cart_id': self.cart.id,
+            'items': [{'product_id': self.products[0].id}, {'product_id': 999999}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=self.products[0]).quantity, 2)
+
+    def test_missing_cart(self):
+        response = self.client.post('/api/v1/store/cart-items/bulk/', {
+            'cart_id': 999999, 'items': [{'product_id': self.products[0].id}],
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(CartItem.objects.filter(cart_id=999999).exists())
+
+
+class SerializerBenchmarkTests(TestCase):
+    """
+    The serializer benchmark suite runs on in-memory objects only
+    """
+
+    def test_builders_need_no_queries(self):
+        for name, (serializer_class, build) in SUITE_CASES.items():
+            with self.subTest(name), self.assertNumQueries(0):
+                data = serializer_class(build(2), many=True).data
+            self.assertEqual(len(data), 2)
+
+    def test_suite_and_compare(self):
+        report = run_suite(page_sizes=(1, 3), cases=['cart'], min_time=0.001, repeat=1)
+        self.assertEqual(set(report['results']), {'cart/1', 'cart/3'})
+        result = report['results']['cart/3']
+        self.assertGreater(result['ops_per_sec'], 0)
+        self.assertGreater(result['peak_alloc_kb'], 0)
+        self.assertEqual(result['rows'], 3)
+
+        slower = {'results': {'cart/3': {**result, 'ops_per_sec': result['ops_per_sec'] / 2}}}
+        (case, _, _, change, _, _, verdict), = compare_suites(report, slower)
+        self.assertEqual((case, change, verdict), ('cart/3', -50.0, 'slower'))
@@ -1,12 +1,17 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from store.models import CartItem, Cart, Product
-from store.serializers import CartItemSerializer, CreateCartItemSerializer
-from common.utils import APIResponse
+from store.serializers import CartItemSerializer, CreateCartItemSerializer, BulkCreateCartItemSerializer, CartSerializer
+from common.utils import APIResponse, FieldSelectionMixin, ConditionalGetMixin
 
 
-class CartItemViewSet(viewsets.ModelViewSet):
+class CartItemViewSet(ConditionalGetMixin, FieldSelectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for CartItem CRUD operations
     
@@ -16,10 +21,12 @@ class CartItemViewSet(viewsets.ModelViewSet):
     update: PUT /api/v1/store/cart-items/<id>/ - Update a cart item
     partial_update: PATCH /api/v1/store/cart-items/<id>/ - Partially update a cart item
     destroy: DELETE /api/v1/store/cart-items/<id>/ - Delete a cart item
+    bulk: POST /api/v1/store/cart-items/bulk/ - Add several products to a cart
     """
-    queryset = CartItem.objects.select_related('cart', 'product').all()
+    queryset = CartItem.objects.all()
     serializer_class = CartItemSerializer
     permission_classes = [AllowAny]  # Session-based, no authentication required
+    etag_dependencies = ('cart', 'product', 'product__request')
     
     def get_serializer_class(self):
         """
@@ -27,6 +34,8 @@ class CartItemViewSet(viewsets.ModelViewSet):
         """
         if self.action == 'create':
             return CreateCartItemSerializer
+        if self.action == 'bulk':
+            return BulkCreateCartItemSerializer
         return CartItemSerializer
     
     def get_queryset(self):
@@ -34,7 +43,7 @@ class CartItemViewSet(viewsets.ModelViewSet):
         Filter cart items by cart session_id if provided
         """
         queryset = super().get_queryset()
-        return queryset
+        return CartItemSerializer.setup_queryset(queryset, self.get_field_selection())
     
     def create(self, request, *args, **kwargs):
         """
@@ -51,17 +60,25 @@ class CartItemViewSet(viewsets.ModelViewSet):
         product_id = serializer.validated_data['product_id']
         product = get_object_or_404(Product, id=product_id)
         
-        # Check if cart item already exists for this cart and product
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': serializer.validated_data.get('quantity', 1)}
-        )
+        quantity = serializer.validated_data.get('quantity', 1)
         
-        if not created:
-            # If item already exists, update quantity
-            cart_item.quantity += serializer.validated_data.get('quantity', 1)
-            cart_item.save()
+        with transaction.atomic():
+            # Check if cart item already exists for this cart and product
+            cart_item, created = CartItem.objects.get_or_create(
+                cart=cart,
+                product=product,
+                defaults={'quantity': quantity}
+            )
+            
+            if not created:
+                # If item already exists, update quantity atomically
+                CartItem.objects.filter(pk=cart_item.pk).update(
+                    quantity=F('quantity') + quantity,
+                    updated_at=timezone.now()
+                )
+                cart_item.refresh_from_db()
+            
+            Cart.apply_item_delta(cart.id, product.price * quantity, quantity)
         
         # Return the cart item with full details
         response_serializer = CartItemSerializer(cart_item)
@@ -72,6 +89,68 @@ class CartItemViewSet(viewsets.ModelViewSet):
             status_code=status.HTTP_201_CREATED
         )
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Add several products to a cart and return the updated cart
+
+        Products are validated with one query and applied with one upsert
+        that adds to the quantity of items already in the cart
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart_id = serializer.validated_data['cart_id']
+        quantities = serializer.validated_data['quantities']
+        prices = serializer.validated_data['prices']
+
+        with transaction.atomic():
+            # Updating the totals first also locks the cart row for the upsert
+            updated = Cart.apply_item_delta(
+                cart_id,
+                sum(prices[product_id] * quantity for product_id, quantity in quantities.items()),
+                sum(quantities.values())
+            )
+            if not updated:
+                raise NotFound('Cart not found.')
+            CartItem.add_quantities(cart_id, quantities)
+
+        cart = CartSerializer.setup_queryset(Cart.objects.all()).get(pk=cart_id)
+        return APIResponse.success(
+            data=CartSerializer(cart, context=self.get_serializer_context()).data,
+            message='Cart items added successfully'
+        )
+    
+    def perform_update(self, serializer):
+        """
+        Save the cart item and move the cart totals by the difference
+        between the old and new price * quantity
+        """
+        with transaction.atomic():
+            old_item = CartItem.objects.select_for_update().select_related('product').get(
+                pk=serializer.instance.pk
+            )
+            cart_item = serializer.save()
+            if cart_item.product_id != old_item.product_id:
+                cart_item.product = Product.objects.get(pk=cart_item.product_id)
+            
+            Cart.apply_item_delta(
+                cart_item.cart_id,
+                cart_item.product.price * cart_item.quantity - old_item.product.price * old_item.quantity,
+                cart_item.quantity - old_item.quantity
+            )
+    
+    def perform_destroy(self, instance):
+        """
+        Delete the cart item and remove its contribution from the cart totals
+        """
+        with transaction.atomic():
+            Cart.apply_item_delta(
+                instance.cart_id,
+                -(instance.product.price * instance.quantity),
+                -instance.quantity
+            )
+            instance.delete()
+    
     def list(self, request, *args, **kwargs):
         """
         List all cart items
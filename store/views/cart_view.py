@@ -2,16 +2,23 @@ from rest_framework import viewsets, status, mixins
 from rest_framework.permissions import AllowAny
 from store.models import Cart
 from store.serializers import CartSerializer, CreateCartSerializer
-from common.utils import APIResponse
+from common.utils import APIResponse, FieldSelectionMixin, ConditionalGetMixin
 
 
-class CartViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin, mixins.UpdateModelMixin):
+class CartViewSet(ConditionalGetMixin, FieldSelectionMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin, mixins.UpdateModelMixin):
     """
     ViewSet for Cart model
     """
     queryset = Cart.objects.all()
     serializer_class = CreateCartSerializer
     permission_classes = [AllowAny]
+    etag_dependencies = ('items', 'items__product', 'items__product__request')
+    
+    def get_queryset(self):
+        """
+        Load only what the requested cart fields need
+        """
+        return CartSerializer.setup_queryset(super().get_queryset(), self.get_field_selection())
     
     def get_serializer_class(self):
         """
@@ -68,6 +75,13 @@ class CartViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet, mixins.Cre
             message='Cart updated successfully'
         )
     
+    def perform_update(self, serializer):
+        """
+        Save, then reload with the serializer's prefetches (DRF drops them after an update)
+        """
+        super().perform_update(serializer)
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
     def destroy(self, request, *args, **kwargs):
         """
         Delete a cart
@@ -1,19 +1,44 @@
+from django.db.models import F
 from rest_framework import viewsets, status, mixins
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from store.models import Order
-from store.serializers import OrderSerializer, CreateOrderSerializer
-from common.utils import APIResponse, CustomPageNumberPagination
+from store.models import Order, OrderHasItems
+from store.serializers import OrderSerializer, CreateOrderSerializer, OrderFastList
+from common.utils import (
+    APIResponse, CustomPageNumberPagination, FastListMixin, FieldSelectionMixin, ConditionalGetMixin,
+    queryset_batches, attach_related, export_response
+)
 
+EXPORT_CHUNK_SIZE = 500
+ORDER_EXPORT_FIELDS = [
+    'id', 'reference_number', 'user_id', 'total', 'currency', 'source', 'status',
+    'shipping_address_id', 'cart_id', 'created_at', 'updated_at'
+]
+ORDER_ITEM_EXPORT_FIELDS = [
+    'id', 'product_id', 'product_name', 'price', 'currency', 'quantity', 'created_at'
+]
 
-class OrderViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+
+class OrderViewSet(ConditionalGetMixin, FastListMixin, FieldSelectionMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     ViewSet for Order model
     Supports create, retrieve, and list operations
     """
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    fast_list_class = OrderFastList
     permission_classes = [AllowAny]
     pagination_class = CustomPageNumberPagination
+    etag_dependencies = (
+        'items', 'items__product', 'items__product__request', 'shipping_address',
+        'cart', 'cart__items', 'cart__items__product', 'cart__items__product__request',
+    )
+    filterset_fields = {
+        'status': ['exact'],
+        'source': ['exact'],
+        'user': ['exact'],
+        'created_at': ['gte', 'lte'],
+    }
     
     def get_queryset(self):
         """
@@ -22,7 +47,7 @@ class OrderViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Li
         queryset = super().get_queryset()
         if self.action == 'list' and self.request.user.is_authenticated:
             queryset = queryset.filter(user=self.request.user)
-        return queryset.select_related('user', 'shipping_address', 'cart').prefetch_related('items__product')
+        return OrderSerializer.setup_queryset(queryset, self.get_field_selection())
     
     def get_serializer_class(self):
         """
@@ -36,7 +61,7 @@ class OrderViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Li
         """
         Require authentication for list and create actions, allow any for retrieve
         """
-        if self.action in ['list', 'create']:
+        if self.action in ['list', 'create', 'export']:
             return [IsAuthenticated()]
         return [AllowAny()]
     
@@ -48,7 +73,8 @@ class OrderViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Li
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
         
-        # Return the created order with full details
+        # Return the created order with full details, loaded with the list's prefetches
+        order = OrderSerializer.setup_queryset(Order.objects.all(), self.get_field_selection()).get(pk=order.pk)
         response_serializer = OrderSerializer(order, context={'request': request})
         
         return APIResponse.success(
@@ -77,3 +103,30 @@ class OrderViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Li
             message='Order retrieved successfully'
         )
 
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the full order history with items as NDJSON or CSV
+
+        GET /api/v1/store/orders/export/?output=ndjson|csv
+        Staff export every user's orders (filter with ?user=); others their own.
+        Filters: status, source, user, created_at__gte, created_at__lte
+        """
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in ('ndjson', 'csv'):
+            return APIResponse.validation_error({'output': ['Must be one of: ndjson, csv.']})
+
+        queryset = Order.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        queryset = self.filter_queryset(queryset).values(*ORDER_EXPORT_FIELDS)
+
+        item_columns = [field for field in ORDER_ITEM_EXPORT_FIELDS if field != 'product_name']
+        items = OrderHasItems.objects.values(
+            'order_id', *item_columns, product_name=F('product__name'))
+        batches = attach_related(
+            queryset_batches(queryset, chunk_size=EXPORT_CHUNK_SIZE), items, 'order_id', 'items')
+        return export_response(
+            batches, export_format, 'orders', ORDER_EXPORT_FIELDS,
+            related_key='items', related_fields=ORDER_ITEM_EXPORT_FIELDS
+        )
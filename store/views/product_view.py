@@ -2,11 +2,11 @@ from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from store.models import Product
-from store.serializers import ProductSerializer
-from common.utils import CustomPageNumberPagination, APIResponse
+from store.serializers import ProductSerializer, ProductFastList
+from common.utils import CustomPageNumberPagination, APIResponse, FastListMixin, FieldSelectionMixin, ConditionalGetMixin
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ConditionalGetMixin, FastListMixin, FieldSelectionMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Product read operations only
     
@@ -15,8 +15,10 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    fast_list_class = ProductFastList
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPageNumberPagination
+    etag_dependencies = ('request',)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['request']
     search_fields = ['name', 'description']
@@ -27,7 +29,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Return the queryset of products for the authenticated user
         """
-        return Product.objects.select_related('request').filter(request__user=self.request.user)
+        return ProductSerializer.setup_queryset(
+            Product.objects.filter(request__user=self.request.user), self.get_field_selection())
     
     def get_serializer_context(self):
         """
@@ -5,6 +5,7 @@ import logging
 from django.conf import settings
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioException
+from common.utils.metrics import external_call
 
 logger = logging.getLogger(__name__)
 
@@ -74,11 +75,12 @@ class WhatsAppService:
             }
         
         try:
-            message = self.client.messages.create(
-                body=message_body,
-                from_=f'whatsapp:{self.whatsapp_from}',
-                to=f'whatsapp:{to_number}'
-            )
+            with external_call('twilio'):
+                message = self.client.messages.create(
+                    body=message_body,
+                    from_=f'whatsapp:{self.whatsapp_from}',
+                    to=f'whatsapp:{to_number}'
+                )
             
             logger.info(f"WhatsApp message sent successfully. SID: {message.sid}")
             return {
@@ -14,6 +14,7 @@ from datetime import timedelta
 import pymysql
 from pathlib import Path
 from decouple import config
+import importlib.util
 import os
 
 # Load local environment file if it exists
@@ -72,6 +73,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'common.middleware.MetricsMiddleware',  # Per-route metrics for /metrics
+    'common.middleware.TracingMiddleware',  # Request IDs and Server-Timing, see TRACING_ENABLED
+    'common.middleware.TrafficCaptureMiddleware',  # Opt-in, see TRAFFIC_CAPTURE_ENABLED
+    'common.middleware.ProfilingMiddleware',  # Sampled profiles, see PROFILING_ENABLED
+    'common.middleware.NPlusOneDetectionMiddleware',  # Staging only, see N_PLUS_ONE_DETECTION
+    'common.middleware.ResponseCompressionMiddleware',  # gzip/brotli for JSON responses
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files efficiently
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,6 +112,8 @@ WSGI_APPLICATION = 'vehicle_parts_api.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# Bulk request creation reads its ids back from LAST_INSERT_ID(), so the
+# server needs innodb_autoinc_lock_mode = 0 or 1 (consecutive ids per INSERT)
 
 DATABASES = {
     'default': {
@@ -217,7 +226,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # orjson-backed, same output as rest_framework.renderers.JSONRenderer
+        'common.utils.FastJSONRenderer',
     ],
     'EXCEPTION_HANDLER': 'common.utils.handle_api_exception',
     'DEFAULT_PAGINATION_CLASS': 'common.utils.CustomPageNumberPagination',
@@ -228,6 +238,66 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Fast list mode: list endpoints format .values() rows directly instead of
+# running ModelSerializer per row (responses are identical)
+FAST_LIST_ENABLED = config('FAST_LIST_ENABLED', default=False, cast=bool)
+
+# JSON response compression (brotli is used when installed and accepted)
+RESPONSE_COMPRESSION_MIN_SIZE = config('RESPONSE_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+RESPONSE_COMPRESSION_GZIP_LEVEL = config('RESPONSE_COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = config('RESPONSE_COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+
+# Batch endpoint limits (/api/v1/batch/)
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_WORKERS = config('BATCH_MAX_WORKERS', default=4, cast=int)
+
+# N+1 detection (staging): log statements repeated more than the threshold in
+# one request, and optionally name their call sites in X-N-Plus-One
+N_PLUS_ONE_DETECTION = config('N_PLUS_ONE_DETECTION', default=False, cast=bool)
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+N_PLUS_ONE_HEADER = config('N_PLUS_ONE_HEADER', default=False, cast=bool)
+
+# Metrics (/metrics, Prometheus text format): the endpoint is only served when
+# METRICS_TOKEN is set, to scrapers sending it as a bearer token. Under
+# gunicorn, point METRICS_DIR at a directory shared by the workers (emptied
+# on deploy) so every worker's samples are merged; samples of exited workers
+# are kept in an archive file there
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Request profiling: a sample of requests (or those with a signed X-Profile
+# header, see `manage.py profiling_token`) is written to PROFILING_DIR as
+# collapsed stacks for flamegraphs; the oldest files beyond the limit are removed
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = config('PROFILING_MAX_FILES', default=200, cast=int)
+PROFILING_TOKEN_MAX_AGE = config('PROFILING_TOKEN_MAX_AGE', default=3600, cast=int)
+
+# Request tracing: every response carries X-Request-ID and is logged as one
+# structured line. Responses to staff users also get a Server-Timing header
+# (db, image_compression, storage, s3, twilio, smtp, ...); TRACING_SERVER_TIMING
+# sends it to every client, e.g. on staging. With TRACING_SPAN_FILE set, each
+# request's individual spans (at most TRACING_MAX_SPANS) are appended there as
+# JSON lines
+TRACING_ENABLED = config('TRACING_ENABLED', default=True, cast=bool)
+TRACING_SERVER_TIMING = config('TRACING_SERVER_TIMING', default=False, cast=bool)
+TRACING_SPAN_FILE = config('TRACING_SPAN_FILE', default='')
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=200, cast=int)
+
+# Traffic capture: a TRAFFIC_CAPTURE_SAMPLE_RATE fraction of requests is
+# recorded as sanitized request shapes (no user data, users as keyed hashes)
+# in rotating JSONL files under TRAFFIC_CAPTURE_DIR, for `manage.py replay_traffic`
+TRAFFIC_CAPTURE_ENABLED = config('TRAFFIC_CAPTURE_ENABLED', default=False, cast=bool)
+TRAFFIC_CAPTURE_SAMPLE_RATE = config('TRAFFIC_CAPTURE_SAMPLE_RATE', default=1.0, cast=float)
+TRAFFIC_CAPTURE_DIR = config('TRAFFIC_CAPTURE_DIR', default=str(BASE_DIR / 'traffic'))
+TRAFFIC_CAPTURE_MAX_BYTES = config('TRAFFIC_CAPTURE_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+TRAFFIC_CAPTURE_MAX_FILES = config('TRAFFIC_CAPTURE_MAX_FILES', default=20, cast=int)
+TRAFFIC_CAPTURE_MAX_BODY = config('TRAFFIC_CAPTURE_MAX_BODY', default=1024 * 1024, cast=int)
+
 # Email Configuration
 EMAIL_BACKEND = config(
     'EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -271,7 +341,7 @@ if USE_S3 and config('AWS_ACCESS_KEY_ID', default='') and config('AWS_STORAGE_BU
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 
     # Media files (user uploads) - use S3
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    DEFAULT_FILE_STORAGE = 'common.storage.InstrumentedS3Storage'
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/media/'
 else:
     # Local storage settings (for development)
@@ -279,6 +349,7 @@ else:
     STATIC_ROOT = BASE_DIR / 'staticfiles'
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
+    DEFAULT_FILE_STORAGE = 'common.storage.TracedFileSystemStorage'
 
 # WhatsApp Configuration (Twilio)
 TWILIO_WHATSAPP_ENABLED = config(
@@ -298,57 +369,45 @@ TWILIO_WHATSAPP_FROM = config(
 # AWS CloudWatch Logs Configuration
 USE_CLOUDWATCH_LOGS = config('USE_CLOUDWATCH_LOGS', default=False, cast=bool)
 
-# Configure CloudWatch Logs if enabled and AWS credentials are available
+# CloudWatch handlers are only described here; the boto3 client and log groups
+# are created by DeferredHandler on the logging listener thread when the
+# first record arrives, so neither startup nor requests wait on AWS
+CLOUDWATCH_LOGGING_ENABLED = False
 if USE_CLOUDWATCH_LOGS and config('AWS_ACCESS_KEY_ID', default='') and config('AWS_SECRET_ACCESS_KEY', default=''):
-    try:
-        import watchtower
-        import boto3
-        
+    if importlib.util.find_spec('watchtower') and importlib.util.find_spec('boto3'):
         AWS_CLOUDWATCH_LOG_GROUP = config('AWS_CLOUDWATCH_LOG_GROUP', default='vehicle-parts-api')
         AWS_CLOUDWATCH_REGION_NAME = config('AWS_CLOUDWATCH_REGION_NAME', default=config('AWS_S3_REGION_NAME', default='us-east-1'))
-        
-        # Create boto3 client with explicit credentials
-        cloudwatch_logs_client = boto3.client(
-            'logs',
-            aws_access_key_id=config('AWS_ACCESS_KEY_ID', default=''),
-            aws_secret_access_key=config('AWS_SECRET_ACCESS_KEY', default=''),
-            region_name=AWS_CLOUDWATCH_REGION_NAME
-        )
-        
-        # CloudWatch Logs handler
-        CLOUDWATCH_HANDLER = {
-            'level': 'INFO',
-            'class': 'watchtower.CloudWatchLogHandler',
-            'boto3_client': cloudwatch_logs_client,
-            'log_group': AWS_CLOUDWATCH_LOG_GROUP,
-            'stream_name': '{logger_name}-{strftime:%Y-%m-%d}',
-            'use_queues': True,  # Use background thread for better performance
+        CLOUDWATCH_OPTIONS = {
+            '()': 'common.utils.log_handlers.DeferredHandler',
+            'factory': 'common.utils.log_handlers.cloudwatch_handler',
+            'access_key_id': config('AWS_ACCESS_KEY_ID', default=''),
+            'secret_access_key': config('AWS_SECRET_ACCESS_KEY', default=''),
+            'region_name': AWS_CLOUDWATCH_REGION_NAME,
+            'log_stream_name': '{logger_name}-{strftime:%Y-%m-%d}',
+            'use_queues': True,  # watchtower batches uploads on its own thread
             'create_log_group': True,  # Automatically create log group if it doesn't exist
-            'filters': [],
         }
-        
+        CLOUDWATCH_HANDLER = {**CLOUDWATCH_OPTIONS, 'level': 'INFO', 'log_group_name': AWS_CLOUDWATCH_LOG_GROUP}
         CLOUDWATCH_ERROR_HANDLER = {
-            'level': 'ERROR',
-            'class': 'watchtower.CloudWatchLogHandler',
-            'boto3_client': cloudwatch_logs_client,
-            'log_group': f'{AWS_CLOUDWATCH_LOG_GROUP}-errors',
-            'stream_name': '{logger_name}-{strftime:%Y-%m-%d}',
-            'use_queues': True,
-            'create_log_group': True,
-            'filters': [],
-        }
-        
+            **CLOUDWATCH_OPTIONS, 'level': 'ERROR', 'log_group_name': f'{AWS_CLOUDWATCH_LOG_GROUP}-errors'}
         CLOUDWATCH_LOGGING_ENABLED = True
-    except ImportError:
-        CLOUDWATCH_LOGGING_ENABLED = False
+    else:
         print("Warning: watchtower not installed. CloudWatch logging disabled.")
-    except Exception as e:
-        CLOUDWATCH_LOGGING_ENABLED = False
-        print(f"Warning: Failed to configure CloudWatch logging: {str(e)}")
-else:
-    CLOUDWATCH_LOGGING_ENABLED = False
 
 # Logging Configuration
+# Loggers write to QueueListenerHandlers ('queue', 'queue_errors'); a listener
+# thread per queue formats records and hands them to the real handlers, so a
+# slow stream or CloudWatch never blocks a request. LOG_FORMAT=json emits one
+# JSON object per line with the request ID and structured extras. Noisy call
+# sites (per-upload compression logs, 4xx API exceptions) are rate limited to
+# LOG_RATE_LIMIT records per LOG_RATE_LIMIT_PERIOD seconds each, with a
+# LOG_SAMPLE_RATE fraction of the excess still let through. Records with a
+# traceback are never dropped
+LOG_FORMAT = config('LOG_FORMAT', default='simple')
+LOG_RATE_LIMIT = config('LOG_RATE_LIMIT', default=20, cast=int)
+LOG_RATE_LIMIT_PERIOD = config('LOG_RATE_LIMIT_PERIOD', default=60.0, cast=float)
+LOG_SAMPLE_RATE = config('LOG_SAMPLE_RATE', default=0.0, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -362,45 +421,61 @@ LOGGING = {
             'style': '{',
         },
         'json': {
-            'format': '{"time": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", "message": "%(message)s", "module": "%(module)s", "pathname": "%(pathname)s", "lineno": %(lineno)d}',
+            '()': 'common.utils.log_handlers.JsonFormatter',
         },
     },
     'filters': {
         'require_debug_false': {
             '()': 'django.utils.log.RequireDebugFalse',
         },
+        'rate_limit': {
+            '()': 'common.utils.log_handlers.RateLimitFilter',
+            'rate': LOG_RATE_LIMIT,
+            'per': LOG_RATE_LIMIT_PERIOD,
+            'sample_rate': LOG_SAMPLE_RATE,
+        },
     },
     'handlers': {
         'console': {
             'level': 'DEBUG' if DEBUG else 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': LOG_FORMAT,
+        },
+        'queue': {
+            '()': 'common.utils.log_handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'django.request': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'ERROR',
             'propagate': False,
         },
         'authentication': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'common': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
+        'common.utils.api_response_utils': {
+            'filters': ['rate_limit'],
+        },
+        'request.middleware': {
+            'filters': ['rate_limit'],
+        },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
 }
@@ -409,15 +484,13 @@ LOGGING = {
 if CLOUDWATCH_LOGGING_ENABLED:
     LOGGING['handlers']['cloudwatch'] = CLOUDWATCH_HANDLER
     LOGGING['handlers']['cloudwatch_errors'] = CLOUDWATCH_ERROR_HANDLER
-    
-    # Add CloudWatch to all loggers
-    for logger_name in LOGGING['loggers']:
-        if 'cloudwatch' not in LOGGING['loggers'][logger_name]['handlers']:
-            LOGGING['loggers'][logger_name]['handlers'].append('cloudwatch')
-    
-    # Add CloudWatch errors handler to error loggers
-    if 'django.request' in LOGGING['loggers']:
-        LOGGING['loggers']['django.request']['handlers'].append('cloudwatch_errors')
-    
-    # Root logger also gets CloudWatch
-    LOGGING['root']['handlers'].append('cloudwatch')
+
+    # Everything that reaches the console also goes to CloudWatch
+    LOGGING['handlers']['queue']['handlers'].append('cfg://handlers.cloudwatch')
+
+    # django.request errors also go to the errors log group, on their own queue
+    LOGGING['handlers']['queue_errors'] = {
+        '()': 'common.utils.log_handlers.QueueListenerHandler',
+        'handlers': ['cfg://handlers.cloudwatch_errors'],
+    }
+    LOGGING['loggers']['django.request']['handlers'].append('queue_errors')
@@ -20,6 +20,7 @@ from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from common.views import metrics_view
 
 # Customize admin site header and title
 admin.site.site_header = "M AUTO ZONE ADMIN"
@@ -32,8 +33,10 @@ urlpatterns = [
     path('api/v1/auth/', include('authentication.urls')),
     path('api/v1/requests/', include('request.urls')),
     path('api/v1/store/', include('store.urls')),
+    path('api/v1/', include('common.urls')),
     path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve static and media files